@@ -6,7 +6,9 @@ a = Analysis(
     pathex=[],
     binaries=[],
     datas=[('Structure ID List.xlsx', '.')],
-    hiddenimports=[],
+    hiddenimports=['customtkinter', 'exifread', 'geopy.distance', 'numpy', 'pandas', 'psutil', 'pyperclip', 'requests',
+                   'rapidfuzz.fuzz', 'rapidfuzz.process', 'thefuzz.process', 'thefuzz.fuzz', 'thefuzz.utils',
+                   'tkcalendar'],
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
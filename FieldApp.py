@@ -1,8 +1,18 @@
+import argparse
+import csv
+import hashlib
+import importlib
+import io
+import json
 import math
+import multiprocessing
 import os
+import pickle
 import queue
 import re
 import shutil
+import sqlite3
+import struct
 import subprocess
 import sys
 import threading
@@ -11,59 +21,227 @@ import tkinter as tk
 import tkinter.messagebox as messagebox
 import traceback
 import webbrowser
+import zlib
+from collections import deque, namedtuple
+from concurrent.futures import as_completed, Future, ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime
-from tkinter import filedialog, StringVar, simpledialog, ttk
-from zipfile import ZipFile, ZIP_DEFLATED
-
-import customtkinter as ctk
-import exifread
-import geopy.distance
-import pandas as pd
-import psutil
-import pyperclip
-import requests
-from PIL import Image, ExifTags
-from thefuzz import process, fuzz
-from tkcalendar import DateEntry
+from tkinter import filedialog, StringVar, ttk
+from zipfile import BadZipFile, ZipFile, ZipInfo, ZIP_DEFLATED, ZIP_STORED, ZIP64_LIMIT
+
+# Time the app started loading its libraries, used for the startup report
+startup_time = time.perf_counter()
+# Seconds taken by each library import, by module name
+import_times = {}
+
+
+class LazyModule:
+    """
+    Stands in for a third-party module and imports it on first use, so that the window shows up without waiting for
+    libraries it doesn't need yet. Modules imported this way must be listed in the hiddenimports of the PyInstaller
+    spec file.
+    """
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def _load(self):
+        if self._module is None:
+            start = time.perf_counter()
+            module = importlib.import_module(self._name)
+            import_times.setdefault(self._name, time.perf_counter() - start)
+            self._module = module
+        return self._module
+
+    def __getattr__(self, attribute):
+        if attribute in ('_name', '_module'):
+            raise AttributeError(attribute)
+        return getattr(self._load(), attribute)
+
+
+ctk = LazyModule('customtkinter')
+exifread = LazyModule('exifread')
+geopy_distance = LazyModule('geopy.distance')
+np = LazyModule('numpy')
+pd = LazyModule('pandas')
+psutil = LazyModule('psutil')
+pyperclip = LazyModule('pyperclip')
+requests = LazyModule('requests')
+rapid_fuzz = LazyModule('rapidfuzz.fuzz')
+rapid_process = LazyModule('rapidfuzz.process')
+process = LazyModule('thefuzz.process')
+fuzz = LazyModule('thefuzz.fuzz')
+fuzz_utils = LazyModule('thefuzz.utils')
+tkcalendar = LazyModule('tkcalendar')
+
+# Libraries only needed once the user starts a check, imported in the background after the window is shown
+BACKGROUND_IMPORTS = (np, pd, geopy_distance, exifread, rapid_fuzz, rapid_process, process, fuzz, fuzz_utils,
+                      requests, psutil, pyperclip)
+UPDATE_CHECK_TIMEOUT = 5  # Seconds to wait for the latest version number
+UPDATE_DOWNLOAD_TIMEOUT = 30  # Seconds to wait for the update script to connect or send more data
+STARTUP_REPORTS_KEPT = 20  # Startup reports kept in startup.json, the latest last
 
 exe_name = "C2 Field App.exe"
 version_url = "https://pretant.github.io/packagefielddata/version.txt"
 version_history_url = "https://pretant.github.io/packagefielddata/versionhistory/"
 
 
-def print_to_widget(text, newline=True, color='white', url=None):
-    text_space.configure(state='normal')
+# Packaging jobs run without the GUI (see PackagingJob) are bound to the thread running them, the helpers below send
+# messages and dialogs to that job instead of the widgets
+job_context = threading.local()
+
+
+def current_job():
+    return getattr(job_context, 'job', None)
+
+
+def run_metadata_cache():
+    """
+    Returns the metadata cache of the current run: the packaging job's own, or the GUI's image_metadata_cache.
+    """
+    job = current_job()
+    return job.image_metadata_cache if job is not None else image_metadata_cache
+
+
+def cancel_event():
+    """
+    Returns the event set to cancel the current run: the packaging job's own, or the GUI's cancel_zip.
+    """
+    job = current_job()
+    return job.cancelled if job is not None else cancel_zip
+
+
+def job_thread(target, args=()):
+    """
+    Creates a thread that runs target under the packaging job of the calling thread, if any.
+    """
+    job = current_job()
+
+    def run():
+        job_context.job = job
+        target(*args)
+
+    return threading.Thread(target=run)
+
+
+def in_main_loop(function, *args, wait=True):
+    """
+    Runs function in the Tk main loop, so that worker threads never touch a widget. From the main thread it runs
+    directly; from a worker it is scheduled with root.after and, if wait is True, the worker waits for its result.
+    """
+    if threading.current_thread() is threading.main_thread():
+        return function(*args)
+    if not wait:
+        root.after(0, function, *args)
+        return None
+    answer_queue = queue.Queue(maxsize=1)
+
+    def run():
+        try:
+            answer_queue.put((True, function(*args)))
+        except Exception as error:
+            answer_queue.put((False, error))
+
+    root.after(0, run)
+    succeeded, result = answer_queue.get()  # This will block until the main loop has run the function
+    if not succeeded:
+        raise result
+    return result
+
+
+def ask_yes_no(title, message, job_answer=True):
+    """
+    Asks the user a yes or no question. A packaging job answers with job_answer without asking.
+    """
+    job = current_job()
+    if job is not None:
+        job.log(f"{title}: {'yes' if job_answer else 'no'}")
+        return job_answer
+    return in_main_loop(messagebox.askyesno, title, message)
+
+
+def show_info(title, message):
+    if current_job() is None:
+        in_main_loop(messagebox.showinfo, title, message, wait=False)
+
+
+def show_error(title, message):
+    job = current_job()
+    if job is not None:
+        job.errors.append(message)
+        job.log(f"{title}: {message}")
+        return
+    in_main_loop(messagebox.showerror, title, message, wait=False)
 
-    # Insert the text with newline if requested
-    insert_position = text_space.index("end-1c")
-    text_to_insert = str(text) + ('\n' if newline else '')
-    text_space.insert("end", text_to_insert)
 
-    # Calculate the end position of the inserted text for color or hyperlink application
-    end_position = text_space.index(f"{insert_position}+{len(text_to_insert)}c")
+# Messages for the text box are queued by any thread and written by the Tk main loop in batches (see drain_log)
+LogRecord = namedtuple('LogRecord', ['text', 'color', 'url'])
+log_queue = queue.Queue()
+LOG_INTERVAL = 50  # Milliseconds between two batches
+LOG_BATCH_LIMIT = 5000  # Most records written in one batch, the rest waits for the next one
+log_tags = set()
+hyperlink_count = 0
 
-    # Configure tag for color if it hasn't been configured yet in a global context
-    if color and color not in text_space.tag_names():
-        text_space.tag_config(color, foreground=color)
 
-    # Apply the color tag to the inserted text
-    text_space.tag_add(color, insert_position, end_position)
+def print_to_widget(text, newline=True, color='white', url=None):
+    job = current_job()
+    if job is not None:
+        job.log(text, newline)
+        return
 
-    if url:
-        # Define a unique tag name based on the current end position (to ensure uniqueness)
-        hyperlink_tag = f"hyperlink-{insert_position.replace('.', '-')}"
-        # Add the tag to the inserted text for hyperlink
-        text_space.tag_add(hyperlink_tag, insert_position, end_position)
-        # Configure the tag with hyperlink styles and bind a click event
-        text_space.tag_config(hyperlink_tag, foreground="#87CEEB", underline=True)
-        text_space.tag_bind(hyperlink_tag, "<Button-1>", lambda e, url=url: webbrowser.open_new(url))
+    log_queue.put(LogRecord(str(text) + ('\n' if newline else ''), color, url))
 
-    text_space.configure(state='disabled')
-    text_space.see(tk.END)
 
+def drain_log():
+    """
+    Writes the queued messages to the text box and schedules the next batch. Runs in the Tk main loop only.
+    """
+    global hyperlink_count
+    records = []
+    while len(records) < LOG_BATCH_LIMIT:
+        try:
+            records.append(log_queue.get_nowait())
+        except queue.Empty:
+            break
 
-def display_exception():
-    exc_type, exc_value, exc_traceback = sys.exc_info()
+    if records:
+        # Consecutive messages with the same color are inserted together
+        segments = []
+        for record in records:
+            if record.url is None and segments and segments[-1][1] == record.color and segments[-1][2] is None:
+                segments[-1][0].append(record.text)
+            else:
+                segments.append(([record.text], record.color, record.url))
+
+        text_space.configure(state='normal')
+        for texts, color, url in segments:
+            tags = []
+            if color:
+                # Configure tag for color if it hasn't been configured yet
+                if color not in log_tags:
+                    text_space.tag_config(color, foreground=color)
+                    log_tags.add(color)
+                tags.append(color)
+            if url:
+                # Each hyperlink gets its own tag, styled as a link and opening its url when clicked
+                hyperlink_count += 1
+                hyperlink_tag = f"hyperlink-{hyperlink_count}"
+                text_space.tag_config(hyperlink_tag, foreground="#87CEEB", underline=True)
+                text_space.tag_bind(hyperlink_tag, "<Button-1>", lambda e, url=url: webbrowser.open_new(url))
+                tags.append(hyperlink_tag)
+            text_space.insert("end", ''.join(texts), tuple(tags))
+        text_space.configure(state='disabled')
+        text_space.see(tk.END)
+
+    root.after(LOG_INTERVAL, drain_log)
+
+
+def display_exception(error=None):
+    """
+    Shows the exception being handled, or the given one (e.g. raised in a worker thread), in an error window.
+    """
+    exc_type, exc_value, exc_traceback = sys.exc_info() if error is None else (type(error), error,
+                                                                                error.__traceback__)
     error_msg = "".join(traceback.format_exception(exc_type, exc_value, exc_traceback))
 
     # Calculate text_widget dimensions based on the error message
@@ -107,7 +285,7 @@ def open_version_history(event):
 
 def get_latest_version():
     try:
-        response = requests.get(version_url)
+        response = requests.get(version_url, timeout=UPDATE_CHECK_TIMEOUT)
     except requests.exceptions.RequestException:
         print_to_widget("Failed to fetch latest version.")
         return None
@@ -120,7 +298,13 @@ def get_latest_version():
 
 
 def start_update_script():
-    response = requests.get("https://pretant.github.io/packagefielddata/UpdatePackageFieldData.exe")
+    try:
+        response = requests.get("https://pretant.github.io/packagefielddata/UpdatePackageFieldData.exe",
+                                timeout=UPDATE_DOWNLOAD_TIMEOUT)
+    except requests.exceptions.RequestException as error:
+        print_to_widget(f"Could not download update script ({error}).\n")
+        return None
+
     if response.status_code == 200:
         with open("UpdatePackageFieldData.exe", "wb") as f:
             f.write(response.content)
@@ -131,8 +315,36 @@ def start_update_script():
 
 
 def check_for_updates():
+    """
+    Fetches the latest version number in the background and reports it in the log once known, so the window can be
+    used in the meantime.
+    """
+    latest_version_queue = queue.Queue()
+
+    def fetch():
+        # Always publish a result, report() polls until there is one
+        try:
+            latest_version = get_latest_version()
+        except Exception as error:
+            print_to_widget(f"Failed to fetch latest version ({type(error).__name__}: {error}).")
+            latest_version = None
+        latest_version_queue.put(latest_version)
+
+    threading.Thread(target=fetch, daemon=True).start()
+
+    def report():
+        try:
+            latest_version = latest_version_queue.get_nowait()
+        except queue.Empty:
+            root.after(200, report)
+            return
+        report_update(latest_version)
+
+    root.after(200, report)
+
+
+def report_update(latest_version):
     current_version = get_current_version()
-    latest_version = get_latest_version()
 
     if latest_version:
         if latest_version != current_version:
@@ -143,20 +355,8 @@ def check_for_updates():
                                            f"Do you want to update?")
             if response:
                 print_to_widget("Downloading update...")
-                for proc in psutil.process_iter():
-                    try:
-                        if proc.name() == exe_name:
-                            print_to_widget("Closing app...")
-                            start_update_script()
-                            time.sleep(5)  # Give the update script some time to start before killing the main app
-                            try:
-                                proc.kill()
-                            except Exception as e:
-                                print_to_widget(f"{e}\n\nClose the app manually to proceed with the update.")
-                                pass
-                            break
-                    except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
-                        pass
+                # Download and start the update script in the background, so the window keeps responding
+                threading.Thread(target=install_update, daemon=True).start()
             else:
                 print_to_widget("\nUpdate cancelled.\n")
         else:
@@ -167,6 +367,82 @@ def check_for_updates():
         print_to_widget("Unable to check for updates.\n")
 
 
+def install_update():
+    """
+    Starts the update script and closes the app so it can be replaced. Runs in a worker thread.
+    """
+    for proc in psutil.process_iter():
+        try:
+            if proc.name() == exe_name:
+                print_to_widget("Closing app...")
+                try:
+                    script = start_update_script()
+                except Exception as e:
+                    print_to_widget(f"Could not start the update script ({e}).\n", color='red')
+                    script = None
+                if script is None:
+                    show_error("Update Failed", "The update could not be started. Please try again later.")
+                    return
+                time.sleep(5)  # Give the update script some time to start before killing the main app
+                try:
+                    proc.kill()
+                except Exception as e:
+                    print_to_widget(f"{e}\n\nClose the app manually to proceed with the update.")
+                break
+        except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+            pass
+
+
+def warm_imports(first_paint):
+    """
+    Imports the libraries needed by the check in the background, then saves the startup report.
+
+    :param first_paint: Seconds from startup_time until the window was shown
+    """
+    first_paint_time = time.time()
+    start = time.perf_counter()
+    for module in BACKGROUND_IMPORTS:
+        try:
+            module._load()
+        except ImportError as e:
+            print_to_widget(f"Warning: Background import failed ({e}).", color='#FFA500')
+    save_startup_report(first_paint, time.perf_counter() - start, first_paint_time)
+
+
+def save_startup_report(first_paint, background_imports, first_paint_time):
+    """
+    Adds the timings of this startup to startup.json in the app data directory so that slow startups can be compared
+    with earlier ones.
+    """
+    report = {
+        'version': get_current_version(),
+        'date': datetime.now().isoformat(timespec='seconds'),
+        'first_paint': round(first_paint, 3),
+        'background_imports': round(background_imports, 3),
+        'imports': {name: round(seconds, 3) for name, seconds in import_times.items()},
+    }
+    try:
+        # Includes the time before Python runs, e.g. unpacking the PyInstaller bundle
+        report['first_paint_since_launch'] = round(first_paint_time - psutil.Process().create_time(), 3)
+    except Exception:
+        pass
+    print_to_widget(f"Startup: window shown after {report['first_paint']} s, libraries loaded in the background in "
+                    f"{report['background_imports']} s.")
+
+    report_path = os.path.join(get_app_data_dir(), 'startup.json')
+    try:
+        with open(report_path) as f:
+            reports = json.load(f)
+    except (OSError, ValueError):
+        reports = []
+    reports = (reports + [report])[-STARTUP_REPORTS_KEPT:]
+    try:
+        with open(report_path, 'w') as f:
+            json.dump(reports, f, indent=2)
+    except OSError as e:
+        print_to_widget(f"Warning: Could not save the startup report ({e}).", color='#FFA500')
+
+
 class ToolTip:
     def __init__(self, widget, text):
         self.widget = widget
@@ -212,80 +488,376 @@ def create_tooltip(widget, text):
     widget.bind('<Leave>', leave)
 
 
-# Function to get "date taken" metadata of an image.
-def get_date_taken(file_path):
-    image_name = os.path.basename(file_path)
-    with open(file_path, 'rb') as f:
-        tags = exifread.process_file(f, stop_tag='EXIF DateTimeOriginal')
-        if 'EXIF DateTimeOriginal' in tags:
-            date_taken = tags['EXIF DateTimeOriginal'].values
-            date_taken = datetime.strptime(date_taken, '%Y:%m:%d %H:%M:%S').strftime('%m.%d.%Y')
-        else:
+# Number of bytes read from the start of an image when looking for its EXIF (APP1) segment. A JPEG APP1 segment is
+# capped at 64 KB, so this covers it along with any JFIF/APP0 markers that come before it.
+EXIF_HEADER_BYTES = 128 * 1024
+
+# Metadata needed by the checks, extracted from a single read of the image header
+ImageMetadata = namedtuple('ImageMetadata', ['date_taken', 'gps', 'orientation', 'camera'])
+
+# Metadata of every image read during the current run, keyed by file path
+image_metadata_cache = {}
+
+
+def ratio_to_float(value):
+    return value.numerator / value.denominator
+
+
+def gps_tags_to_decimal(tags):
+    lat = tags.get('GPS GPSLatitude')
+    lng = tags.get('GPS GPSLongitude')
+    if not lat or not lng:
+        return None
+    lat_ref = tags['GPS GPSLatitudeRef'].values if 'GPS GPSLatitudeRef' in tags else 'N'
+    lng_ref = tags['GPS GPSLongitudeRef'].values if 'GPS GPSLongitudeRef' in tags else 'E'
+    try:
+        # Convert latitude and longitude from degrees, minutes, seconds to decimal degrees
+        lat_decimal = (ratio_to_float(lat.values[0]) + ratio_to_float(lat.values[1]) / 60 +
+                       ratio_to_float(lat.values[2]) / 3600)
+        lng_decimal = (ratio_to_float(lng.values[0]) + ratio_to_float(lng.values[1]) / 60 +
+                       ratio_to_float(lng.values[2]) / 3600)
+    except (IndexError, ZeroDivisionError, AttributeError):
+        return None
+    # Apply negative sign to latitude and/or longitude if necessary
+    if lat_ref == 'S':
+        lat_decimal *= -1
+    if lng_ref == 'W':
+        lng_decimal *= -1
+    return lat_decimal, lng_decimal
+
+
+def parse_image_metadata(tags):
+    date_taken = None
+    if 'EXIF DateTimeOriginal' in tags:
+        try:
+            date_taken = datetime.strptime(str(tags['EXIF DateTimeOriginal'].values).strip(),
+                                           '%Y:%m:%d %H:%M:%S').strftime('%m.%d.%Y')
+        except ValueError:
             date_taken = None
-            date_str_queue = queue.Queue()
-
-            def ask_date():
-                date_input = simpledialog.askstring("Enter Date",
-                                                    f"Unable to find date taken metadata for {image_name}."
-                                                    f" Please enter the flight date for this structure (YYYYMMDD)",
-                                                    parent=root)
-                date_str_queue.put(date_input)
-
-            while date_taken is None:
-                root.after(0, ask_date)
-                date_str = date_str_queue.get()  # This will block until a result is available
+
+    orientation = None
+    if 'Image Orientation' in tags:
+        orientation = tags['Image Orientation'].values[0]
+
+    # Make and model of the camera, used to group images missing their date taken
+    camera = ' '.join(str(tags[tag]).strip() for tag in ('Image Make', 'Image Model') if tag in tags) or None
+
+    return ImageMetadata(date_taken, gps_tags_to_decimal(tags), orientation, camera)
+
+
+def get_app_data_dir():
+    """
+    Returns the per-user directory where the app keeps its caches, creating it if needed.
+    """
+    base_dir = os.environ.get('LOCALAPPDATA') or os.path.join(os.path.expanduser('~'), '.cache')
+    app_data_dir = os.path.join(base_dir, 'C2 Field App')
+    os.makedirs(app_data_dir, exist_ok=True)
+    return app_data_dir
+
+
+# Settings that can be changed in the Settings window, saved between sessions
+default_settings = {
+    "check_executor": "Threads",  # Worker pool used to scan structure folders ("Threads" or "Processes")
+    "check_workers": "Auto",  # Number of workers in the pool ("Auto" uses one per CPU core)
+    "archive_layout": "Virtual",  # "Virtual" zips the flight in its final layout without changing it on disk,
+                                  # "On disk" renames and reorganizes the flight directory before zipping it
+    "ez_pole_copies": "In archive",  # Where EZ poles are copied for EZPolesForTrans ("In archive" or "On disk")
+    "zip_part_size": "No limit",  # Largest zip file, larger packages are split into parts ("No limit" or "4 GB")
+    "watch_mode": "Off",  # "On" checks the structure folders of the chosen directory as they finish copying
+    "ingest_verify": "Off",  # "On" compares the checksum of every file copied from an SD card with its copy
+    "upload_url": "",  # Address of the field upload server packages are uploaded to after zipping, "" to not upload
+}
+settings = dict(default_settings)
+
+
+def load_settings():
+    try:
+        with open(os.path.join(get_app_data_dir(), 'settings.json'), 'r', encoding='utf-8') as f:
+            settings.update({key: value for key, value in json.load(f).items() if key in default_settings})
+    except (OSError, ValueError):
+        pass
+
+
+def save_settings():
+    try:
+        with open(os.path.join(get_app_data_dir(), 'settings.json'), 'w', encoding='utf-8') as f:
+            json.dump(settings, f, indent=4)
+    except OSError as error:
+        print_to_widget(f"Warning: Unable to save settings ({error}).", color='#FFA500')
+
+
+class MetadataIndex:
+    """
+    Persistent SQLite index of image metadata keyed by path, size and modification time, so that images which have
+    not changed since the last run do not need to be parsed again.
+    """
+    schema_version = 2
+
+    def __init__(self, db_path, max_entries=250000):
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(db_path, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        if self.connection.execute("PRAGMA user_version").fetchone()[0] != self.schema_version:
+            self.connection.execute("DROP TABLE IF EXISTS images")
+            self.connection.execute(f"PRAGMA user_version={self.schema_version}")
+        self.connection.execute("CREATE TABLE IF NOT EXISTS images ("
+                                "path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER, date_taken TEXT, "
+                                "latitude REAL, longitude REAL, orientation INTEGER, camera TEXT, last_used REAL)")
+        self.connection.execute("CREATE INDEX IF NOT EXISTS images_last_used ON images (last_used)")
+        self.connection.commit()
+
+    def lookup(self, file_path, size, mtime_ns):
+        """
+        Returns the indexed ImageMetadata of the file, or None if it is not indexed or has changed since.
+        """
+        with self.lock:
+            row = self.connection.execute("SELECT size, mtime_ns, date_taken, latitude, longitude, orientation, "
+                                          "camera FROM images WHERE path = ?", (file_path,)).fetchone()
+            if row is None or row[0] != size or row[1] != mtime_ns:
+                return None
+            self.connection.execute("UPDATE images SET last_used = ? WHERE path = ?", (time.time(), file_path))
+        gps = (row[3], row[4]) if row[3] is not None and row[4] is not None else None
+        return ImageMetadata(row[2], gps, row[5], row[6])
+
+    def lookup_many(self, file_paths):
+        """
+        Returns {path: (size, mtime_ns, ImageMetadata)} for the indexed files among file_paths. The caller is
+        responsible for comparing size and mtime with the files on disk.
+        """
+        indexed = {}
+        file_paths = list(file_paths)
+        with self.lock:
+            for start in range(0, len(file_paths), 500):
+                batch = file_paths[start:start + 500]
+                rows = self.connection.execute(
+                    "SELECT path, size, mtime_ns, date_taken, latitude, longitude, orientation, camera FROM images "
+                    f"WHERE path IN ({', '.join('?' * len(batch))})", batch).fetchall()
+                for path, size, mtime_ns, date_taken, latitude, longitude, orientation, camera in rows:
+                    gps = (latitude, longitude) if latitude is not None and longitude is not None else None
+                    indexed[path] = (size, mtime_ns, ImageMetadata(date_taken, gps, orientation, camera))
+            self.connection.executemany("UPDATE images SET last_used = ? WHERE path = ?",
+                                        [(time.time(), path) for path in indexed])
+        return indexed
+
+    def store(self, file_path, size, mtime_ns, metadata):
+        latitude, longitude = metadata.gps if metadata.gps else (None, None)
+        with self.lock:
+            self.connection.execute("INSERT OR REPLACE INTO images VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                                    (file_path, size, mtime_ns, metadata.date_taken, latitude, longitude,
+                                     metadata.orientation, metadata.camera, time.time()))
+
+    def flush(self):
+        """
+        Commits pending changes and drops the least recently used entries beyond max_entries.
+        """
+        with self.lock:
+            self.connection.execute("DELETE FROM images WHERE path IN (SELECT path FROM images "
+                                    "ORDER BY last_used DESC LIMIT -1 OFFSET ?)", (self.max_entries,))
+            self.connection.commit()
+
+    def clear(self):
+        with self.lock:
+            self.connection.execute("DELETE FROM images")
+            self.connection.commit()
+            self.connection.execute("VACUUM")
+
+
+metadata_index = None  # Opened on first use by get_metadata_index
+# Packaging jobs run in parallel share one connection to the index, two would lock each other out
+metadata_index_lock = threading.Lock()
+
+
+def get_metadata_index():
+    global metadata_index
+    with metadata_index_lock:
+        if metadata_index is None:
+            try:
+                metadata_index = MetadataIndex(os.path.join(get_app_data_dir(), 'metadata_index.sqlite'))
+            except (OSError, sqlite3.Error) as error:
+                print_to_widget(f"Warning: Unable to open the metadata index ({error}). Images will be read "
+                                f"directly.", color='#FFA500')
+                metadata_index = False
+    return metadata_index or None
+
+
+# Errors of an unreadable image or of exifread on corrupt or truncated metadata, which leave the image without metadata
+EXIF_READ_ERRORS = (OSError, ValueError, IndexError, struct.error)
+
+
+def parse_image_header(header, f):
+    """
+    Parses the EXIF tags of an image from its first EXIF_HEADER_BYTES.
+
+    :param f: Binary file of the whole image, only read for formats that can store their metadata past the header
+    """
+    tags = exifread.process_file(io.BytesIO(header), details=False)
+    # TIFF and PNG files can store their metadata past the header, so fall back to parsing the whole file
+    if not tags and not header.startswith(b'\xff\xd8') and len(header) == EXIF_HEADER_BYTES:
+        f.seek(0)
+        tags = exifread.process_file(f, details=False)
+    return tags
+
+
+# Function to parse the date taken, GPS coordinates and orientation of an image from one bounded header read
+def read_image_tags(file_path):
+    tags = {}
+    try:
+        with open(file_path, 'rb') as f:
+            tags = parse_image_header(f.read(EXIF_HEADER_BYTES), f)
+    except EXIF_READ_ERRORS:
+        pass
+    return tags
+
+
+def extract_image_metadata(file_path):
+    return parse_image_metadata(read_image_tags(file_path))
+
+
+# Function to read the metadata of an image, using the run cache and the metadata index before parsing the file
+def read_image_metadata(file_path):
+    cache = run_metadata_cache()
+    metadata = cache.get(file_path)
+    if metadata is not None:
+        return metadata
+
+    # Reuse the indexed metadata if the file has not changed since it was last parsed
+    index = get_metadata_index()
+    try:
+        stat = os.stat(file_path)
+    except OSError:
+        stat = None
+    if index and stat:
+        metadata = index.lookup(file_path, stat.st_size, stat.st_mtime_ns)
+        if metadata is not None:
+            cache[file_path] = metadata
+            return metadata
+
+    metadata = extract_image_metadata(file_path)
+    cache[file_path] = metadata
+    if index and stat:
+        index.store(file_path, stat.st_size, stat.st_mtime_ns, metadata)
+    return metadata
+
+
+def ask_missing_dates(missing, flight_date):
+    """
+    Asks in one dialog for the date of the images without date taken metadata, by folder or by camera. Runs the dialog
+    in the Tk main loop and waits for it.
+
+    :param missing: List of (image path, folder name, camera) of the images missing their date
+    :param flight_date: Flight date as MM.DD.YYYY, suggested in the entries
+    :return: {image path: date as MM.DD.YYYY} of the images given a date
+    """
+    answer_queue = queue.Queue()
+
+    def show_dialog():
+        dialog = ctk.CTkToplevel(root)
+        dialog.title("Enter Missing Dates")
+        dialog.transient(root)
+        dialog.grab_set()
+
+        ctk.CTkLabel(dialog, justify=tk.LEFT, text=f"{len(missing)} images have no date taken metadata.\n"
+                                                   f"Enter the date they were taken (YYYYMMDD) for each group, "
+                                                   f"or leave it empty to report them as issues.").grid(
+            row=0, column=0, columnspan=2, padx=20, pady=(20, 10), sticky=tk.W)
+        group_by = StringVar(value="Folder")
+        ctk.CTkSegmentedButton(dialog, values=["Folder", "Camera"], variable=group_by,
+                               command=lambda _: show_groups()).grid(row=1, column=0, columnspan=2, padx=20, pady=5)
+        groups_frame = ctk.CTkScrollableFrame(dialog, width=420, height=300)
+        groups_frame.grid(row=2, column=0, columnspan=2, padx=20, pady=10, sticky=tk.N + tk.S + tk.E + tk.W)
+        entries = {}
+
+        def group_of(image):
+            return image[1] if group_by.get() == "Folder" else image[2]
+
+        def show_groups():
+            for widget in groups_frame.winfo_children():
+                widget.destroy()
+            entries.clear()
+            counts = {}
+            for image in missing:
+                counts[group_of(image)] = counts.get(group_of(image), 0) + 1
+            for row, (group, count) in enumerate(counts.items()):
+                ctk.CTkLabel(groups_frame, text=f"{group} ({count} image{'s' if count > 1 else ''})").grid(
+                    row=row, column=0, padx=(5, 10), pady=2, sticky=tk.W)
+                entry = ctk.CTkEntry(groups_frame, width=110,
+                                     placeholder_text=datetime.strptime(flight_date, '%m.%d.%Y').strftime('%Y%m%d'))
+                entry.grid(row=row, column=1, pady=2, sticky=tk.E)
+                entries[group] = entry
+
+        def apply():
+            dates = {}
+            for group, entry in entries.items():
+                text = entry.get().strip()
+                if not text:
+                    continue
                 try:
-                    date_taken = datetime.strptime(date_str, '%Y%m%d').strftime('%m.%d.%Y')
+                    dates[group] = datetime.strptime(text, '%Y%m%d').strftime('%m.%d.%Y')
                 except ValueError:
-                    print_to_widget("Invalid date format, please try again.")
-                    continue
-    return date_taken
+                    messagebox.showerror("Invalid Date", f"Invalid date for {group}, please use YYYYMMDD.",
+                                         parent=dialog)
+                    return
+            dialog.destroy()
+            answer_queue.put({image[0]: dates[group_of(image)] for image in missing if group_of(image) in dates})
+
+        def skip():
+            dialog.destroy()
+            answer_queue.put({})
+
+        ctk.CTkButton(dialog, text="Apply", command=apply).grid(row=3, column=0, padx=20, pady=(5, 20))
+        ctk.CTkButton(dialog, text="Skip", command=skip, fg_color="#565B5E", hover_color="#3a3a3a").grid(
+            row=3, column=1, padx=20, pady=(5, 20))
+        dialog.protocol("WM_DELETE_WINDOW", skip)
+        show_groups()
+
+    in_main_loop(show_dialog, wait=False)
+    return answer_queue.get()  # This will block until the dialog is closed
+
+
+def check_missing_dates(missing, flight_date, issues_dict):
+    """
+    Resolves the dates of the images without date taken metadata, collected by check_issues, at once and checks them
+    against the flight date. Images left without a date are reported as date mismatches.
+
+    :param missing: List of (image path, folder name) of the images missing their date
+    """
+    print_to_widget(f"\n{len(missing)} images have no date taken metadata.")
+    # The camera is read with the rest of the metadata during the check, so the images are not opened again
+    images = [(file_path, folder_name, read_image_metadata(file_path).camera or "Unknown camera")
+              for file_path, folder_name in missing]
+    if current_job() is not None:
+        # Nobody can be asked for the dates, the images are reported as they are
+        dates = {}
+    else:
+        dates = ask_missing_dates(images, flight_date)
+
+    # Report the dates by folder
+    folders = {}
+    for file_path, folder_name, camera in images:
+        folders.setdefault(folder_name, []).append(dates.get(file_path))
+    for folder_name, folder_dates in folders.items():
+        print_to_widget(f"   - Structure {folder_name}:", newline=False)
+        for number, date in enumerate(dict.fromkeys(folder_dates)):
+            count = folder_dates.count(date)
+            images_text = f"{count} image{'s' if count > 1 else ''}"
+            print_to_widget(";" if number else "", newline=False)
+            if date is None:
+                print_to_widget(f" {images_text} without a date", newline=False, color='red')
+                issues_dict["IMAGE METADATA DATE AND FLIGHT DATE MISMATCH"].append((folder_name, "Unknown"))
+            elif date != flight_date:
+                print_to_widget(f" {images_text} taken {date}", newline=False, color='red')
+                issues_dict["IMAGE METADATA DATE AND FLIGHT DATE MISMATCH"].append((folder_name, date))
+            else:
+                print_to_widget(f" {images_text} taken {date}", newline=False)
+        print_to_widget(".")
 
 
-# Function to extract GPS data from images using PIL library
+# Function to extract GPS data from the image metadata
 def get_gps_from_image(filepath):
-    try:
-        with Image.open(filepath) as img:
-            # Get EXIF data from the image
-            exif_data = img._getexif()
-            if exif_data:
-                # Extract only necessary EXIF tags using PIL's TAGS dictionary
-                exif_data = {
-                    ExifTags.TAGS[k]: v
-                    for k, v in exif_data.items()
-                    if k in ExifTags.TAGS
-                }
-                # Extract GPSInfo tag and its corresponding sub-tags using PIL's GPSTAGS dictionary
-                gps_info = exif_data.get('GPSInfo', {})
-                if gps_info:
-                    gps_info = {
-                        ExifTags.GPSTAGS.get(key, key): value
-                        for key, value in gps_info.items()
-                    }
-                    # Extract latitude and longitude data from GPSInfo
-                    lat = gps_info.get('GPSLatitude')
-                    lat_ref = gps_info.get('GPSLatitudeRef', 'N')
-                    lng = gps_info.get('GPSLongitude')
-                    lng_ref = gps_info.get('GPSLongitudeRef', 'E')
-                    if lat and lng:
-                        # Convert latitude and longitude from degrees, minutes, seconds to decimal degrees
-                        lat_decimal = lat[0].numerator / lat[0].denominator + (
-                                lat[1].numerator / lat[1].denominator) / 60 + (
-                                              lat[2].numerator / lat[2].denominator) / 3600
-                        lng_decimal = lng[0].numerator / lng[0].denominator + (
-                                lng[1].numerator / lng[1].denominator) / 60 + (
-                                              lng[2].numerator / lng[2].denominator) / 3600
-                        # Apply negative sign to latitude and/or longitude if necessary
-                        if lat_ref == 'S':
-                            lat_decimal *= -1
-                        if lng_ref == 'W':
-                            lng_decimal *= -1
-                        # Return latitude and longitude as a tuple
-                        return lat_decimal, lng_decimal
-    except (OSError, AttributeError, KeyError):
-        pass
     # Return None if GPS data is not found in the image or there is an error extracting the data
-    return None
+    return read_image_metadata(filepath).gps
 
 
 # Function to calculate distance between two coordinates in feet
@@ -312,9 +884,240 @@ def distance_calculator(coord1, coord2):
         print_to_widget(f"Invalid longitude value(s): {lon1}, {lon2}")
         return None
 
+    return geodesic_distance_feet(coord1, coord2)
+
+
+# Function to calculate distance between two coordinates in feet without reporting invalid coordinates
+def geodesic_distance_feet(coord1, coord2):
+    if coord1 is None or coord2 is None:
+        return None
+    try:
+        if any(math.isnan(c) for c in coord1) or any(math.isnan(c) for c in coord2):
+            return None
+    except TypeError:
+        return None
+    if not (-90 <= coord1[0] <= 90 and -90 <= coord2[0] <= 90 and -180 <= coord1[1] <= 180 and
+            -180 <= coord2[1] <= 180):
+        return None
+
     # Calculate distance and round to two decimal places
-    distance = round(geopy.distance.distance(coord1, coord2).feet, 2)
-    return distance
+    return round(geopy_distance.distance(coord1, coord2).feet, 2)
+
+
+# Mean Earth radius in feet, used by the vectorized haversine distance
+EARTH_RADIUS_FEET = 6371008.8 * 3.280839895
+
+# The haversine distance on a sphere differs from the WGS-84 geodesic distance used by geopy by less than 0.6%
+HAVERSINE_MAX_ERROR = 0.006
+
+
+def haversine_feet(lat, lon, lats, lons):
+    """
+    Calculates the great-circle distance in feet from one coordinate to every coordinate in the lats and lons arrays in
+    a single array operation. NaN coordinates give NaN distances.
+    """
+    lat1, lon1 = np.radians(lat), np.radians(lon)
+    lats, lons = np.radians(lats), np.radians(lons)
+    a = np.sin((lats - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lats) * np.sin((lons - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_FEET * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+# Length of one degree of latitude in feet on the sphere used by haversine_feet
+FEET_PER_DEGREE = EARTH_RADIUS_FEET * math.pi / 180
+
+
+class StructureRegistry:
+    """
+    The Structure ID List of a run, indexed once by Structure ID: membership, GIS coordinates and type of a structure
+    are looked up in a dict instead of scanning the DataFrame.
+
+    :param df: DataFrame returned by load_structure_list
+    """
+
+    def __init__(self, df):
+        self.structure_ids = frozenset(df.iloc[:, 0].dropna())
+        self.ez_poles = frozenset(df[df['Structure Type'] == 'EZ_POLE'].iloc[:, 0].dropna())
+
+        # Row of the first record of each Structure ID, and its coordinates and type packed in arrays
+        self.rows = {}
+        for row, structure_id in enumerate(df['Structure ID']):
+            self.rows.setdefault(structure_id, row)
+        self.latitudes = df['Latitude'].to_numpy()
+        self.longitudes = df['Longitude'].to_numpy()
+        self.types = df['Structure Type'].to_numpy() if 'Structure Type' in df.columns else None
+
+    def __contains__(self, structure_id):
+        return structure_id in self.structure_ids
+
+    def __len__(self):
+        return len(self.structure_ids)
+
+    def location(self, structure_id):
+        """
+        Returns the (latitude, longitude) of a Structure ID as listed, or None if it is not in the list.
+        """
+        row = self.rows.get(structure_id)
+        if row is None:
+            return None
+        return self.latitudes[row], self.longitudes[row]
+
+    def structure_type(self, structure_id):
+        row = self.rows.get(structure_id)
+        return None if row is None or self.types is None else self.types[row]
+
+    def available(self):
+        """
+        Returns the choices for matching folders to structures, starting with every structure.
+        """
+        return AvailableStructures(self)
+
+
+class AvailableStructures:
+    """
+    Set of the Structure IDs still available for matching, kept as the registry with an overlay of the excluded IDs.
+    Removing a choice or copying the set costs as much as the excluded IDs, not the whole territory.
+    """
+
+    def __init__(self, registry, excluded=()):
+        self.registry = registry
+        self.excluded = set(excluded)
+
+    def __contains__(self, structure_id):
+        return structure_id in self.registry and structure_id not in self.excluded
+
+    def __iter__(self):
+        return (structure_id for structure_id in self.registry.structure_ids if structure_id not in self.excluded)
+
+    def __len__(self):
+        return len(self.registry) - len(self.excluded)
+
+    def copy(self):
+        return AvailableStructures(self.registry, self.excluded)
+
+    def add(self, structure_id):
+        self.excluded.discard(structure_id)
+
+    def update(self, structure_ids):
+        self.excluded.difference_update(structure_ids)
+
+    def remove(self, structure_id):
+        if structure_id not in self:
+            raise KeyError(structure_id)
+        self.excluded.add(structure_id)
+
+    def discard(self, structure_id):
+        if structure_id in self.registry:
+            self.excluded.add(structure_id)
+
+    def difference_update(self, structure_ids):
+        for structure_id in structure_ids:
+            self.discard(structure_id)
+
+
+class StructureIndex:
+    """
+    Grid index over the coordinates of the Structure ID List. Structures are bucketed into square cells of
+    cell_degrees, so finding the structures near a nadir only measures the cells around it instead of the whole
+    territory. Lookups can be limited to the available choices and skip excluded structure IDs, and return the same
+    structures and geodesic distances as measuring every structure with distance_calculator.
+    """
+
+    def __init__(self, structure_ids, latitudes, longitudes, cell_degrees=0.01, max_rings=25):
+        self.structure_ids = np.asarray(structure_ids, dtype=object)
+        self.latitudes = np.asarray(latitudes, dtype=float)
+        self.longitudes = np.asarray(longitudes, dtype=float)
+        self.cell_degrees = cell_degrees
+        self.max_rings = max_rings  # Rings searched around a nadir before falling back to a scan of every structure
+
+        with np.errstate(invalid='ignore'):
+            valid = (np.abs(self.latitudes) <= 90) & (np.abs(self.longitudes) <= 180)
+        self.valid_indices = np.flatnonzero(valid)
+        self.max_abs_latitude = float(np.abs(self.latitudes[valid]).max()) if valid.any() else 0.0
+
+        # Bucket the row numbers of the structures by grid cell
+        cells = {}
+        rows = np.floor(self.latitudes[valid] / cell_degrees).astype(int)
+        cols = np.floor(self.longitudes[valid] / cell_degrees).astype(int)
+        for index, row, col in zip(self.valid_indices, rows, cols):
+            cells.setdefault((row, col), []).append(index)
+        self.cells = {key: np.array(indices) for key, indices in cells.items()}
+
+    def _ring(self, row, col, ring):
+        """
+        Returns the row numbers of the structures in the cells at exactly `ring` cells from (row, col).
+        """
+        if ring == 0:
+            keys = [(row, col)]
+        else:
+            keys = [(row + d_row, col + d_col) for d_row in (-ring, ring) for d_col in range(-ring, ring + 1)]
+            keys += [(row + d_row, col + d_col) for d_col in (-ring, ring) for d_row in range(-ring + 1, ring)]
+        found = [self.cells[key] for key in keys if key in self.cells]
+        return np.concatenate(found) if found else np.empty(0, dtype=int)
+
+    def _filter(self, indices, available, exclude):
+        if available is None and not exclude:
+            return indices
+        return np.array([i for i in indices if (available is None or self.structure_ids[i] in available) and
+                         self.structure_ids[i] not in exclude], dtype=int)
+
+    def _measure(self, lat, lon, indices, limit_feet):
+        """
+        Returns [(structure ID, distance in feet)] of the structures within limit_feet (by haversine distance, widened
+        by its error bound), measured with geopy and sorted by distance.
+        """
+        distances = haversine_feet(lat, lon, self.latitudes[indices], self.longitudes[indices])
+        close = indices[distances <= limit_feet * (1 + 2 * HAVERSINE_MAX_ERROR) + 1]
+        measured = sorted((geodesic_distance_feet((lat, lon), (self.latitudes[i], self.longitudes[i])), i)
+                          for i in close)
+        return [(self.structure_ids[i], distance) for distance, i in measured]
+
+    def nearest(self, lat, lon, k=1, available=None, exclude=()):
+        """
+        Finds the k structures closest to (lat, lon).
+
+        :param available: Optional set of structure IDs to choose from
+        :param exclude: Structure IDs to skip
+        :return: List of (structure ID, distance in feet) tuples, closest first
+        """
+        row = math.floor(lat / self.cell_degrees)
+        col = math.floor(lon / self.cell_degrees)
+        # Feet per degree of longitude at the highest latitude the search can reach
+        lon_scale = math.cos(math.radians(min(89.0, max(abs(lat), self.max_abs_latitude) + self.cell_degrees *
+                                              self.max_rings)))
+        candidates = np.empty(0, dtype=int)
+        for ring in range(self.max_rings + 1):
+            candidates = np.concatenate([candidates, self._filter(self._ring(row, col, ring), available, exclude)])
+            if len(candidates) < k:
+                continue
+            # Any structure outside the searched rings is at least this far away
+            outside_feet = ring * self.cell_degrees * FEET_PER_DEGREE * lon_scale * 0.99
+            distances = np.sort(haversine_feet(lat, lon, self.latitudes[candidates], self.longitudes[candidates]))
+            kth_feet = distances[k - 1]
+            if kth_feet * (1 + HAVERSINE_MAX_ERROR) / (1 - HAVERSINE_MAX_ERROR) <= outside_feet:
+                return self._measure(lat, lon, candidates, kth_feet)[:k]
+
+        # The nadir is far from any structure, so measure them all
+        candidates = self._filter(self.valid_indices, available, exclude)
+        if not len(candidates):
+            return []
+        distances = np.sort(haversine_feet(lat, lon, self.latitudes[candidates], self.longitudes[candidates]))
+        return self._measure(lat, lon, candidates, distances[min(k, len(distances)) - 1])[:k]
+
+    def within(self, lat, lon, radius_feet, available=None, exclude=()):
+        """
+        Finds every structure within radius_feet of (lat, lon).
+
+        :return: List of (structure ID, distance in feet) tuples, closest first
+        """
+        row = math.floor(lat / self.cell_degrees)
+        col = math.floor(lon / self.cell_degrees)
+        lon_scale = math.cos(math.radians(min(89.0, abs(lat) + radius_feet / FEET_PER_DEGREE + self.cell_degrees)))
+        rings = math.ceil(radius_feet * (1 + 2 * HAVERSINE_MAX_ERROR) / (self.cell_degrees * FEET_PER_DEGREE *
+                                                                         lon_scale * 0.99)) + 1
+        candidates = np.concatenate([self._filter(self._ring(row, col, ring), available, exclude)
+                                     for ring in range(rings + 1)])
+        return [(structure_id, distance) for structure_id, distance in
+                self._measure(lat, lon, candidates, radius_feet) if distance <= radius_feet]
 
 
 # Function to get the farthest image from the nadir
@@ -364,12 +1167,13 @@ def get_farthest_from_nadir(root_directory):
     return farthest_distances
 
 
-def generate_txt_file(directory_path, pilot_id):
+def generate_txt_file(directory_path, pilot_id, manifest=None):
     """
     Writes the names of all subfolders in the given directory to a file named '[pilot_id]_structure_list.txt'.
 
     :param directory_path: String path to the directory where subfolders are located
     :param pilot_id: The pilot ID to be used in the generated file name
+    :param manifest: Optional DirectoryManifest of the directory, the subfolders are taken from it and the file added
     """
     # Validate if the path exists
     if not os.path.isdir(directory_path):
@@ -378,72 +1182,930 @@ def generate_txt_file(directory_path, pilot_id):
 
     # Create (or overwrite) '[pilot_id]_structure_list.txt'
     output_file_path = os.path.join(directory_path, f"{pilot_id}_structure_list.txt")
+    if manifest is not None:
+        subfolders = [folder.name for folder in manifest.folders]
+    else:
+        subfolders = [item for item in os.listdir(directory_path) if os.path.isdir(os.path.join(directory_path, item))]
     with open(output_file_path, 'w', encoding='utf-8') as f:
-        # List everything in the directory
-        for item in os.listdir(directory_path):
+        for item in subfolders:
             # Skip "EZPolesForTrans"
             if item == "EZPolesForTrans":
                 continue
-            # Build the full path of the item
-            item_path = os.path.join(directory_path, item)
-            # Check if the item is a directory
-            if os.path.isdir(item_path):
-                f.write(item + '\n')
+            f.write(item + '\n')
+    if manifest is not None:
+        manifest.add_file(os.path.basename(output_file_path))
 
     print_to_widget(f"\n{pilot_id}_structure_list.txt has been generated")
 
 
-def get_directory_size(directory):
-    total_size = 0
-    for dirpath, _, filenames in os.walk(directory):
-        for f in filenames:
-            fp = os.path.join(dirpath, f)
-            if os.path.exists(fp):
-                total_size += os.path.getsize(fp)
-    return total_size
+# A file of a DirectoryManifest, with the size and modification time read when the directory was scanned
+ManifestFile = namedtuple('ManifestFile', ['name', 'size', 'mtime_ns'])
+
+
+class DirectoryManifest:
+    """
+    In-memory tree of a directory read with one os.scandir pass. Every packaging stage reads the files, sizes and
+    innermost folders from the manifest and updates it with the changes it makes on disk, instead of walking the
+    directory again.
+    """
+
+    def __init__(self, path, parent=None, virtual=False):
+        self.path = path
+        self.parent = parent
+        self.files = []  # ManifestFiles in scandir order
+        self.folders = []  # DirectoryManifests of the subfolders in scandir order
+        self.virtual = virtual  # Folder that only exists in the archive
+        self.source = None  # For a virtual copy, the folder whose files it shows
+
+    @classmethod
+    def scan(cls, path, parent=None):
+        folder = cls(path, parent)
+        with os.scandir(path) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    folder.folders.append(cls.scan(entry.path, folder))
+                elif entry.is_file():
+                    stat = entry.stat()
+                    folder.files.append(ManifestFile(entry.name, stat.st_size, stat.st_mtime_ns))
+        return folder
+
+    @property
+    def name(self):
+        return os.path.basename(self.path)
+
+    @property
+    def innermost(self):
+        return not self.folders and bool(self.files)
+
+    def iter_folders(self, topdown=True):
+        if topdown:
+            yield self
+        for folder in self.folders:
+            yield from folder.iter_folders(topdown)
+        if not topdown:
+            yield self
+
+    def walk(self):
+        """
+        Yields (dirpath, dirnames, filenames) like os.walk.
+        """
+        for folder in self.iter_folders():
+            yield folder.path, [subfolder.name for subfolder in folder.folders], [file.name for file in folder.files]
+
+    def iter_files(self):
+        """
+        Yields (path, ManifestFile) of every file in the tree.
+        """
+        for folder in self.iter_folders():
+            for file in folder.files:
+                yield os.path.join(folder.path, file.name), file
+
+    def iter_entries(self):
+        """
+        Yields (path on disk, path in the tree, ManifestFile) of every file, so that the files of virtual copies are
+        read from their source folder.
+        """
+        for folder in self.iter_folders():
+            disk_path = folder.source.path if folder.source else folder.path
+            for file in folder.files:
+                yield os.path.join(disk_path, file.name), os.path.join(folder.path, file.name), file
+
+    def size(self):
+        return sum(file.size for _, file in self.iter_files())
+
+    def innermost_folders(self):
+        return [folder for folder in self.iter_folders() if folder.innermost]
+
+    def subfolder(self, name, virtual=False):
+        """
+        Returns the subfolder with the given name, adding it to the manifest if it is not there yet.
+        """
+        for folder in self.folders:
+            if folder.name == name:
+                return folder
+        folder = DirectoryManifest(os.path.join(self.path, name), self, virtual)
+        self.folders.append(folder)
+        return folder
+
+    def add_file(self, name):
+        """
+        Adds or refreshes a file that was written into this folder.
+        """
+        stat = os.stat(os.path.join(self.path, name))
+        self.files = [file for file in self.files if file.name != name]
+        self.files.append(ManifestFile(name, stat.st_size, stat.st_mtime_ns))
+
+    def remove_file(self, name):
+        self.files = [file for file in self.files if file.name != name]
+
+    def copy_to(self, parent, name=None, virtual=False):
+        """
+        Records a copy of this tree made under parent. A virtual copy is only written to the archive, its files are
+        read from this tree wherever it is moved.
+        """
+        copy = DirectoryManifest(os.path.join(parent.path, name or self.name), parent, virtual)
+        if virtual:
+            copy.source = self.source or self
+        copy.files = list(self.files)
+        parent.folders.append(copy)
+        for folder in self.folders:
+            folder.copy_to(copy, virtual=virtual)
+        return copy
+
+    def move_to(self, parent, name=None):
+        """
+        Records a move of this tree under parent.
+        """
+        if self.parent:
+            self.parent.folders.remove(self)
+        self.parent = parent
+        parent.folders.append(self)
+        self.rebase(os.path.join(parent.path, name or self.name))
+
+    def detach(self):
+        if self.parent:
+            self.parent.folders.remove(self)
+            self.parent = None
+
+    def rebase(self, path):
+        """
+        Updates the paths of the tree after it was moved or renamed to path.
+        """
+        self.path = path
+        for folder in self.folders:
+            folder.rebase(os.path.join(path, folder.name))
+
+
+# Progress of a packaging stage, measured in bytes of the files it processed
+ProgressUpdate = namedtuple('ProgressUpdate', ['stage', 'done_bytes', 'total_bytes', 'rate', 'eta'])
+PROGRESS_WINDOW = 5.0  # Seconds of history used for the throughput
+PROGRESS_INTERVAL = 0.1  # Minimum seconds between two updates of a stage
+PROGRESS_LOG_INTERVAL = 10.0  # Seconds between two progress lines in the log
+PROGRESS_REFRESH = 100  # Milliseconds between two refreshes of the progress bar
+
+
+def format_bytes(size):
+    if size >= 1024 ** 3:
+        return f"{size / 1024 ** 3:.2f} GB"
+    return f"{size / 1024 ** 2:.1f} MB"
+
+
+def format_eta(seconds):
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02d}:{seconds:02d}" if hours else f"{minutes}:{seconds:02d}"
+
+
+class ProgressQueue(queue.Queue):
+    """
+    Queue of progress updates that only keeps the latest one: a new update replaces the one not yet drawn, so the
+    queue never grows and putting never blocks. None asks to reset the progress bar.
+    """
+
+    def _init(self, maxsize):
+        self.queue = deque(maxlen=1)
+
+
+class ProgressTracker:
+    """
+    Counts the bytes processed by a packaging stage and puts ProgressUpdates with the rolling throughput and the time
+    left on the progress queue. Safe to advance from several threads.
+    """
+
+    def __init__(self, progress_queue, stage, total_bytes):
+        self.progress_queue = progress_queue
+        self.stage = stage
+        self.total_bytes = total_bytes
+        self.done_bytes = 0
+        self.start_time = time.monotonic()
+        self.samples = deque([(self.start_time, 0)])
+        self.published = 0.0
+        self.lock = threading.Lock()
+        self._publish(self.start_time)
+
+    def advance(self, nbytes):
+        with self.lock:
+            self.done_bytes += nbytes
+            now = time.monotonic()
+            self.samples.append((now, self.done_bytes))
+            # Keep one sample older than the window so that the rate covers the whole window
+            while len(self.samples) > 2 and self.samples[1][0] < now - PROGRESS_WINDOW:
+                self.samples.popleft()
+            if now - self.published >= PROGRESS_INTERVAL:
+                self._publish(now)
+
+    def add_total(self, nbytes):
+        with self.lock:
+            self.total_bytes += nbytes
+
+    def finish(self):
+        with self.lock:
+            self._publish(time.monotonic())
+
+    @property
+    def elapsed(self):
+        return time.monotonic() - self.start_time
+
+    def _publish(self, now):
+        self.published = now
+        first_time, first_bytes = self.samples[0]
+        rate = (self.done_bytes - first_bytes) / (now - first_time) if now > first_time else 0.0
+        remaining = max(self.total_bytes - self.done_bytes, 0)
+        eta = remaining / rate if rate > 0 else None
+        self.progress_queue.put(ProgressUpdate(self.stage, self.done_bytes, self.total_bytes, rate, eta))
+
+
+progress_log_state = {'stage': None, 'logged': 0.0}
+
+
+def draw_progress(update):
+    """
+    Shows a ProgressUpdate on the progress bar, and in the log every PROGRESS_LOG_INTERVAL seconds.
+    """
+    fraction = min(update.done_bytes / update.total_bytes, 1.0) if update.total_bytes else 1.0
+    text = f"{update.stage} {int(fraction * 100)}%"
+    if update.rate:
+        text += f" - {update.rate / 1024 / 1024:.1f} MB/s"
+    if update.eta is not None and fraction < 1:
+        text += f" - {format_eta(update.eta)} left"
+    progress_bar_canvas.coords(progress_bar_rect, 0, 0, fraction * 448, 20)  # Update the progress bar
+    progress_bar_canvas.itemconfig(progress_bar_percentage, text=text)  # Update the percentage
+
+    now = time.monotonic()
+    if progress_log_state['stage'] != update.stage:
+        progress_log_state.update(stage=update.stage, logged=now)
+    elif now - progress_log_state['logged'] >= PROGRESS_LOG_INTERVAL and fraction < 1:
+        progress_log_state['logged'] = now
+        print_to_widget(f"   {text} ({format_bytes(update.done_bytes)} of {format_bytes(update.total_bytes)})")
+
+
+def reset_progress_bar():
+    progress_bar_canvas.coords(progress_bar_rect, 0, 0, 0, 20)
+    progress_bar_canvas.itemconfig(progress_bar_percentage, text="0%")
 
 
 def update_progress_bar(progress_queue):
-    if not progress_queue.empty():
-        progress = progress_queue.get()
-        progress_bar_canvas.coords(progress_bar_rect, 0, 0, progress * 4.48, 20)  # Update the progress bar
-        progress_bar_canvas.itemconfig(progress_bar_percentage, text=f"{int(progress)}%")  # Update the percentage
-        root.update_idletasks()
-    if not progress_queue.empty():
-        root.after(1000, update_progress_bar, progress_queue)
+    """
+    Draws the latest update published by the packaging thread and schedules the next refresh. Workers never touch the
+    widgets, this runs in the Tk main loop only.
+    """
+    try:
+        update = progress_queue.get_nowait()
+    except queue.Empty:
+        pass
+    else:
+        if update is None:
+            reset_progress_bar()
+        else:
+            draw_progress(update)
+
+    cancel_state = "normal" if zipping.is_set() else "disabled"
+    if cancel_button.cget("state") != cancel_state:
+        cancel_button.configure(state=cancel_state)
 
+    root.after(PROGRESS_REFRESH, update_progress_bar, progress_queue)
 
-# Initialize cancel_zip flag to False (used to cancel the zipping process)
-cancel_zip = False
+
+# Set by the cancel button to cancel zipping (or ingesting, or uploading) in the GUI. Packaging jobs have their own.
+cancel_zip = threading.Event()
+# Set while the GUI is zipping or ingesting SD cards, which enables the cancel button
+zipping = threading.Event()
 
 
 def request_cancel():
-    global cancel_zip
-    cancel_zip = True
+    cancel_zip.set()
     print_to_widget("Cancellation requested. Exiting zipping process.")
 
 
-def zip_directory(source, destination, progress_queue):
-    global cancel_zip
-    total_files = sum(len(files) for _, _, files in os.walk(source))
-    zipped_files = 0
+# A file of a planned archive: its path on disk (or None and the generated data), its name in the archive, and the
+# size and modification time of the source file
+ArchiveEntry = namedtuple('ArchiveEntry', ['source', 'arc_name', 'size', 'mtime_ns', 'data'])
 
-    base_folder_name = os.path.basename(source)
 
-    with ZipFile(destination, 'w', ZIP_DEFLATED) as zf:
-        for directory, _, files in os.walk(source):
-            for file in files:
-                # Check if the cancel_zip flag is set to True (when cancel button is pressed)
-                if cancel_zip:
-                    print(123)
-                    return
-                filepath = os.path.join(directory, file)
-                arc_name = os.path.join(base_folder_name, os.path.relpath(filepath, source))
-                zf.write(filepath, arc_name)
-                zipped_files += 1
-                # Update the progress queue with the progress percentage
-                progress_percentage = (zipped_files / total_files) * 100
-                progress_queue.put(progress_percentage)
+def plan_archive_layout(manifest, root_name, pilot_id, ez_list):
+    """
+    Plans the archive of a flight without changing anything on disk: the same layout as renaming the flight
+    directory to root_name, generating the structure list, copying the EZ poles into EZPolesForTrans and moving all
+    poles into Distribution. Hidden Mac files and empty folders are left out.
+
+    :param manifest: DirectoryManifest of the flight directory
+    :return: List of ArchiveEntry
+    """
+    layout = []
+
+    def add_tree(folder, arc_dir):
+        for filepath, path, file in folder.iter_entries():
+            if not file.name.startswith("._"):
+                layout.append(ArchiveEntry(filepath, os.path.join(arc_dir, os.path.relpath(path, folder.path)),
+                                           file.size, file.mtime_ns, None))
+
+    # Files in the flight directory stay at the root, next to the generated structure list
+    list_name = f"{pilot_id}_structure_list.txt"
+    structure_list = ''.join(f"{folder.name}\n" for folder in manifest.folders
+                             if folder.name != "EZPolesForTrans").encode('utf-8')
+    layout.append(ArchiveEntry(None, os.path.join(root_name, list_name), len(structure_list), None, structure_list))
+    for file in manifest.files:
+        if not file.name.startswith("._") and file.name != list_name:
+            layout.append(ArchiveEntry(os.path.join(manifest.path, file.name), os.path.join(root_name, file.name),
+                                       file.size, file.mtime_ns, None))
+
+    ez_dir = os.path.join(root_name, "EZPolesForTrans")
+    innermost_folders = manifest.innermost_folders()
+    for ez_name in ez_list:
+        source_folder = next((f for f in innermost_folders if f.name == ez_name), None)
+        if source_folder and source_folder.path != os.path.join(manifest.path, "EZPolesForTrans", ez_name):
+            add_tree(source_folder, os.path.join(ez_dir, ez_name))
+
+    for folder in manifest.folders:
+        if folder.name in ("EZPolesForTrans", "Distribution") or not ez_list:
+            # Poles are only gathered into Distribution when the flight has EZ poles
+            add_tree(folder, os.path.join(root_name, folder.name))
+        else:
+            add_tree(folder, os.path.join(root_name, "Distribution", folder.name))
+    return layout
+
+
+# Files that are already compressed, stored as they are. TIFF and DNG files are left out, drone thermal and
+# multispectral TIFFs are usually uncompressed and deflate well; the ones that do not are stored after a trial (see
+# deflate_file and worth_deflating).
+STORED_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.heic', '.mp4', '.mov', '.avi', '.lrf', '.zip', '.7z', '.gz', '.rar'}
+DEFLATE_LEVEL = 6
+DEFLATE_IN_MEMORY_LIMIT = 4 * 1024 * 1024  # Larger files are deflated by the writer while streaming
+DEFLATE_WINDOW_BYTES = 64 * 1024 * 1024  # Most bytes of files read and deflated ahead of the writer at a time
+DEFLATE_TRIAL_BYTES = 1024 * 1024  # Bytes deflated to decide whether a large file is worth deflating
+DEFLATE_TRIAL_RATIO = 0.95  # Large files that do not shrink below this ratio in the trial are stored
+ZIP_WRITE_CHUNK = 1024 * 1024  # Bytes of a streamed file written (and counted in the progress) at a time
+
+
+def entry_compression(filename):
+    """
+    Returns the compression type to use for a file in the archive.
+    """
+    return ZIP_STORED if os.path.splitext(filename)[1].lower() in STORED_EXTENSIONS else ZIP_DEFLATED
+
+
+def worth_deflating(filepath):
+    """
+    Returns True if the start of a file shrinks enough when deflated, to decide on large files that are deflated while
+    streaming and so cannot fall back to being stored afterwards.
+    """
+    try:
+        with open(filepath, 'rb') as f:
+            sample = f.read(DEFLATE_TRIAL_BYTES)
+    except OSError:
+        return True  # Let the writer report the error
+    if not sample:
+        return False
+    return len(zlib.compress(sample, 1)) < len(sample) * DEFLATE_TRIAL_RATIO
+
+
+def deflate_file(filepath, arc_name):
+    """
+    Reads and deflates a file in memory. Runs in the zip worker threads (zlib releases the GIL while compressing).
+
+    :return: Tuple of the ZipInfo and the compressed data, or of the ZipInfo and None if deflate does not shrink it
+    """
+    zinfo = ZipInfo.from_file(filepath, arc_name)
+    with open(filepath, 'rb') as f:
+        data = f.read()
+    compressor = zlib.compressobj(DEFLATE_LEVEL, zlib.DEFLATED, -15)
+    compressed = compressor.compress(data) + compressor.flush()
+    if len(compressed) >= len(data):
+        return zinfo, None
+    zinfo.file_size = len(data)
+    zinfo.CRC = zlib.crc32(data)
+    return zinfo, compressed
+
+
+class ArchiveWriter(ZipFile):
+    """
+    ZipFile that can also add entries deflated elsewhere, so that the compression can run in worker threads while a
+    single thread writes the archive in order. The result is a standard zip file.
+
+    Writing compressed data as it is relies on private ZipFile attributes (RAW_WRITE_ATTRIBUTES), which CPython has had
+    from 3.6 to at least 3.13. If a Python version lacks them, raw_writes is False: write_archive then does not deflate
+    in the worker pool, and copy_from decompresses and compresses the entry again. The archive is the same, only
+    slower to write.
+    """
+    RAW_WRITE_ATTRIBUTES = ('_lock', '_writing', 'start_dir', '_writecheck', '_didModify', 'filelist', 'NameToInfo')
+
+    @property
+    def raw_writes(self):
+        return all(hasattr(self, attribute) for attribute in self.RAW_WRITE_ATTRIBUTES)
+
+    def write_deflated(self, zinfo, compressed, arc_name=None):
+        """
+        Adds an entry whose raw deflate data, CRC and file size were computed by deflate_file, optionally under
+        another name than the one in zinfo.
+        """
+        if arc_name is not None and arc_name != zinfo.filename:
+            copy = ZipInfo(arc_name, zinfo.date_time)
+            copy.external_attr, copy.file_size, copy.CRC = zinfo.external_attr, zinfo.file_size, zinfo.CRC
+            zinfo = copy
+        zinfo.compress_type = ZIP_DEFLATED
+        zinfo.compress_size = len(compressed)
+        self._write_raw(zinfo, [compressed])
+
+    def copy_from(self, archive, name):
+        """
+        Copies an entry of another open zip file without decompressing it.
+        """
+        source_info = archive.getinfo(name)
+        if not self.raw_writes:
+            zinfo = ZipInfo(name, source_info.date_time)
+            zinfo.compress_type, zinfo.external_attr = source_info.compress_type, source_info.external_attr
+            zinfo.file_size = source_info.file_size
+            with archive.open(source_info) as source, self.open(zinfo, 'w') as destination:
+                shutil.copyfileobj(source, destination, 1024 * 1024)
+            return
+
+        archive.fp.seek(source_info.header_offset)
+        header = archive.fp.read(30)
+        name_length, extra_length = struct.unpack('<HH', header[26:30])
+        archive.fp.seek(source_info.header_offset + 30 + name_length + extra_length)
+
+        zinfo = ZipInfo(name, source_info.date_time)
+        zinfo.compress_type = source_info.compress_type
+        zinfo.external_attr = source_info.external_attr
+        zinfo.CRC, zinfo.file_size, zinfo.compress_size = (source_info.CRC, source_info.file_size,
+                                                           source_info.compress_size)
+
+        def chunks(remaining=source_info.compress_size):
+            while remaining:
+                chunk = archive.fp.read(min(remaining, 1024 * 1024))
+                if not chunk:
+                    raise BadZipFile(f"Truncated entry {name}")
+                remaining -= len(chunk)
+                yield chunk
+        self._write_raw(zinfo, chunks())
+
+    def _write_raw(self, zinfo, chunks):
+        """
+        Writes an entry whose compressed data, CRC and sizes are already known, following ZipFile._open_to_write.
+        """
+        with self._lock:
+            if self._writing:
+                raise ValueError("Can't write to the ZIP file while there is another write handle open on it.")
+            zinfo.flag_bits = 0x00
+            zip64 = max(zinfo.file_size, zinfo.compress_size) > ZIP64_LIMIT
+            self.fp.seek(self.start_dir)
+            zinfo.header_offset = self.fp.tell()
+            self._writecheck(zinfo)
+            self._didModify = True
+            self.fp.write(zinfo.FileHeader(zip64))
+            for chunk in chunks:
+                self.fp.write(chunk)
+            self.start_dir = self.fp.tell()
+            self.filelist.append(zinfo)
+            self.NameToInfo[zinfo.filename] = zinfo
+
+    def write_copies(self, filepath, arc_names, compress_type, size, progress=None):
+        """
+        Adds a file under each of the given names, reading it only once when it fits in memory. Large files are
+        streamed in ZIP_WRITE_CHUNK blocks and progress(nbytes) is called after each block, so that the progress bar
+        keeps moving while a large video is written.
+        """
+        if len(arc_names) == 1 or size > DEFLATE_IN_MEMORY_LIMIT:
+            for arc_name in arc_names:
+                zinfo = ZipInfo.from_file(filepath, arc_name)
+                zinfo.compress_type = compress_type
+                with open(filepath, 'rb') as source, self.open(zinfo, 'w') as destination:
+                    for chunk in iter(lambda: source.read(ZIP_WRITE_CHUNK), b''):
+                        destination.write(chunk)
+                        if progress:
+                            progress(len(chunk))
+            return
+        with open(filepath, 'rb') as f:
+            data = f.read()
+        for arc_name in arc_names:
+            zinfo = ZipInfo.from_file(filepath, arc_name)
+            zinfo.compress_type = compress_type
+            self.writestr(zinfo, data)
+            if progress:
+                progress(len(data))
+
+
+FICLONE = 0x40049409  # Linux ioctl that clones a file on copy-on-write file systems (Btrfs, XFS)
+
+
+def reflink_file(source_file, destination_file):
+    """
+    Clones a file without copying its data, where the file system supports it.
+
+    :return: True if the file was cloned
+    """
+    try:
+        import fcntl
+    except ImportError:
+        return False
+    try:
+        with open(source_file, 'rb') as source, open(destination_file, 'wb') as destination:
+            fcntl.ioctl(destination.fileno(), FICLONE, source.fileno())
+    except OSError:
+        try:
+            os.remove(destination_file)
+        except OSError:
+            pass
+        return False
+    shutil.copystat(source_file, destination_file)
+    return True
+
+
+def link_or_copy(source_file, destination_file):
+    """
+    Makes destination_file a hardlink of source_file, or a reflink where hardlinks are not possible, and only copies
+    the data as a last resort.
+    """
+    try:
+        os.link(source_file, destination_file)
+        return
+    except OSError:
+        pass
+    if not reflink_file(source_file, destination_file):
+        shutil.copy2(source_file, destination_file)
+
+
+ZIP_ENTRY_OVERHEAD = 128  # Approximate bytes of zip headers per entry, besides twice the name
+# Zip part sizes in the Settings window. Decimal gigabytes keep "4 GB" parts under the FAT32 file size limit.
+ZIP_PART_SIZES = {"No limit": None, "1 GB": 1000 ** 3, "2 GB": 2 * 1000 ** 3, "4 GB": 4 * 1000 ** 3}
+
+
+def archive_part_path(destination, number):
+    """
+    Returns the path of a part of a split archive, e.g. 2001-0001_05.01.2024.part01.zip.
+    """
+    return f"{os.path.splitext(destination)[0]}.part{number:02d}.zip"
+
+
+def archive_index_path(destination):
+    return f"{os.path.splitext(destination)[0]}.index.json"
+
+
+def remove_stale_parts(destination, part_count, journal):
+    """
+    Deletes the zip files an earlier run of the same package left that are not part of it anymore, so that they are
+    not handed out or uploaded with it: the parts numbered above part_count, or, if the package is no longer split
+    (part_count 0), every part and the index. A split package also removes the zip file of an unsplit run.
+
+    :return: Names of the files deleted
+    """
+    base = os.path.basename(os.path.splitext(destination)[0])
+    directory = os.path.dirname(destination) or '.'
+    part_pattern = re.compile(re.escape(base) + r'\.part(\d{2,})\.zip$')
+    stale = []
+    for name in sorted(os.listdir(directory)):
+        match = part_pattern.match(name)
+        if match and int(match.group(1)) > part_count:
+            stale.append(name)
+            # The zip file of an unsplit package is recorded as part 1, keep its entries
+            if int(match.group(1)) > max(part_count, 1):
+                journal.forget_part(int(match.group(1)))
+    if part_count:
+        stale.append(os.path.basename(destination))
+    else:
+        stale.append(os.path.basename(archive_index_path(destination)))
+
+    removed = []
+    for name in stale:
+        try:
+            os.remove(os.path.join(directory, name))
+            removed.append(name)
+        except FileNotFoundError:
+            pass
+    journal.save()
+    return removed
+
+
+def split_layout(layout, part_size):
+    """
+    Splits an archive layout into parts of at most part_size bytes (as stored), keeping the files of a structure
+    folder in the same part. Only a folder larger than a part is split between parts.
+
+    :return: List of parts, each a list of ArchiveEntry
+    """
+    folders = []
+    for entry in layout:
+        folder = os.path.dirname(entry.arc_name)
+        if folders and folders[-1][0] == folder:
+            folders[-1][1].append(entry)
+        else:
+            folders.append((folder, [entry]))
+
+    def stored_size(entry):
+        return entry.size + 2 * len(entry.arc_name) + ZIP_ENTRY_OVERHEAD
+
+    parts = [[]]
+    used = 0
+    for folder, entries in folders:
+        folder_size = sum(stored_size(entry) for entry in entries)
+        if parts[-1] and used + folder_size > part_size:
+            parts.append([])
+            used = 0
+        for entry in entries:
+            # Only reached for folders that do not fit in a part of their own
+            if parts[-1] and used + stored_size(entry) > part_size:
+                parts.append([])
+                used = 0
+            parts[-1].append(entry)
+            used += stored_size(entry)
+    return [part for part in parts if part]
+
+
+def write_archive(zf, layout, executor, window, tracker, on_written=None):
+    """
+    Writes the files of an archive layout into an open ArchiveWriter, deflating small files in the executor up to
+    window files (and DEFLATE_WINDOW_BYTES) ahead of the writer. on_written(entry, names) is called after the file of
+    each ArchiveEntry is written under all of its names.
+
+    :return: False if zipping was cancelled
+    """
+    # A file that appears in several places of the archive (EZ poles copied only in the archive) is read and
+    # compressed once, and written under each of its names
+    arc_names = {}
+    for entry in layout:
+        key = entry.source if entry.source is not None else entry.arc_name
+        if key in arc_names:
+            arc_names[key][0].append(entry.arc_name)
+        else:
+            arc_names[key] = ([entry.arc_name], entry_compression(entry.arc_name), entry.size, entry.data, entry)
+    entries = [(filepath, names, compress_type, size) for filepath, (names, compress_type, size, _, _)
+               in arc_names.items()]
+    total_files = len(entries)
+
+    # Deflatable entries are compressed by the worker pool a few files ahead of the writer
+    cancel = cancel_event()
+    deflated = {}
+    submitted = 0
+    pending_bytes = 0  # Bytes of the files submitted to the pool and not written yet, read into memory at once
+    try:
+        for zipped_files, (filepath, names, compress_type, size) in enumerate(entries, start=1):
+            # Check if the run was cancelled (when cancel button is pressed)
+            if cancel.is_set():
+                return False
+
+            # Keep the worker pool busy with the next deflatable entries, within the memory budget
+            while submitted < total_files and submitted < zipped_files + window:
+                next_path, next_names, next_type, next_size = entries[submitted]
+                if (next_type == ZIP_DEFLATED and next_size <= DEFLATE_IN_MEMORY_LIMIT and
+                        arc_names[next_path][3] is None and zf.raw_writes):
+                    if pending_bytes and pending_bytes + next_size > DEFLATE_WINDOW_BYTES:
+                        break
+                    deflated[submitted] = executor.submit(deflate_file, next_path, next_names[0])
+                    pending_bytes += next_size
+                submitted += 1
+
+            future = deflated.pop(zipped_files - 1, None)
+            if future is not None:
+                pending_bytes -= size
+            data = arc_names[filepath][3]
+            written = False  # Whether the progress was already counted while writing
+            if data is not None:
+                # Generated file that only exists in the archive
+                for name in names:
+                    zf.writestr(name, data, compress_type=compress_type)
+            elif future is not None:
+                zinfo, compressed = future.result()
+                if compressed is not None:
+                    for name in names:
+                        zf.write_deflated(zinfo, compressed, name)
+                else:
+                    zf.write_copies(filepath, names, ZIP_STORED, size, tracker.advance)
+                    written = True
+            else:
+                if compress_type == ZIP_DEFLATED and size > DEFLATE_IN_MEMORY_LIMIT and not worth_deflating(filepath):
+                    compress_type = ZIP_STORED
+                zf.write_copies(filepath, names, compress_type, size, tracker.advance)
+                written = True
+
+            if on_written:
+                on_written(arc_names[filepath][4], names)
+
+            # Update the progress queue with the bytes zipped, write_copies counts them as it writes
+            if not written:
+                tracker.advance(len(names) * size)
+    finally:
+        for future in deflated.values():
+            future.cancel()
+    return True
+
+
+class PackagingJournal:
+    """
+    Record of the entries written to a package (their part, CRC, and the size and modification time of their source
+    file), saved in the app data folder. A cancelled packaging run resumes where it stopped, and packaging the same
+    flight again only writes the files that were added or changed.
+    """
+    save_interval = 5.0  # Seconds between two saves while zipping
+
+    def __init__(self, destination):
+        key = hashlib.sha1(os.path.abspath(destination).encode('utf-8')).hexdigest()
+        journal_dir = os.path.join(get_app_data_dir(), 'journals')
+        os.makedirs(journal_dir, exist_ok=True)
+        self.path = os.path.join(journal_dir, f"{key}.json")
+        self.entries = {}  # {arc_name: {"part", "source", "size", "mtime_ns", "crc"}}
+        self.pending = None  # Records of a zip file being rewritten, kept back until it replaces the old one
+        self.saved = time.monotonic()
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                journal = json.load(f)
+            if journal.get("archive") == os.path.abspath(destination):
+                self.entries = journal["entries"]
+        except (OSError, ValueError, KeyError):
+            pass
+        self.archive = os.path.abspath(destination)
+
+    def unchanged(self, entry, part):
+        """
+        Returns True if the entry was written to the given part from the same source, unchanged since then.
+        """
+        record = self.entries.get(entry.arc_name)
+        if not record or record["part"] != part or record["size"] != entry.size or record["source"] != entry.source:
+            return False
+        if entry.data is not None:
+            return zlib.crc32(entry.data) == record["crc"]
+        if record["mtime_ns"] == entry.mtime_ns:
+            return True
+        # Small files such as a regenerated structure list are compared by content
+        if entry.size <= 1024 * 1024:
+            try:
+                with open(entry.source, 'rb') as f:
+                    return zlib.crc32(f.read()) == record["crc"]
+            except OSError:
+                return False
+        return False
+
+    def record(self, entry, name, part, crc):
+        record = {"part": part, "source": entry.source, "size": entry.size, "mtime_ns": entry.mtime_ns, "crc": crc}
+        if self.pending is not None:
+            self.pending[name] = record
+            return
+        self.entries[name] = record
+        if time.monotonic() - self.saved >= self.save_interval:
+            self.save()
+
+    def hold(self):
+        """
+        Keeps the entries recorded from now on out of the journal until release(), while they are written to a new
+        zip file that is not in place yet.
+        """
+        self.pending = {}
+
+    def release(self, replaced):
+        """
+        Adds the entries recorded since hold() if their zip file replaced the old one, otherwise drops them.
+        """
+        if replaced:
+            self.entries.update(self.pending)
+        self.pending = None
+
+    def forget(self, names):
+        for name in names:
+            self.entries.pop(name, None)
+
+    def forget_part(self, part):
+        self.forget([name for name, record in self.entries.items() if record["part"] == part])
+
+    def save(self):
+        self.saved = time.monotonic()
+        temp_path = self.path + '.tmp'
+        try:
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump({"archive": self.archive, "entries": self.entries}, f)
+            os.replace(temp_path, self.path)
+        except OSError as error:
+            print_to_widget(f"Warning: Unable to save the packaging journal ({error}). Zipping the package again "
+                            f"may write unchanged files again.", color='red')
+
+
+def write_part(path, part, number, journal, executor, window, tracker):
+    """
+    Writes one zip file of a package, keeping the entries the journal shows are already in it and unchanged. New
+    entries are appended; if entries changed or were removed, the zip file is rewritten, copying the kept entries
+    without compressing them again.
+
+    :return: Tuple of (False if zipping was cancelled, number of entries kept)
+    """
+    existing = None
+    if os.path.exists(path):
+        try:
+            existing = ZipFile(path)
+        except (BadZipFile, OSError):
+            existing = None  # Not closed properly, start over
+
+    kept = []
+    stale = set()
+    if existing:
+        names = set(existing.namelist())
+        kept = [entry.arc_name for entry in part if entry.arc_name in names and journal.unchanged(entry, number)]
+        stale = names - set(kept)
+    else:
+        journal.forget_part(number)
+    journal.forget(stale)
+    kept_names = set(kept)
+    todo = [entry for entry in part if entry.arc_name not in kept_names]
+    tracker.advance(sum(entry.size for entry in part if entry.arc_name in kept_names))
+
+    if existing and not stale:
+        existing.close()
+        if not todo:
+            return True, len(kept)
+        target, mode = path, 'a'
+    elif existing:
+        target, mode = path + '.tmp', 'w'
+    else:
+        target, mode = path, 'w'
+
+    def written(entry, names):
+        for name in names:
+            journal.record(entry, name, number, zf.getinfo(name).CRC)
+
+    # A rewritten zip file only counts once it replaces the old one. If writing it fails, the journal must keep
+    # describing the old file, which stays in place.
+    replaced = False
+    if target != path:
+        journal.hold()
+    try:
+        try:
+            with ArchiveWriter(target, mode, ZIP_DEFLATED, compresslevel=DEFLATE_LEVEL) as zf:
+                if existing and stale:
+                    for name in kept:
+                        zf.copy_from(existing, name)
+                completed = write_archive(zf, todo, executor, window, tracker, written)
+        finally:
+            if existing and stale:
+                existing.close()
+        if target != path:
+            os.replace(target, path)
+            replaced = True
+    finally:
+        if target != path:
+            journal.release(replaced)
+            if not replaced:
+                try:
+                    os.remove(target)
+                except OSError:
+                    pass
+    journal.save()
+    return completed, len(kept)
+
+
+def zip_directory(source, destination, progress_queue, manifest=None, layout=None, part_size=None,
+                  on_part_closed=None):
+    """
+    Zips the source directory as it is on disk, or the files of a layout planned by plan_archive_layout.
+
+    With a part_size, the archive is split into independently valid zip files of at most part_size bytes
+    (archive_part_path), split between structure folders where possible, and an index file lists the structure
+    folders in each part. on_part_closed(path, number) is called as soon as each part is complete. Parts left by an
+    earlier run that are not part of the package anymore are deleted once it is complete.
+
+    A PackagingJournal keeps track of the entries written, so that zipping again after a cancel or a change to the
+    flight only writes the entries that are missing or changed.
+    """
+    if layout is None:
+        base_folder_name = os.path.basename(source)
+        if manifest is None:
+            manifest = DirectoryManifest.scan(source)
+        layout = [ArchiveEntry(filepath, os.path.join(base_folder_name, os.path.relpath(path, source)), file.size,
+                               file.mtime_ns, None) for filepath, path, file in manifest.iter_entries()]
+    tracker = ProgressTracker(progress_queue, "Zipping", sum(entry.size for entry in layout))
+    parts = split_layout(layout, part_size) if part_size else [layout]
+
+    workers = os.cpu_count() or 1
+    executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='zip')
+    journal = PackagingJournal(destination)
+    index = []
+    try:
+        for number, part in enumerate(parts, start=1):
+            path = archive_part_path(destination, number) if part_size else destination
+            completed, kept = write_part(path, part, number, journal, executor, 4 * workers, tracker)
+            if kept:
+                print_to_widget(f"   {kept} files were already zipped in {os.path.basename(path)} and are unchanged.")
+            if not completed:
+                return
+            folders = dict.fromkeys(os.path.dirname(entry.arc_name) for entry in part)
+            index.append({
+                "file": os.path.basename(path),
+                "size": os.path.getsize(path),
+                # Structure folders in the part, relative to the package folder
+                "structures": [folder.split(os.sep, 1)[1] for folder in folders if os.sep in folder],
+            })
+            if on_part_closed:
+                on_part_closed(path, number)
+        tracker.finish()
+    finally:
+        executor.shutdown(wait=True)
+
+    if part_size:
+        with open(archive_index_path(destination), 'w', encoding='utf-8') as f:
+            json.dump({"archive": os.path.basename(destination), "parts": index}, f, indent=4)
+    for name in remove_stale_parts(destination, len(parts) if part_size else 0, journal):
+        print_to_widget(f"   Deleted {name}, left by an earlier run and not part of this package.")
+
+
+def clear_directory_entry():
+    dir_path.set('')
+    path_entry.delete(0, tk.END)
 
 
 def packaging_thread_function():
@@ -451,14 +2113,74 @@ def packaging_thread_function():
     if not dir_path.get() or not team_number_entry.get() or not date_entry.get_date():
         messagebox.showerror("Error", "Please input directory, flight date, and team number.")
         return
+    if zipping.is_set():
+        messagebox.showerror("Error", "Please wait for the current copy or zip to finish.")
+        return
 
-    progress_queue = queue.Queue()
+    # Packaging may reorganize the directory, so stop watching it. The folders checked so far are still reused.
+    if folder_watcher:
+        folder_watcher.stop()
 
-    # Create a separate thread for the packaging process
-    packaging_thread = threading.Thread(target=rename_and_zip_directory, args=(progress_queue,))
+    # Create a separate thread for the packaging process, the widgets are only read here in the main thread
+    packaging_thread = threading.Thread(target=run_packaging_thread, args=(
+        progress_queue, team_number_entry.get(), date_entry.get_date().strftime('%m.%d.%Y'), dir_path.get()))
     packaging_thread.start()
 
 
+def run_packaging_thread(progress_queue, team_number, date, directory_path):
+    try:
+        rename_and_zip_directory(progress_queue, team_number, date, directory_path)
+    except Exception as error:
+        print_to_widget(f"\nPackaging stopped: {type(error).__name__}: {error}", color='red')
+        in_main_loop(display_exception, error, wait=False)
+
+
+def ingest_thread_function():
+    if not dir_path.get():
+        messagebox.showerror("Error", "Please choose the flight directory to copy the SD cards into.")
+        return
+    if zipping.is_set():
+        messagebox.showerror("Error", "Please wait for the current copy or zip to finish.")
+        return
+
+    # Ask for the SD cards one by one, they are all copied at once
+    sources = []
+    while True:
+        source = filedialog.askdirectory(title="Choose an SD Card to Ingest", parent=root)
+        if not source:
+            break
+        sources.append(source)
+        if not messagebox.askyesno("Ingest SD Cards", f"{len(sources)} SD card(s) chosen.\n\nAdd another SD card?"):
+            break
+    if not sources:
+        return
+
+    ingest_thread = threading.Thread(target=ingest_sources, args=(sources, dir_path.get(), progress_queue,
+                                                                  settings["ingest_verify"] == "On"))
+    ingest_thread.start()
+
+
+def upload_package_thread_function():
+    if not settings["upload_url"]:
+        messagebox.showerror("Error", "Please enter the upload server in Settings.")
+        return
+    if zipping.is_set():
+        messagebox.showerror("Error", "Please wait for the current copy or zip to finish.")
+        return
+    file_paths = filedialog.askopenfilenames(title="Choose the Package Files to Upload", parent=root,
+                                             filetypes=[("Packages", "*.zip *.json")])
+    if not file_paths:
+        return
+
+    def upload():
+        cancel_zip.clear()
+        upload_package(PackageUploader(settings["upload_url"]), list(file_paths), progress_queue)
+
+    # Create a separate thread for the upload, it resumes any interrupted upload of the same files
+    upload_thread = threading.Thread(target=upload)
+    upload_thread.start()
+
+
 def upload_trans_data():
     webbrowser.open('https://c2groupoffice-my.sharepoint.com/:f:/r/personal/c2drone_c2groupoffice_onmicrosoft_com'
                     '/Documents/UAV%20Projects/SCE/Field%20Uploads/2025/Transmission?csf=1&web=1&e=6CyMUX')
@@ -469,18 +2191,130 @@ def upload_distro_data():
                     '/Documents/UAV%20Projects/SCE/Field%20Uploads/2025/Distribution?csf=1&web=1&e=a6eaW5')
 
 
-def find_innermost_folders(directory):
-    innermost_folders = []
-    for dirpath, dirnames, files in os.walk(directory):
-        # If 'dirnames' is empty, it means 'dirpath' is an innermost folder
-        if not dirnames and files:
-            innermost_folders.append(dirpath)
-    return innermost_folders
+class FuzzyIndex:
+    """
+    Index of the Structure IDs for finding the closest ID to a folder name, giving the same best match and score as
+    process.extractOne(folder_name, choices) (ties go to the ID listed first in the Structure ID List).
+
+    The IDs are preprocessed once and their character counts kept in a matrix. For a folder name, the characters it
+    shares with every ID give an upper bound on the WRatio score in one array operation. Only the few IDs whose bound
+    can still beat the best score found so far are scored exactly. Names scored together with score_all keep their
+    ranked candidates, so later lookups for them only walk that list.
+    """
+
+    def __init__(self, structure_ids, ranked=64):
+        self.structure_ids = list(dict.fromkeys(structure_ids))
+        self.processed = [fuzz_utils.full_process(structure_id, force_ascii=True)
+                          for structure_id in self.structure_ids]
+        self.ranked = ranked  # Candidates kept per name by score_all
+        self.ranked_candidates = {}
+
+        # Count of each character in every processed ID (IDs are mostly digits, so there are few characters)
+        self.char_counts = {}
+        for position, processed_id in enumerate(self.processed):
+            for char in processed_id:
+                if char not in self.char_counts:
+                    self.char_counts[char] = np.zeros(len(self.processed), dtype=np.int16)
+                self.char_counts[char][position] += 1
+        self.lengths = np.array([len(processed_id) for processed_id in self.processed], dtype=float)
+        self.multi_token = np.array([' ' in processed_id for processed_id in self.processed], dtype=bool)
+
+    @staticmethod
+    def _is_available(structure_id, available, exclude):
+        return (available is None or structure_id in available) and structure_id not in exclude
+
+    def _score_bounds(self, query):
+        """
+        Returns an upper bound of WRatio(query, ID) for every ID. For single words, WRatio is at most the Indel ratio
+        or 0.9 times the partial ratio, and both are limited by the number of characters the strings share.
+        """
+        shared = np.zeros(len(self.processed))
+        for char in set(query):
+            if char in self.char_counts:
+                shared += np.minimum(self.char_counts[char], query.count(char))
+        shorter = np.minimum(self.lengths, len(query))
+        longer = np.maximum(self.lengths, len(query))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            ratio_bound = 200 * shared / (self.lengths + len(query))
+            partial_bound = 0.9 * 200 * shared / (shorter + shared)
+            bounds = np.where(longer / shorter < 1.5, ratio_bound, np.maximum(ratio_bound, partial_bound))
+        bounds = np.nan_to_num(bounds, nan=0.0) + 0.5
+        # Token based scores can reach 100 between different multi-word strings, so those IDs are always scored
+        bounds[self.multi_token] = 100.5
+        return bounds
+
+    def score_all(self, folder_names):
+        """
+        Scores a batch of folder names against every Structure ID at once, on all CPU cores.
+        """
+        names = [name for name in dict.fromkeys(folder_names) if name not in self.ranked_candidates]
+        queries = [fuzz_utils.full_process(name, force_ascii=True) for name in names]
+        if not names or not self.processed:
+            return
+        scores = rapid_process.cdist(queries, self.processed, scorer=rapid_fuzz.WRatio, dtype=np.float64,
+                                     workers=-1)
+        for name, row in zip(names, scores):
+            # Stable sort so that equal scores keep the Structure ID List order
+            order = np.argsort(-row, kind='stable')[:self.ranked]
+            self.ranked_candidates[name] = [(int(position), float(row[position])) for position in order]
+
+    def top(self, folder_name, k=1, available=None, exclude=()):
+        """
+        Finds the k Structure IDs closest to folder_name, best first.
+
+        :param available: Optional set of Structure IDs to choose from
+        :param exclude: Structure IDs to skip
+        :return: List of (Structure ID, score) tuples, shorter than k if there are not enough IDs to choose from
+        """
+        ranked = self.ranked_candidates.get(folder_name)
+        if ranked:
+            found = [(self.structure_ids[position], score) for position, score in ranked
+                     if self._is_available(self.structure_ids[position], available, exclude)][:k]
+            # IDs that were not kept score at most as much as the last kept one and may come first on a tie
+            if len(ranked) == len(self.structure_ids) or (len(found) == k and found[-1][1] > ranked[-1][1]):
+                return found
+
+        query = fuzz_utils.full_process(folder_name, force_ascii=True)
+        if not query or ' ' in query:
+            # Empty and multi-word names are compared with every ID
+            bounds = np.full(len(self.processed), 100.5)
+        else:
+            bounds = self._score_bounds(query)
+
+        # Score the IDs with the highest bounds, then every other ID whose bound can still reach the k-th best score
+        scores = {}
+        count = max(32, 4 * k)
+        top = np.argpartition(-bounds, count - 1)[:count] if len(bounds) > count else range(len(bounds))
+        for candidates in (top, None):
+            if candidates is None:
+                threshold = sorted(scores.values(), reverse=True)[k - 1] - 0.01 if len(scores) >= k else -1.0
+                candidates = np.flatnonzero(bounds >= threshold)
+            for position in candidates:
+                position = int(position)
+                if position not in scores and self._is_available(self.structure_ids[position], available, exclude):
+                    scores[position] = rapid_fuzz.WRatio(query, self.processed[position])
+
+        # Equal scores keep the Structure ID List order
+        best = sorted(scores, key=lambda position: (-scores[position], position))[:k]
+        return [(self.structure_ids[position], scores[position]) for position in best]
+
+    def best(self, folder_name, available=None, exclude=()):
+        """
+        Finds the Structure ID closest to folder_name.
+
+        :param available: Optional set of Structure IDs to choose from
+        :param exclude: Structure IDs to skip
+        :return: Tuple of the Structure ID and its score, or None if there is no ID to choose from
+        """
+        found = self.top(folder_name, 1, available, exclude)
+        if not found:
+            return None
+        return found[0][0], int(round(found[0][1]))
 
 
 # Define a function to find the closest match for a folder name
-def find_closest_match(folder_name, folder_path, choices, dataframe, verbose=True, resolve=False, no_dist_issue=True):
-    global closest_distance
+def find_closest_match(folder_name, folder_path, choices, structure_index, fuzzy_index, verbose=True, resolve=False,
+                       no_dist_issue=True, exclude=()):
     # If the folder name is not a valid structure ID, proceed with the following steps
     # Find the image that ends with n.jpg
     for file in os.listdir(folder_path):
@@ -489,8 +2323,8 @@ def find_closest_match(folder_name, folder_path, choices, dataframe, verbose=Tru
             break
     else:
         if no_dist_issue:
-            # If no image found, use fuzzywuzzy to find the closest match
-            closest_match = process.extractOne(folder_name, choices)[0]
+            # If no image found, use the fuzzy index to find the closest match
+            closest_match = fuzzy_index.best(folder_name, available=choices)[0]
             choices.remove(closest_match)  # Remove the matched option
             if verbose:
                 print_to_widget(f"   - No nadir image found.")
@@ -500,31 +2334,25 @@ def find_closest_match(folder_name, folder_path, choices, dataframe, verbose=Tru
             image_path = os.path.join(folder_path, os.listdir(folder_path)[0])
 
     # Get GPS coordinates from the image
-    lat, lon = get_gps_from_image(image_path)
+    lat, lon = get_gps_from_image(image_path) or (None, None)
     if lat is None or lon is None:
         if no_dist_issue:
-            closest_match = process.extractOne(folder_name, choices)[0]
+            closest_match = fuzzy_index.best(folder_name, available=choices)[0]
             choices.remove(closest_match)  # Remove the matched option
             if verbose:
                 print_to_widget(f"   - Nadir image does not have gps data.")
                 print_to_widget(f"   - Closest ID match: {closest_match}")
             return folder_name, closest_match, choices
         else:
-            pass
+            return None
 
-    # Calculate the distance between the image's coordinates and each structure coordinate in the date_taken_df
-    distances = []
-    for dataframe_index, dataframe_row in dataframe.iterrows():
-        if pd.isna(dataframe_row['Latitude']) or pd.isna(dataframe_row['Longitude']):
-            continue
-        mapped_lat, mapped_lon = dataframe_row["Latitude"], dataframe_row["Longitude"]
-        distance = distance_calculator((lat, lon), (mapped_lat, mapped_lon))
-        distances.append((dataframe_row["Structure ID"], distance))
+    # Find the closest structure using the spatial index, only among the available choices when resolving duplicates
+    nearest = structure_index.nearest(lat, lon, available=choices if resolve else None, exclude=exclude)
 
     # Find the closest distance and the associated structure ID
-    if distances:
-        closest_match = min(distances, key=lambda x: x[1])[0]
-        closest_distance = min(distances, key=lambda x: x[1])[1]
+    if nearest:
+        closest_match, closest_distance = nearest[0]
+        match_state.closest_distance = closest_distance
         if resolve:
             choices.remove(closest_match)  # Remove the matched option
         if verbose:
@@ -543,87 +2371,205 @@ def find_closest_match(folder_name, folder_path, choices, dataframe, verbose=Tru
         return folder_name, closest_match, choices
 
 
-def resolve_duplicates(matches, available_choices, structure_dict, dataframe, no_dist_issue=True, verbose=True):
-    resolved_duplicates = {}
-    while any(isinstance(value, list) for value in matches.values()):
-        duplicates = {key: value for key, value in matches.items() if isinstance(value, list)}
-        new_matches = {key: value for key, value in matches.items() if not isinstance(value, list)}
+# Costs for matching folders to structures, in feet from the nadir. The name only breaks near ties: each fuzz.ratio
+# point a folder name is off from a structure ID adds MATCH_NAME_COST feet, so one wrong character in a 7-character ID
+# (about 14 points) weighs as much as 14 feet, within the GPS error of a nadir image. Folders without GPS have no
+# distance and are matched by name alone, at NO_GPS_NAME_COST feet per WRatio point, so that a name 10 points off costs
+# 100 feet and neither kind of folder takes every contested structure from the other.
+MATCH_NAME_COST = 1.0
+NO_GPS_NAME_COST = 10.0
+MATCH_CANDIDATES = 8  # Nearest structures considered per folder, raised to the number of folders being matched
+UNMATCHED_COST = 1e7  # Cost of leaving a folder without a match
+NO_EDGE_COST = 1e9  # Cost of a folder/structure pair that is not in the candidate graph
 
-        for match, folders in duplicates.items():
-            # Compute scores for all folders against the match
-            scores = {folder: fuzz.ratio(folder, match) for folder in folders}
 
-            # Identify the most accurate folder (highest score)
-            most_accurate_folder = max(scores, key=scores.get)
-            new_matches[match] = most_accurate_folder
-            resolved_duplicates[match] = most_accurate_folder
-            try:
-                available_choices.remove(match)
-            except (ValueError, KeyError):
-                pass
-
-            # All other folders will use find_closest_match
-            other_folders = [folder for folder in folders if folder != most_accurate_folder]
-            for folder in other_folders:
-                # Get the folder path from the dictionary
-                folder_path = structure_dict[folder]
-
-                # Filter the dataframe based on the available options in 'FLOC'
-                filtered_dataframe = dataframe[(dataframe['Structure ID'].isin(available_choices))]
-                filtered_dataframe = filtered_dataframe[filtered_dataframe['Structure ID'] != most_accurate_folder]
-                if no_dist_issue:
-                    _, closest_match, available_options = find_closest_match(folder, folder_path, available_choices,
-                                                                             filtered_dataframe, verbose=False,
-                                                                             resolve=True)
-                else:
-                    _, closest_match, available_options = find_closest_match(folder, folder_path, available_choices,
-                                                                             filtered_dataframe, verbose=False,
-                                                                             resolve=True, no_dist_issue=False)
-                if closest_match in new_matches and closest_match != match:
-                    if isinstance(new_matches[closest_match], list):
-                        new_matches[closest_match].append(folder)
-                    else:
-                        new_matches[closest_match] = [new_matches[closest_match], folder]
-                else:
-                    new_matches[closest_match] = folder
-                    resolved_duplicates[closest_match] = folder
+def min_cost_assignment(costs):
+    """
+    Solves the assignment problem for a cost matrix with at least as many columns as rows, using the Hungarian
+    algorithm with potentials.
 
-        matches = new_matches  # Update matches for the next iteration
+    :param costs: Matrix of rows (folders) by columns (structures)
+    :return: Array with the column assigned to each row
+    """
+    costs = np.asarray(costs, dtype=float)
+    rows, columns = costs.shape
+    row_potential = np.zeros(rows + 1)
+    column_potential = np.zeros(columns + 1)
+    owner = np.zeros(columns + 1, dtype=int)  # 1-based row assigned to each column, column 0 holds the new row
+    way = np.zeros(columns + 1, dtype=int)
+    for row in range(1, rows + 1):
+        owner[0] = row
+        column = 0
+        min_slack = np.full(columns, np.inf)
+        used = np.zeros(columns + 1, dtype=bool)
+        while owner[column]:
+            used[column] = True
+            current_row = owner[column]
+            free = ~used[1:]
+            slack = costs[current_row - 1] - row_potential[current_row] - column_potential[1:]
+            improved = free & (slack < min_slack)
+            min_slack[improved] = slack[improved]
+            way[1:][improved] = column
+            masked_slack = np.where(free, min_slack, np.inf)
+            next_column = int(np.argmin(masked_slack))
+            delta = masked_slack[next_column]
+            row_potential[owner[used]] += delta
+            column_potential[used] -= delta
+            min_slack[free] -= delta
+            column = next_column + 1
+        # Flip the augmenting path
+        while column:
+            previous = way[column]
+            owner[column] = owner[previous]
+            column = previous
+
+    assignment = np.full(rows, -1)
+    for column in range(1, columns + 1):
+        if owner[column]:
+            assignment[owner[column] - 1] = column - 1
+    return assignment
+
+
+def match_candidates(folder_name, folder_path, available, structure_index, fuzzy_index, count, no_dist_issue=True):
+    """
+    Finds the candidate structures for a folder, the same way find_closest_match picks its match, with their costs.
+
+    :return: List of (Structure ID, cost) tuples
+    """
+    for file in os.listdir(folder_path):
+        if file.lower().endswith("n.jpg"):
+            image_path = os.path.join(folder_path, file)
+            break
+    else:
+        image_path = None if no_dist_issue else os.path.join(folder_path, os.listdir(folder_path)[0])
+
+    lat, lon = (get_gps_from_image(image_path) if image_path else None) or (None, None)
+    if lat is None or lon is None:
+        if not no_dist_issue:
+            return []
+        return [(structure_id, NO_GPS_NAME_COST * (100 - score))
+                for structure_id, score in fuzzy_index.top(folder_name, count, available=available)]
+
+    return [(structure_id, distance + MATCH_NAME_COST * (100 - fuzz.ratio(folder_name, structure_id)))
+            for structure_id, distance in structure_index.nearest(lat, lon, k=count, available=available)]
+
+
+def resolve_duplicates(matches, available_choices, structure_dict, structure_index, fuzzy_index, no_dist_issue=True,
+                       verbose=True):
+    """
+    Reassigns every matched folder to a structure at once, so that no two folders share a structure and the total
+    distance and name mismatch is the lowest. The folders and the structures they hold are matched together with the
+    available choices, over a graph of each folder's nearest candidates.
+    """
+    previous = {}
+    collided = set()
+    for match, folders in matches.items():
+        for folder in (folders if isinstance(folders, list) else [folders]):
+            previous.setdefault(folder, match)
+            if isinstance(folders, list):
+                collided.add(folder)
+    folders = list(previous)
+    pool = available_choices.copy()
+    pool.update(matches)
+
+    # Build the sparse candidate graph. With as many candidates as folders, every folder that has candidates can be
+    # matched without sharing a structure.
+    count = max(MATCH_CANDIDATES, len(folders))
+    candidates = [match_candidates(folder, structure_dict[folder], pool, structure_index, fuzzy_index, count,
+                                   no_dist_issue) for folder in folders]
+    structures = list(dict.fromkeys(structure_id for edges in candidates for structure_id, _ in edges))
+    column = {structure_id: position for position, structure_id in enumerate(structures)}
+
+    # One extra column per folder for leaving it unmatched
+    costs = np.full((len(folders), len(structures) + len(folders)), NO_EDGE_COST)
+    for row, edges in enumerate(candidates):
+        for structure_id, cost in edges:
+            costs[row, column[structure_id]] = cost
+        costs[row, len(structures) + row] = UNMATCHED_COST
+    assignment = min_cost_assignment(costs) if folders else []
+
+    resolved = {}
+    for folder, position in zip(folders, assignment):
+        if position < len(structures):
+            resolved[structures[position]] = folder
+    for match in matches:
+        if match not in resolved:
+            available_choices.add(match)
+    available_choices.difference_update(resolved)
 
     if verbose:
         print_to_widget("          New closest nadir matches found:")
-        for match, folder in resolved_duplicates.items():
-            print_to_widget(f"              - {folder} --> {match}")
+        for match, folder in resolved.items():
+            if folder in collided or previous[folder] != match:
+                print_to_widget(f"              - {folder} --> {match}")
         print_to_widget("          Make sure that these are correct before proceeding to your next step.")
-    return matches, available_choices
+    return resolved, available_choices
 
 
-def rename_and_zip_directory(progress_queue):
-    team_number = team_number_entry.get()
-    date = date_entry.get_date().strftime('%m.%d.%Y')
-    directory_path = dir_path.get()
+def update_matched_structures(issues_dict, matches, structure_dict, scans, registry):
+    """
+    Replaces the structures matched to the folders listed in the issues with their final matches, since
+    resolve_duplicates can move a folder that was already listed when a later folder collides with it. The distance
+    from the nadir is measured again for a moved match.
+    """
+    final = {}
+    for match, folders in matches.items():
+        for folder in (folders if isinstance(folders, list) else [folders]):
+            final.setdefault(folder, match)
+
+    mismatches = issues_dict["FOLDER NAME AND GIS STRUCTURE ID MISMATCH"]
+    mismatches[:] = [(folder_name, final.get(folder_name)) for folder_name, _ in mismatches]
+
+    far = issues_dict["STRUCTURE EXCEEDS 500 FEET FROM GIS COORDINATES"]
+    for position, (folder_name, distance, match, closest_distance, nadir_count) in enumerate(far):
+        if match is None or final.get(folder_name) == match:
+            continue
+        match = final.get(folder_name)
+        location = registry.location(match) if match else None
+        nadir_coords = scans[structure_dict[folder_name]].result().nadir_coords[nadir_count - 1]
+        closest_distance = distance_calculator(nadir_coords, location) if location is not None else None
+        far[position] = (folder_name, distance, match, closest_distance, nadir_count)
+
+
+def rename_and_zip_directory(progress_queue, team_number=None, date=None, directory_path=None):
+    """
+    Checks, renames and zips a flight. A packaging job gives its own team number, flight date (MM.DD.YYYY) and
+    directory; the GUI reads them from the widgets in the main thread and passes them.
+    """
+    job = current_job()
+    if job is not None:
+        team_number, date, directory_path = job.team_number, job.flight_date, job.directory
 
     # Validate the team number format (XXXX-YYYY using a simple regex)
     pattern = r'^\d{4}-\d{4}$'
     if not re.match(pattern, team_number):
-        messagebox.showerror("Error", "Team Number must be in the format 'XXXX-YYYY'\n(e.g., '0012-0081').")
+        show_error("Error", "Team Number must be in the format 'XXXX-YYYY'\n(e.g., '0012-0081').")
         return
 
     # Parse the first 4 integers from team number to get the pilot ID
     pilot_id = team_number[:4]
 
-    # Delete hidden Mac files
-    print_to_widget(f"\nDeleting hidden Mac files...")
+    # Read the directory once, every step below uses and updates this manifest instead of walking it again
+    manifest = DirectoryManifest.scan(directory_path)
+
+    # With the virtual layout the flight directory is left as it is, and the archive is written in its final layout
+    virtual_layout = settings["archive_layout"] == "Virtual"
+
+    # Delete hidden Mac files (or leave them out of the archive)
+    print_to_widget(f"\nDeleting hidden Mac files..." if not virtual_layout else f"\nSkipping hidden Mac files...")
     found_mac_files = False
-    for dirpath, dirnames, filenames in os.walk(directory_path):
-        for filename in filenames:
-            if filename.startswith("._"):
-                filepath = os.path.join(dirpath, filename)
-                os.remove(filepath)
-                print_to_widget(f"{filename} deleted")
+    for folder in manifest.iter_folders():
+        for file in list(folder.files):
+            if file.name.startswith("._"):
+                if not virtual_layout:
+                    os.remove(os.path.join(folder.path, file.name))
+                folder.remove_file(file.name)
+                print_to_widget(f"{file.name} {'skipped' if virtual_layout else 'deleted'}")
                 found_mac_files = True
     if not found_mac_files:
         print_to_widget("No hidden Mac files found in the folder.")
+    elif virtual_layout:
+        print_to_widget(f"All hidden Mac files will be left out of the archive.")
     else:
         print_to_widget(f"All hidden Mac files have been deleted.")
 
@@ -632,7 +2578,9 @@ def rename_and_zip_directory(progress_queue):
     new_directory_path = os.path.join(os.path.dirname(directory_path), new_name)
 
     # Check folder names for accuracy and images for Ns
-    issues_dict, ezlist = check_issues(directory_path)
+    issues_dict, ezlist = check_issues(directory_path, progress_queue, manifest, date, team_number)
+    if job is not None:
+        job.issues, job.ez_poles = issues_dict, ezlist
     issues_ignored = False
     if any(issues_dict.values()):
         print_to_widget("\n\nWARNING! POTENTIAL ISSUES FOUND!", color='red')
@@ -663,7 +2611,7 @@ def rename_and_zip_directory(progress_queue):
                 elif "FLIGHT DATE MISMATCH" in issue_type:
                     # Detail is a datetime object, format it as a date string
                     print_to_widget(f"(Possible causes: Incorrect \"Flight Date\" input above -- ", newline=False)
-                    print_to_widget(f"{date_entry.get()}", color='#FFA500', newline=False)
+                    print_to_widget(f"{date}", color='#FFA500', newline=False)
                     print_to_widget(f", incorrect drone or handheld camera dates, etc.)\n")
                     for issue in issues:
                         folder_name, detail1 = issue
@@ -697,10 +2645,11 @@ def rename_and_zip_directory(progress_queue):
         print_to_widget("\n\nPLEASE ADDRESS ALL POTENTIAL ISSUES ABOVE AND RERUN THE SCRIPT.", color='#FFA500')
         print_to_widget("(If any exceptions apply or you have ANY questions, please contact QA for support.)")
         # Show a dialog asking the user whether to continue or not
-        response = messagebox.askyesno(
+        response = ask_yes_no(
             "Potential Issues Found",
             f"Please address all potential issues and then rerun the script."
-            f"\n\nDo you want to continue zipping anyway?"
+            f"\n\nDo you want to continue zipping anyway?",
+            job_answer=job is not None and job.ignore_issues
         )
         if not response:  # If the user chooses 'No'
             print_to_widget("\nZipping process terminated.", color='red')
@@ -710,8 +2659,26 @@ def rename_and_zip_directory(progress_queue):
     else:
         print_to_widget("\nNo Issues Found!", color='green')
 
+    if virtual_layout:
+        # Plan the final layout of the archive and zip the original files into it
+        layout = plan_archive_layout(manifest, new_name, pilot_id, ezlist)
+        print_to_widget(f"\n{pilot_id}_structure_list.txt will be generated in the archive")
+        print_to_widget("\nChecking for EZ Poles...")
+        if ezlist:
+            print_to_widget(f"\nEZ poles found...")
+            print_to_widget("\nCopying EZ poles into 'EZPolesForTrans' folder (in the archive)...")
+            for ez_name in ezlist:
+                print_to_widget(f"  - Copying {ez_name}")
+            print_to_widget("\nMoving all poles into 'Distribution' folder (in the archive)...")
+        else:
+            print_to_widget(f"\nNo EZ poles found.")
+
+        zip_package(directory_path, new_directory_path + '.zip', sum(entry.size for entry in layout), issues_ignored,
+                    progress_queue, manifest, layout)
+        return
+
     # Generate the structure_list.txt inside the newly renamed directory
-    generate_txt_file(directory_path, pilot_id)
+    generate_txt_file(directory_path, pilot_id, manifest)
 
     print_to_widget("\nChecking for EZ Poles...")
 
@@ -729,16 +2696,27 @@ def rename_and_zip_directory(progress_queue):
         ez_poles_dir = os.path.join(source_directory, "EZPolesForTrans")
         all_poles_dir = os.path.join(source_directory, "Distribution")
 
-        # Make sure subfolders exist
-        if not os.path.exists(ez_poles_dir):
+        # Make sure subfolders exist. EZ poles copied in the archive only need EZPolesForTrans in the manifest.
+        in_archive = settings["ez_pole_copies"] == "In archive"
+        if not in_archive and not os.path.exists(ez_poles_dir):
             os.makedirs(ez_poles_dir)
         if not os.path.exists(all_poles_dir):
             os.makedirs(all_poles_dir)
+        ez_poles_node = manifest.subfolder("EZPolesForTrans", virtual=not os.path.exists(ez_poles_dir))
+        all_poles_node = manifest.subfolder("Distribution")
 
-        innermost_folders = find_innermost_folders(directory_path)
+        innermost_nodes = {folder.path: folder for folder in manifest.innermost_folders()}
+        innermost_folders = list(innermost_nodes)
 
         # Copy only EZ Poles into EZPolesForTrans
         print_to_widget("\nCopying EZ poles into 'EZPolesForTrans' folder...")
+        tracker = ProgressTracker(progress_queue, "Copying", 0 if in_archive else sum(
+            folder.size() for folder in innermost_nodes.values() if folder.name in ez_list))
+
+        def copy_with_progress(source_file, destination_file):
+            link_or_copy(source_file, destination_file)
+            tracker.advance(os.path.getsize(destination_file))
+
         for ez_name in ez_list:
             print(ez_name)
             # Find the corresponding folder path in innermost_folders
@@ -746,37 +2724,46 @@ def rename_and_zip_directory(progress_queue):
             if source_folder:
                 destination_folder = os.path.join(ez_poles_dir, ez_name)
                 if source_folder != destination_folder:
-                    if os.path.exists(source_folder):
+                    if os.path.exists(source_folder) and in_archive:
+                        print_to_widget(f"  - Copying {ez_name} (in the archive)")
+                        innermost_nodes[source_folder].copy_to(ez_poles_node, virtual=True)
+                    elif os.path.exists(source_folder):
                         print_to_widget(f"  - Copying {ez_name}")
                         try:
-                            shutil.copytree(source_folder, destination_folder)
+                            shutil.copytree(source_folder, destination_folder, copy_function=copy_with_progress)
+                            innermost_nodes[source_folder].copy_to(ez_poles_node)
                         except Exception as error:
                             print_to_widget(f"\nError: {error}\n\n"
-                                            f"Please close any open files in the directory and try again.", color='red')
-                            messagebox.showerror("Error", f"{error}\n\n"
-                                                          f"Please close any open files in the directory and try again.")
+                                            f"Please close any open files in the directory and try again.",
+                                            color='red')
+                            show_error("Error", f"{error}\n\n"
+                                                f"Please close any open files in the directory and try again.")
                     else:
                         print_to_widget(f"Source folder does not exist: {source_folder}")
                 else:
                     print_to_widget(f"  - {ez_name} is already in the folder.")
 
+        tracker.finish()
+
         # Copy *all* poles into Distribution folder
         print_to_widget("\nMoving all poles into 'Distribution' folder...")
-        for folder_name in os.listdir(source_directory):
-            source_folder = os.path.join(source_directory, folder_name)
+        pole_nodes = [folder for folder in manifest.folders if folder.name not in ("EZPolesForTrans", "Distribution")]
+        tracker = ProgressTracker(progress_queue, "Moving", sum(folder.size() for folder in pole_nodes))
+        for folder in pole_nodes:
+            folder_name = folder.name
+            source_folder = folder.path
             destination_folder = os.path.join(all_poles_dir, folder_name)
 
-            if os.path.isdir(source_folder):
-                if folder_name == "EZPolesForTrans" or folder_name == "Distribution":
-                    continue
-
-                try:
-                    print_to_widget(f"  - Moving {folder_name}")
-                    shutil.move(source_folder, destination_folder)
-                except Exception as error:
-                    print_to_widget(f"\nError moving {folder_name}: {error}\n"
-                          f"Please close any open files in the directory and try again.")
-                    messagebox.showerror("Error", f"Error moving {folder_name}: {error}")
+            try:
+                print_to_widget(f"  - Moving {folder_name}")
+                shutil.move(source_folder, destination_folder)
+                folder.move_to(all_poles_node)
+                tracker.advance(folder.size())
+            except Exception as error:
+                print_to_widget(f"\nError moving {folder_name}: {error}\n"
+                                f"Please close any open files in the directory and try again.")
+                show_error("Error", f"Error moving {folder_name}: {error}")
+        tracker.finish()
 
     if ezlist:
         print_to_widget(f"\nEZ poles found...")
@@ -787,122 +2774,593 @@ def rename_and_zip_directory(progress_queue):
 
     print_to_widget("\nChecking and deleting empty folders...")
     empty_folders_found = False  # Flag to track if any empty folder is found
-    for root_dir, dirs, files in os.walk(directory_path, topdown=False):
-        for name in dirs:
-            folder_path = os.path.join(root_dir, name)
+    for parent in manifest.iter_folders(topdown=False):
+        for folder in list(parent.folders):
+            folder_path = folder.path
             try:
-                if not os.listdir(folder_path):  # Check if the folder is empty
-                    os.rmdir(folder_path)
+                if not folder.files and not folder.folders:  # Check if the folder is empty
+                    if not folder.virtual:
+                        os.rmdir(folder_path)
+                    folder.detach()
                     print_to_widget(f"Deleted empty folder: {folder_path}")
                     empty_folders_found = True  # Set the flag to True as an empty folder is found
             except Exception as e:
                 print_to_widget(f"\nError: {e}\n\n"
                                 f"Please close any open files in the directory and try again.", color='red')
-                messagebox.showerror("Error", f"{e}\n\nPlease close any open files in the directory and try again.")
+                show_error("Error", f"{e}\n\nPlease close any open files in the directory and try again.")
                 return
     if not empty_folders_found:
         print_to_widget("No empty folders found.")
 
     try:
         shutil.move(directory_path, new_directory_path)
+        manifest.rebase(new_directory_path)
     except Exception as e:
         print_to_widget(f"\nError: {e}\n\nPlease close any open files in the directory and try again.", color='red')
-        messagebox.showerror("Error", f"{e}\n\nPlease close any open files in the directory and try again.")
+        show_error("Error", f"{e}\n\nPlease close any open files in the directory and try again.")
         return
 
     # Calculate the size of the directory
-    dir_size = get_directory_size(new_directory_path)
+    dir_size = manifest.size()
+
+    # Name of the ZIP file to create
+    zip_name = new_directory_path + '.zip'
+    zip_package(new_directory_path, zip_name, dir_size, issues_ignored, progress_queue, manifest)
+
+
+# Uploads to the field upload server, which takes a file in fixed-size chunks:
+#   POST /uploads {"name", "size", "chunk_size"} starts an upload session and returns {"id"}
+#   GET /uploads/<id> returns the session with the numbers of the chunks "received" so far, and whether it is "complete"
+#   PUT /uploads/<id>/chunks/<number> stores one chunk, checked against its X-Chunk-SHA1 header
+#   POST /uploads/<id>/complete joins the chunks once they have all been received
+# upload_server.py is a stand-in for the server to test against.
+UPLOAD_CHUNK_SIZE = 8 * 1024 * 1024  # Bytes sent in one request
+UPLOAD_PARALLEL = 4  # Chunks in flight at the same time
+UPLOAD_RETRIES = 5  # Attempts at sending a chunk before the upload stops, waiting longer after each one
+UPLOAD_TIMEOUT = 60  # Seconds to wait for the server to answer a request
+
+
+class UploadSessions:
+    """
+    Upload sessions of the package files, and the chunks the server has acknowledged, saved in the app data folder.
+    An interrupted upload resumes from the acknowledged chunks, and a file that was already uploaded unchanged (e.g. a
+    part kept when packaging again) is not sent again.
+    """
+    save_interval = 5.0  # Seconds between two saves while uploading
+
+    def __init__(self):
+        self.path = os.path.join(get_app_data_dir(), 'uploads.json')
+        self.sessions = {}  # {file path: {"url", "id", "size", "mtime_ns", "chunk_size", "acknowledged", "complete"}}
+        self.lock = threading.Lock()
+        self.saved = time.monotonic()
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.sessions = {path: session for path, session in json.load(f).items() if os.path.exists(path)}
+        except (OSError, ValueError, AttributeError):
+            pass
+
+    def get(self, file_path, url, stat):
+        """
+        Returns the session of the file on the server at url, or None if there is none or the file has changed since.
+        """
+        session = self.sessions.get(file_path)
+        if (not session or session["url"] != url or session["size"] != stat.st_size or
+                session["mtime_ns"] != stat.st_mtime_ns or session["chunk_size"] != UPLOAD_CHUNK_SIZE):
+            return None
+        return session
+
+    def start(self, file_path, url, stat, upload_id):
+        with self.lock:
+            self.sessions[file_path] = {"url": url, "id": upload_id, "size": stat.st_size,
+                                        "mtime_ns": stat.st_mtime_ns, "chunk_size": UPLOAD_CHUNK_SIZE,
+                                        "acknowledged": [], "complete": False}
+        self.save()
+
+    def acknowledge(self, file_path, number):
+        with self.lock:
+            self.sessions[file_path]["acknowledged"].append(number)
+        if time.monotonic() - self.saved >= self.save_interval:
+            self.save()
+
+    def complete(self, file_path):
+        with self.lock:
+            self.sessions[file_path]["complete"] = True
+            self.sessions[file_path]["acknowledged"] = []
+        self.save()
+
+    def save(self):
+        with self.lock:
+            self.saved = time.monotonic()
+            temp_path = self.path + '.tmp'
+            try:
+                with open(temp_path, 'w', encoding='utf-8') as f:
+                    json.dump(self.sessions, f)
+                os.replace(temp_path, self.path)
+            except OSError as error:
+                print_to_widget(f"Warning: Unable to save the upload sessions ({error}). An interrupted upload "
+                                f"will start over.", color='red')
+
+
+class PackageUploader:
+    """
+    Uploads the files of a package in a background thread, in the order they are added, so that the parts of a split
+    package are uploaded while the next ones are being zipped. Each file is sent in UPLOAD_CHUNK_SIZE chunks with
+    UPLOAD_PARALLEL chunks in flight, and failed chunks are retried. Progress goes to a queue of its own until wait()
+    hands it to the progress bar. Every uploader must be finished with wait() or stop(), which end its thread.
+
+    :param url: Address of the upload server
+    """
+
+    def __init__(self, url):
+        self.url = url.rstrip('/')
+        self.sessions = UploadSessions()
+        self.files = queue.Queue()
+        self.uploaded = []
+        self.failed = []
+        self.cancel = cancel_event()
+        self.stopped = threading.Event()  # Set by stop(), e.g. when zipping the rest of the package failed
+        self.finished = False
+        self.tracker = ProgressTracker(ProgressQueue(), "Uploading", 0)
+        self.http = threading.local()
+        self.executor = ThreadPoolExecutor(max_workers=UPLOAD_PARALLEL, thread_name_prefix='upload')
+        self.thread = job_thread(self._run)
+        self.thread.start()
+
+    def add(self, file_path):
+        self.tracker.add_total(os.path.getsize(file_path))
+        self.files.put(file_path)
+
+    def wait(self, progress_queue):
+        """
+        Shows the progress of the upload on the progress queue and waits until every file added has been uploaded,
+        or the upload has stopped.
+
+        :return: True if every file was uploaded
+        """
+        self.tracker.progress_queue = progress_queue
+        self.tracker.finish()
+        self._finish()
+        return not self.failed and not self._stopping()
+
+    def stop(self):
+        """
+        Stops uploading without waiting for the files added, which resume from their saved session next time. Does
+        nothing once the uploader has finished.
+        """
+        self.stopped.set()
+        self._finish()
+
+    def _finish(self):
+        if self.finished:
+            return
+        self.finished = True
+        self.files.put(None)
+        self.thread.join()
+        self.executor.shutdown(wait=True)
+        self.sessions.save()
+
+    def _stopping(self):
+        return self.cancel.is_set() or self.stopped.is_set()
+
+    def _run(self):
+        while True:
+            file_path = self.files.get()
+            if file_path is None:
+                return
+            if self.failed or self._stopping():
+                # Leave the files after a failed one for the next attempt, they resume from their saved session
+                self.failed.append(file_path)
+                continue
+            try:
+                if self._upload(file_path):
+                    self.uploaded.append(file_path)
+                else:
+                    self.failed.append(file_path)
+            except Exception as error:
+                self.failed.append(file_path)
+                print_to_widget(f"   Upload of {os.path.basename(file_path)} stopped: {error}", color='red')
+
+    def _request(self, method, path, **kwargs):
+        if not hasattr(self.http, 'session'):
+            self.http.session = requests.Session()
+        response = self.http.session.request(method, self.url + path, timeout=UPLOAD_TIMEOUT, **kwargs)
+        response.raise_for_status()
+        return response
+
+    def _upload(self, file_path):
+        """
+        Uploads one file, resuming its saved session. Returns False if the upload was cancelled.
+        """
+        name = os.path.basename(file_path)
+        stat = os.stat(file_path)
+        chunk_count = max(1, math.ceil(stat.st_size / UPLOAD_CHUNK_SIZE))
+        acknowledged = set()
+
+        # Resume the session of an earlier attempt, if the server still has it
+        session = self.sessions.get(file_path, self.url, stat)
+        if session is not None:
+            if session["complete"]:
+                self.tracker.advance(stat.st_size)
+                print_to_widget(f"   {name} was already uploaded and is unchanged.")
+                return True
+            try:
+                status = self._request('GET', f"/uploads/{session['id']}").json()
+                acknowledged = set(status["received"])
+                session["acknowledged"] = sorted(acknowledged)
+            except requests.exceptions.HTTPError as error:
+                if error.response is None or error.response.status_code != 404:
+                    raise
+                session = None
+        if session is None:
+            upload_id = self._request('POST', "/uploads", json={"name": name, "size": stat.st_size,
+                                                                "chunk_size": UPLOAD_CHUNK_SIZE}).json()["id"]
+            self.sessions.start(file_path, self.url, stat, upload_id)
+            session = self.sessions.sessions[file_path]
+        elif acknowledged:
+            print_to_widget(f"   Resuming the upload of {name} from chunk {len(acknowledged) + 1} of {chunk_count}.")
+        self.tracker.advance(sum(min(UPLOAD_CHUNK_SIZE, stat.st_size - number * UPLOAD_CHUNK_SIZE)
+                                 for number in acknowledged))
+
+        futures = [self.executor.submit(self._send_chunk, file_path, session["id"], number)
+                   for number in range(chunk_count) if number not in acknowledged]
+        try:
+            for future in as_completed(futures):
+                future.result()
+        finally:
+            for future in futures:
+                future.cancel()
+        if self._stopping():
+            return False
+        self._request('POST', f"/uploads/{session['id']}/complete")
+        self.sessions.complete(file_path)
+        print_to_widget(f"   {name} uploaded.")
+        return True
+
+    def _send_chunk(self, file_path, upload_id, number):
+        if self._stopping():
+            return
+        with open(file_path, 'rb') as f:
+            f.seek(number * UPLOAD_CHUNK_SIZE)
+            data = f.read(UPLOAD_CHUNK_SIZE)
+        headers = {"X-Chunk-SHA1": hashlib.sha1(data).hexdigest(), "Content-Type": "application/octet-stream"}
+        for attempt in range(UPLOAD_RETRIES):
+            try:
+                self._request('PUT', f"/uploads/{upload_id}/chunks/{number}", data=data, headers=headers)
+                break
+            except requests.exceptions.RequestException as error:
+                # A rejected chunk (other than the server being busy) will not be accepted by trying again
+                status_code = getattr(error.response, 'status_code', None)
+                if attempt == UPLOAD_RETRIES - 1 or (status_code is not None and status_code < 500 and
+                                                     status_code not in (408, 429)):
+                    raise
+                time.sleep(min(2 ** attempt, 30))
+                if self._stopping():
+                    return
+        self.sessions.acknowledge(file_path, number)
+        self.tracker.advance(len(data))
+
+
+def upload_package(uploader, file_paths, progress_queue):
+    """
+    Adds the last files of a package to its uploader and waits until the whole package is uploaded.
+
+    :return: Paths of the files uploaded
+    """
+    for file_path in file_paths:
+        uploader.add(file_path)
+    print_to_widget("\nUploading the package, please wait...")
+    job = current_job()
+    if job is None:
+        zipping.set()
+    try:
+        uploaded = uploader.wait(progress_queue)
+    finally:
+        if job is None:
+            zipping.clear()
+
+    if cancel_event().is_set():
+        print_to_widget("\nUpload cancelled. Upload the package again to resume it.", color='red')
+        progress_queue.put(None)
+    elif not uploaded:
+        show_error("Upload Failed", f"{len(uploader.failed)} file(s) were not uploaded. Upload the package again "
+                                    f"to resume from the last chunk the server received.")
+    else:
+        print_to_widget(f"Uploaded {len(uploader.uploaded)} file(s) in {format_eta(uploader.tracker.elapsed)}.",
+                        color='green')
+    return uploader.uploaded
+
+
+def zip_package(source, zip_name, dir_size, issues_ignored, progress_queue, manifest, layout=None):
+    """
+    Confirms with the user and zips the package, showing the progress until the zip file is complete.
+
+    :param source: Directory to zip, its files are read from the manifest
+    :param layout: Optional archive layout from plan_archive_layout, used instead of the source directory layout
+    """
     print_to_widget(f"\nDirectory size: {round(dir_size / 1024 / 1024, 2)} MB.")
 
     if not issues_ignored:
         print_to_widget("\nData is clean and ready to be zipped. Do you want to proceed?")
-        response = messagebox.askyesno("Ready to Zip",
-                                       "Data is clean and ready to be zipped.\n\nDo you want to proceed?")
+        response = ask_yes_no("Ready to Zip",
+                              "Data is clean and ready to be zipped.\n\nDo you want to proceed?")
         if not response:
             print_to_widget("Zipping process terminated.", color='red')
             return
 
     print_to_widget("\nZipping files, please wait...")
+    cancel_event().clear()
+
+    # Large packages are split into parts, each ready as soon as it is closed
+    part_size = ZIP_PART_SIZES.get(settings["zip_part_size"])
+    zip_files = []
+
+    # With an upload server, each part is uploaded as soon as it is closed, while the next parts are being zipped. The
+    # uploader is started by the first part.
+    upload_url = settings["upload_url"]
+    uploader = None
+
+    def part_closed(path, number):
+        nonlocal uploader
+        zip_files.append(path)
+        print_to_widget(f"   Part {number} is ready: {os.path.basename(path)}")
+        if upload_url:
+            if uploader is None:
+                uploader = PackageUploader(upload_url)
+            uploader.add(path)
 
-    # Name of the ZIP file to create
-    zip_name = new_directory_path + '.zip'
+    try:
+        # Zip in this (packaging) thread, the GUI shows its progress from the progress queue until it has finished. An
+        # error while zipping propagates to the caller instead of leaving an incomplete zip file looking packaged.
+        start_time = time.time()
+        job = current_job()
+        if job is None:
+            zipping.set()
+        try:
+            zip_directory(source, zip_name, progress_queue, manifest, layout, part_size,
+                          part_closed if part_size else None)
+        finally:
+            if job is None:
+                zipping.clear()
+
+        if cancel_event().is_set():
+            print_to_widget("\nZipping process cancelled.", color='red')
+            show_info("Info", "Zipping process cancelled.")
+
+            # Reset the progress bar to 0%
+            progress_queue.put(None)
+            # The files zipped so far are kept, packaging again resumes from there
+            print_to_widget("The files zipped so far are kept. Package the data again to resume zipping.")
+            return
+
+        # Stop measuring the time taken to zip the directory
+        end_time = time.time()
+        total_time = end_time - start_time
+
+        # Get the size of the zipped file in MB
+        zip_size = sum(os.path.getsize(path) for path in (zip_files if part_size else [zip_name])) / 1024 / 1024
+
+        # Calculate the speed of the zipping process in MB/s
+        zip_speed = dir_size / total_time / 1024 / 1024
+
+        # Print the total time taken to zip the directory in minutes and seconds
+        print_to_widget(f"\nZipping complete!")
+        print_to_widget(f"Zipped file size: {round(zip_size, 2)} MB")
+        if part_size:
+            index_name = os.path.basename(archive_index_path(zip_name))
+            print_to_widget(f"Split into {len(zip_files)} parts, listed in {index_name}")
+        print_to_widget(f"Total time taken: {round(time.time() - start_time, 2)} seconds")
+        print_to_widget(f"Zipping speed: {round(zip_speed, 2)} MB/s")
+
+        uploaded = []
+        if upload_url:
+            if uploader is None:
+                uploader = PackageUploader(upload_url)
+            uploaded = upload_package(uploader, [archive_index_path(zip_name)] if part_size else [zip_name],
+                                      progress_queue)
+
+        # Show a message box to inform the user that the data has been packaged successfully
+        print_to_widget("\nData has been packaged successfully!", color='green')
+        show_info("Success", "Data has been packaged successfully.")
+
+        if job is not None:
+            job.zip_files = zip_files if part_size else [zip_name]
+            job.uploaded = uploaded
+            return
+
+        # Clear the directory entry widget
+        in_main_loop(clear_directory_entry, wait=False)
+    finally:
+        # Does nothing once the package is uploaded. If zipping failed or was cancelled, nothing more is uploaded and
+        # the parts not uploaded yet are left for the next attempt.
+        if uploader:
+            uploader.stop()
+
+
+class PackagingJob:
+    """
+    A flight to check and package without the GUI, e.g. from the command line. The job stands in for the widgets and
+    dialogs: its messages are collected in a log, questions are answered from its options and the outcome is
+    reported by result().
+
+    :param directory: Flight directory
+    :param team_number: Team number in the format XXXX-YYYY
+    :param flight_date: Flight date as MM.DD.YYYY
+    :param ignore_issues: Zip the package even if potential issues are found
+    """
 
-    # Start the zipping process in a separate thread
+    def __init__(self, directory, team_number, flight_date, ignore_issues=False):
+        self.directory = os.path.abspath(directory)
+        self.team_number = team_number
+        self.flight_date = flight_date
+        self.ignore_issues = ignore_issues
+        self.lines = []
+        self.errors = []
+        self.issues = None
+        self.ez_poles = []
+        self.zip_files = []
+        self.uploaded = []
+        self.seconds = None
+        self.failed = False  # Set if packaging stopped on an unexpected error
+        # Each job has its own cancel event and metadata cache, so jobs run in parallel do not affect each other
+        self.cancelled = threading.Event()
+        self.image_metadata_cache = {}
+        self._line = ''
+
+    def log(self, text, newline=True):
+        self._line += str(text)
+        if newline:
+            self.lines.extend(self._line.split('\n'))
+            self._line = ''
+
+    @property
+    def status(self):
+        if self.failed:
+            return 'failed'
+        if self.zip_files:
+            return 'packaged'
+        if self.errors:
+            return 'error'
+        if self.issues is not None and any(self.issues.values()) and not self.ignore_issues:
+            return 'issues'
+        return 'stopped'
+
+    def result(self):
+        issues = {issue_type: [list(issue) if isinstance(issue, tuple) else issue for issue in found]
+                  for issue_type, found in (self.issues or {}).items() if found}
+        return {
+            'directory': self.directory,
+            'team_number': self.team_number,
+            'flight_date': self.flight_date,
+            'status': self.status,
+            'issues': issues,
+            'ez_poles': list(self.ez_poles),
+            'zip_files': self.zip_files,
+            'uploaded': self.uploaded,
+            'errors': self.errors,
+            'seconds': self.seconds,
+            'log': self.lines + ([self._line] if self._line else []),
+        }
+
+
+def run_packaging_job(job):
+    """
+    Checks and packages the flight of a PackagingJob in the calling thread and returns the job's result.
+    """
+    job_context.job = job
     start_time = time.time()
-    zip_thread = threading.Thread(target=zip_directory, args=(new_directory_path, zip_name, progress_queue))
-    zip_thread.start()
-    cancel_button.configure(state="normal")
+    try:
+        rename_and_zip_directory(ProgressQueue())
+    except Exception as e:
+        job.failed = True
+        job.errors.append(f"{type(e).__name__}: {e}")
+        job.log(traceback.format_exc())
+    finally:
+        job.seconds = round(time.time() - start_time, 2)
+        job_context.job = None
+    return job.result()
 
-    # Continuously update the progress bar until the zipping thread has finished
-    while True:
-        try:
-            progress = progress_queue.get_nowait()
-            new_width = (progress / 100) * 448  # Calculate the new width based on the progress percentage
-            progress_bar_canvas.coords(progress_bar_rect, 0, 0, new_width, 20)  # Update the width of the progress bar
-            progress_bar_canvas.itemconfig(progress_bar_percentage,
-                                           text=f"{int(progress)}%")  # Update the percentage print_text
-            root.update_idletasks()
-        except queue.Empty:
-            pass
 
-        if not zip_thread.is_alive() and progress_queue.empty():
-            break
+def run_jobs(jobs, max_parallel=2, on_result=None):
+    """
+    Runs packaging jobs, at most max_parallel at a time, and returns their results in the order of the jobs.
 
-        time.sleep(0.1)
+    :param on_result: Optional function called with each result as soon as its job is done
+    """
+    results = [None] * len(jobs)
+    with ThreadPoolExecutor(max_workers=max(1, max_parallel)) as executor:
+        futures = {executor.submit(run_packaging_job, job): i for i, job in enumerate(jobs)}
+        for future in as_completed(futures):
+            results[futures[future]] = future.result()
+            if on_result:
+                on_result(results[futures[future]])
+    return results
 
-    if cancel_zip:
-        print_to_widget("\nZipping process cancelled.", color='red')
-        messagebox.showinfo("Info", "Zipping process cancelled.")
 
-        # Reset the progress bar to 0%
-        progress_bar_canvas.coords(progress_bar_rect, 0, 0, 0, 20)
-        progress_bar_canvas.itemconfig(progress_bar_percentage, text="0%")
-        time.sleep(2)
-        cancel_button.configure(state="disabled")
-        os.remove(zip_name)
-        return
+def parse_flight_date(text):
+    """
+    Returns the flight date as MM.DD.YYYY from MM.DD.YYYY, YYYY-MM-DD or YYYYMMDD.
+    """
+    for date_format in ('%m.%d.%Y', '%Y-%m-%d', '%Y%m%d'):
+        try:
+            return datetime.strptime(text, date_format).strftime('%m.%d.%Y')
+        except ValueError:
+            continue
+    raise ValueError(f"Invalid flight date '{text}', use MM.DD.YYYY, YYYY-MM-DD or YYYYMMDD")
 
-    # Make sure to process the final progress value (100%)
-    try:
-        progress = progress_queue.get_nowait()
-        progress_bar_canvas.coords(progress_bar_rect, 0, 0, progress * 4.48, 20)
-        progress_bar_canvas.itemconfig(progress_bar_percentage, text=f"{int(progress)}%")
-        root.update_idletasks()
-    except queue.Empty:
-        pass
 
-    # Wait for the zipping thread to finish
-    zip_thread.join()
+def read_jobs_file(path):
+    """
+    Reads (directory, team number, flight date) jobs from a JSON list of objects or a CSV file, both with the keys
+    directory, team_number and flight_date.
+    """
+    with open(path, newline='') as f:
+        if path.lower().endswith('.json'):
+            rows = json.load(f)
+        else:
+            rows = list(csv.DictReader(f))
+    return [(row['directory'], row['team_number'], row['flight_date']) for row in rows]
+
 
-    # Stop measuring the time taken to zip the directory
-    end_time = time.time()
-    total_time = end_time - start_time
+def run_command_line(argv):
+    """
+    Packages flights given on the command line without opening the GUI. The results are written to the --output
+    file, which is required because the app is built without a console. Each result is also printed as a line of JSON
+    when its job is done, for runs from a terminal. Returns the exit code: 0 if every flight was packaged, 1 otherwise.
+    """
+    parser = argparse.ArgumentParser(prog=exe_name, description="Check and package flights without the GUI.")
+    parser.add_argument('--job', nargs=3, action='append', default=[], metavar=('DIRECTORY', 'TEAM', 'DATE'),
+                        help="Flight to package (repeat for more flights)")
+    parser.add_argument('--jobs-file', help="JSON or CSV file with directory, team_number and flight_date")
+    parser.add_argument('--parallel', type=int, default=2, help="Flights packaged at the same time (default 2)")
+    parser.add_argument('--ignore-issues', action='store_true', help="Zip flights even if issues are found")
+    parser.add_argument('--upload-url', help="Upload the packages to this field upload server")
+    parser.add_argument('--output', required=True, help="JSON file the results of all flights are written to")
+    args = parser.parse_args(argv)
+    if args.upload_url is not None:
+        settings["upload_url"] = args.upload_url
+
+    specs = list(args.job) + (read_jobs_file(args.jobs_file) if args.jobs_file else [])
+    if not specs:
+        parser.error("no jobs given, use --job or --jobs-file")
+    try:
+        jobs = [PackagingJob(directory, team_number, parse_flight_date(flight_date), args.ignore_issues)
+                for directory, team_number, flight_date in specs]
+    except ValueError as e:
+        parser.error(str(e))
 
-    # Get the size of the zipped file in MB
-    zip_size = os.path.getsize(zip_name) / 1024 / 1024
+    print_lock = threading.Lock()
 
-    # Calculate the speed of the zipping process in MB/s
-    zip_speed = dir_size / total_time / 1024 / 1024
+    def print_result(result):
+        with print_lock:
+            print(json.dumps(result), flush=True)
 
-    # Print the total time taken to zip the directory in minutes and seconds
-    print_to_widget(f"\nZipping complete!")
-    print_to_widget(f"Zipped file size: {round(zip_size, 2)} MB")
-    print_to_widget(f"Total time taken: {round(time.time() - start_time, 2)} seconds")
-    print_to_widget(f"Zipping speed: {round(zip_speed, 2)} MB/s")
+    results = run_jobs(jobs, args.parallel, print_result)
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+    return 0 if all(result['status'] == 'packaged' for result in results) else 1
 
-    # Show a message box to inform the user that the data has been packaged successfully
-    print_to_widget("\nData has been packaged successfully!", color='green')
-    messagebox.showinfo("Success", "Data has been packaged successfully.")
 
-    # Clear the directory entry widget
-    dir_path.set('')
-    path_entry.delete(0, tk.END)
+def rebuild_metadata_index():
+    response = messagebox.askyesno("Rebuild Index", "Clear the image metadata index?\n\n"
+                                                    "All images will be read again on the next check.")
+    if not response:
+        return
+    index = get_metadata_index()
+    if index:
+        index.clear()
+        print_to_widget("\nImage metadata index cleared. It will be rebuilt on the next check.")
 
 
 def choose_directory():
+    global folder_watcher
     chosen_directory = filedialog.askdirectory(title="Choose Folder to Package", parent=root)
     dir_path.set(chosen_directory)
 
+    # Stop watching the previously chosen directory
+    if folder_watcher:
+        folder_watcher.stop()
+        folder_watcher = None
+
     if chosen_directory:
         # List and print folder names in the chosen directory
         print_to_widget("List of Structure IDs in the directory:")
@@ -915,49 +3373,598 @@ def choose_directory():
                 print_to_widget(folder_name)
 
         # Reset the progress bar to 0%
-        progress_bar_canvas.coords(progress_bar_rect, 0, 0, 0, 20)
-        progress_bar_canvas.itemconfig(progress_bar_percentage, text="0%")
-
-
-closest_distance = None  # Initialize the closest distance variable
+        reset_progress_bar()
 
+        if settings["watch_mode"] == "On":
+            folder_watcher = FolderWatcher(chosen_directory)
+            folder_watcher.start()
+            print_to_widget("\nWatching the directory, structure folders are checked as they finish copying.")
 
-def check_issues(directory):
-    print_to_widget("\nChecking for potential issues (missing nadir N, incorrect folder names, "
-                    "image dates, image coordinates, etc)...")
-    # Retrieve the flight date entered
-    flight_date = date_entry.get()
 
+def find_structure_list_file():
     if getattr(sys, 'frozen', False) and hasattr(sys, '_MEIPASS'):
         # Running in a PyInstaller Bundle
         base_path = sys._MEIPASS
     else:
         base_path = os.path.dirname(__file__)
 
-    excel_file_path = os.path.join(base_path, 'Structure ID List.xlsx')
+    for excel_file_path in (os.path.join(base_path, 'Structure ID List.xlsx'), r"F:\2024\Structure ID List.xlsx"):
+        if os.path.isfile(excel_file_path):
+            return excel_file_path
+    return None
+
+
+def hash_file(file_path):
+    sha1 = hashlib.sha1()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            sha1.update(chunk)
+    return sha1.hexdigest()
+
+
+# Held while the compiled Structure ID List is read, rebuilt or saved
+structure_list_lock = threading.Lock()
+
+
+def load_structure_list():
+    """
+    Loads the Structure ID List with "OH-" removed from the Structure IDs.
+
+    Parsing the Excel file is slow, so the normalized list is compiled into a pickle in the app data directory, with
+    only the columns the checks use. The pickle is reused as long as the source file has the same size and
+    modification time, or failing that the same SHA-1 hash (the PyInstaller bundle extracts a fresh copy on every
+    launch).
+
+    :return: DataFrame of the Structure ID List, or None if the file was not found
+    """
+    excel_file_path = find_structure_list_file()
+    if excel_file_path is None:
+        print_to_widget(f"Error: Structure ID List file not found.", color='red')
+        return None
+
+    # The watch mode thread and a check can load the list at the same time, only one of them rebuilds and saves it
+    with structure_list_lock:
+        stat = os.stat(excel_file_path)
+        cache_path = os.path.join(get_app_data_dir(), 'structure_list_cache.pkl')
+        cache = None
+        try:
+            with open(cache_path, 'rb') as f:
+                cache = pickle.load(f)
+        except Exception:
+            pass
+
+        if cache and cache['size'] == stat.st_size and cache['mtime_ns'] == stat.st_mtime_ns:
+            return cache['data']
+
+        file_hash = hash_file(excel_file_path)
+        if not cache or cache['sha1'] != file_hash:
+            df = pd.read_excel(excel_file_path)
 
-    # Load the Excel file
+            # Remove "OH-" from the beginning of "Structure ID" values
+            df['Structure ID'] = df['Structure ID'].astype(str).str.replace('OH-', '', regex=False)
+
+            # Keep only the columns used by the checks, in compact types
+            needed_columns = {df.columns[0], 'Structure ID', 'Structure Type', 'Latitude', 'Longitude'}
+            df = df[[column for column in df.columns if column in needed_columns]]
+            if 'Structure Type' in df.columns:
+                df = df.astype({'Structure Type': 'category'})
+
+            cache = {'sha1': file_hash, 'built': datetime.now(), 'data': df}
+            print_to_widget(f"Compiled Structure ID List rebuilt with {len(df)} structures "
+                            f"({cache['built'].strftime('%m.%d.%Y %H:%M')}).")
+
+        # Save the compiled list, recording the current size and modification time of the source file
+        cache.update(size=stat.st_size, mtime_ns=stat.st_mtime_ns)
+        try:
+            with open(cache_path + '.tmp', 'wb') as f:
+                pickle.dump(cache, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(cache_path + '.tmp', cache_path)
+        except OSError as error:
+            print_to_widget(f"Warning: Unable to save the compiled Structure ID List ({error}).", color='#FFA500')
+        return cache['data']
+
+
+# List of image extensions to check
+image_extensions = ['.jpg', '.jpeg', '.png', '.bmp', '.tif', '.tiff']
+
+# Results of scanning one structure folder in the check worker pool
+FolderScan = namedtuple('FolderScan', ['image_paths', 'dates', 'nadir_coords', 'farthest_distance', 'farthest_image',
+                                       'images_without_gps', 'metadata', 'parsed'])
+
+
+def scan_structure_folder(subdir, files, indexed, stats=None):
+    """
+    Reads the metadata of every image in a structure folder and measures the distance of each image from the nadir.
+    This runs in the check worker pool (possibly in another process), so it must not touch the GUI or the metadata
+    index; check_issues reports the results and saves the newly parsed metadata.
+
+    :param subdir: Path of the structure folder
+    :param files: Names of the files in the folder
+    :param indexed: {path: (size, mtime_ns, ImageMetadata)} entries of the metadata index for the folder's files
+    :param stats: Optional {name: (size, mtime_ns)} of the files, read when the directory was scanned
+    """
+    image_paths = []
+    dates = []
+    nadir_coords = []
+    metadata = {}
+    parsed = {}  # {path: (size, mtime_ns)} of the images that were parsed instead of taken from the index
+    for file in files:
+        # Check if the file is an image
+        if not any(file.lower().endswith(ext) for ext in image_extensions):
+            continue
+        file_path = os.path.join(subdir, file)
+        image_paths.append(file_path)
+
+        stat = stats.get(file) if stats else None
+        if stat is None:
+            try:
+                stat = os.stat(file_path)
+                stat = (stat.st_size, stat.st_mtime_ns)
+            except OSError:
+                stat = None
+        entry = indexed.get(file_path)
+        if stat and entry and (entry[0], entry[1]) == stat:
+            image_metadata = entry[2]
+        else:
+            image_metadata = extract_image_metadata(file_path)
+            if stat:
+                parsed[file_path] = stat
+        metadata[file_path] = image_metadata
+        dates.append(image_metadata.date_taken)
+
+        # Check if the image has an 'N' then keep the GPS coordinates of that image
+        base_name, extension = os.path.splitext(file)
+        if base_name.endswith('N'):
+            nadir_coords.append(image_metadata.gps)
+
+    # Measure every image's distance from the last nadir to detect multiple structures in the folder
+    farthest_distance = 0
+    farthest_image = None
+    images_without_gps = []
+    if nadir_coords and nadir_coords[-1]:
+        for img_path in image_paths:
+            coord = metadata[img_path].gps
+            img_name = os.path.basename(img_path)
+            if coord:
+                dist_feet = geodesic_distance_feet(nadir_coords[-1], coord)
+                if dist_feet is not None and dist_feet > farthest_distance:
+                    farthest_distance = dist_feet
+                    farthest_image = img_name
+            else:
+                images_without_gps.append(img_name)
+
+    return FolderScan(image_paths, dates, nadir_coords, farthest_distance, farthest_image, images_without_gps,
+                      metadata, parsed)
+
+
+def merge_folder_scan(scan):
+    """
+    Adds the metadata read by the worker pool to the run cache and saves the newly parsed metadata to the index.
+    """
+    run_metadata_cache().update(scan.metadata)
+    index = get_metadata_index()
+    if index:
+        for file_path, (size, mtime_ns) in scan.parsed.items():
+            index.store(file_path, size, mtime_ns, scan.metadata[file_path])
+
+
+def create_check_executor():
+    max_workers = None if settings["check_workers"] == "Auto" else int(settings["check_workers"])
+    if settings["check_executor"] == "Processes":
+        return ProcessPoolExecutor(max_workers=max_workers)
+    return ThreadPoolExecutor(max_workers=max_workers)
+
+
+INGEST_BUFFER = 8 * 1024 * 1024  # Bytes read from a source card at a time, large reads keep the card streaming
+INGEST_MTIME_TOLERANCE = 2 * 10 ** 9  # Nanoseconds of modification time lost by FAT32 cards, which round to 2 s
+
+# A file to copy from a source card: its path, its path in the flight directory, and its size and modification time
+IngestFile = namedtuple('IngestFile', ['source', 'destination', 'size', 'mtime_ns'])
+
+
+def plan_ingest(sources, destination, summary):
+    """
+    Lists the files to copy from the source directories into the flight directory, grouped by the device holding
+    them. Hidden Mac files are left on the cards, and files copied by an earlier ingest are skipped.
+
+    :param summary: Summary of the ingest, where the skipped files and conflicts are counted
+    :return: {device: [IngestFile]}
+    """
+    devices = {}
+    claimed = {}  # {destination path: source path} of the files planned so far
+    for source in sources:
+        device = os.stat(source).st_dev
+        for dirpath, dirnames, files in os.walk(source):
+            relative_dir = os.path.relpath(dirpath, source)
+            destination_dir = destination if relative_dir == '.' else os.path.join(destination, relative_dir)
+            for file in files:
+                if file.startswith("._"):
+                    summary['mac_files'] += 1
+                    continue
+                source_file = os.path.join(dirpath, file)
+                destination_file = os.path.join(destination_dir, file)
+                stat = os.stat(source_file)
+                if destination_file in claimed:
+                    summary['conflicts'].append((source_file, claimed[destination_file]))
+                    continue
+                claimed[destination_file] = source_file
+                try:
+                    existing = os.stat(destination_file)
+                except OSError:
+                    existing = None
+                if existing is not None:
+                    if (existing.st_size == stat.st_size and
+                            abs(existing.st_mtime_ns - stat.st_mtime_ns) < INGEST_MTIME_TOLERANCE):
+                        summary['already_copied'] += 1
+                    else:
+                        summary['conflicts'].append((source_file, destination_file))
+                    continue
+                devices.setdefault(device, []).append(
+                    IngestFile(source_file, destination_file, stat.st_size, stat.st_mtime_ns))
+    return devices
+
+
+def ingest_file(item, buffer, tracker, verify=False):
+    """
+    Copies one file in large sequential reads. The EXIF header of an image is parsed from the first chunk, and the
+    data is hashed as it streams past when the copy is verified, so the source is only read once.
+
+    :param buffer: Reusable bytearray of INGEST_BUFFER bytes
+    :return: (ImageMetadata of an image or None, True if the copy matches the source or was not verified), or None if
+             the ingest was cancelled
+    """
+    cancel = cancel_event()
+    is_image = os.path.splitext(item.source)[1].lower() in image_extensions
+    sha1 = hashlib.sha1() if verify else None
+    header = b''
+    view = memoryview(buffer)
+    os.makedirs(os.path.dirname(item.destination), exist_ok=True)
     try:
-        df = pd.read_excel(excel_file_path)
-    except FileNotFoundError:
+        with open(item.source, 'rb', buffering=0) as source, open(item.destination, 'wb') as destination:
+            while True:
+                if cancel.is_set():
+                    break
+                nbytes = source.readinto(buffer)
+                if not nbytes:
+                    break
+                chunk = view[:nbytes]
+                if is_image and len(header) < EXIF_HEADER_BYTES:
+                    header += bytes(chunk[:EXIF_HEADER_BYTES - len(header)])
+                if sha1 is not None:
+                    sha1.update(chunk)
+                destination.write(chunk)
+                tracker.advance(nbytes)
+        if cancel.is_set():
+            os.remove(item.destination)
+            return None
+        shutil.copystat(item.source, item.destination)
+    except BaseException:
         try:
-            excel_file_path_local = r"F:\2024\Structure ID List.xlsx"
-            df = pd.read_excel(excel_file_path_local)
-        except FileNotFoundError:
-            print_to_widget(f"Error: Structure ID List file not found.", color='red')
-            return
+            os.remove(item.destination)
+        except OSError:
+            pass
+        raise
+
+    metadata = None
+    if is_image:
+        try:
+            with open(item.destination, 'rb') as f:
+                metadata = parse_image_metadata(parse_image_header(header, f))
+        except EXIF_READ_ERRORS:
+            metadata = ImageMetadata(None, None, None, None)
+    verified = sha1 is None or hash_file(item.destination) == sha1.hexdigest()
+    if not verified:
+        # Remove the bad copy, otherwise the next ingest would skip it as already copied
+        os.remove(item.destination)
+    return metadata, verified
+
+
+def ingest_sources(sources, destination, progress_queue, verify=False):
+    """
+    Copies the SD cards (or any source directories) into the flight directory, keeping their folder structure. Each
+    device is read by its own thread, so several cards copy at once without two readers competing for one card. The
+    metadata of the images is saved to the metadata index as they are copied, so the check does not read them again.
+
+    :param verify: Compare the SHA-1 of every source file with its copy
+    :return: Summary of the ingest
+    """
+    summary = {'files': 0, 'bytes': 0, 'mac_files': 0, 'already_copied': 0, 'conflicts': [], 'failed': [],
+               'verify_failures': [], 'seconds': 0.0, 'cancelled': False}
+    for source in sources:
+        paths = [os.path.abspath(source), os.path.abspath(destination)]
+        if os.path.commonpath(paths) in paths:
+            show_error("Error", f"{source} and the flight directory {destination} are inside each other.")
+            return summary
+
+    print_to_widget(f"\nListing the files of {len(sources)} source folder(s)...")
+    devices = plan_ingest(sources, destination, summary)
+    files = [item for items in devices.values() for item in items]
+    total_bytes = sum(item.size for item in files)
+    print_to_widget(f"Copying {len(files)} files ({format_bytes(total_bytes)}) from {len(devices)} device(s)"
+                    f"{' and verifying them' if verify else ''}...")
+
+    cancel = cancel_event()
+    cancel.clear()
+    index = get_metadata_index()
+    tracker = ProgressTracker(progress_queue, "Ingesting", total_bytes)
+    lock = threading.Lock()
+
+    def copy_device(items):
+        buffer = bytearray(INGEST_BUFFER)
+        for item in items:
+            if cancel.is_set():
+                return
+            try:
+                copied = ingest_file(item, buffer, tracker, verify)
+            except OSError as error:
+                with lock:
+                    summary['failed'].append((item.source, str(error)))
+                continue
+            if copied is None:
+                return
+            metadata, verified = copied
+            if metadata is not None and verified and index:
+                stat = os.stat(item.destination)
+                index.store(item.destination, stat.st_size, stat.st_mtime_ns, metadata)
+            with lock:
+                if not verified:
+                    summary['verify_failures'].append(item.source)
+                    continue
+                summary['files'] += 1
+                summary['bytes'] += item.size
+
+    job = current_job()
+    threads = [job_thread(copy_device, (items,)) for items in devices.values()]
+    if job is None:
+        zipping.set()
+    try:
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        if job is None:
+            zipping.clear()
+    tracker.finish()
+    if index:
+        index.flush()
+    summary['seconds'] = tracker.elapsed
+    summary['cancelled'] = cancel.is_set()
+
+    print_to_widget(f"Copied {summary['files']} files ({format_bytes(summary['bytes'])}) in "
+                    f"{format_eta(summary['seconds'])}.")
+    if summary['already_copied']:
+        print_to_widget(f"{summary['already_copied']} files were already copied and were skipped.")
+    if summary['mac_files']:
+        print_to_widget(f"{summary['mac_files']} hidden Mac files were left on the cards.")
+    for source_file, other in summary['conflicts']:
+        print_to_widget(f"Not copied: {source_file} conflicts with {other}", color='#FFA500')
+    for source_file, error in summary['failed']:
+        print_to_widget(f"Failed to copy {source_file}: {error}", color='red')
+    for source_file in summary['verify_failures']:
+        print_to_widget(f"Checksum mismatch: {source_file} was not copied correctly. Ingest it again.", color='red')
+    if summary['cancelled']:
+        print_to_widget("\nIngest cancelled. Ingest again to copy the remaining files.", color='red')
+        progress_queue.put(None)
+    elif summary['failed'] or summary['verify_failures']:
+        show_error("Error", "Some files were not copied correctly. See the log for details.")
+    else:
+        print_to_widget("\nSD cards copied successfully!", color='green')
+    return summary
+
+
+WATCH_INTERVAL = 2.0  # Seconds between two scans of the watched directory
+WATCH_SETTLE = 5.0  # Seconds a structure folder must stay unchanged before it is checked
+
+
+def folder_signature(files, stats):
+    """
+    Returns the names, sizes and modification times of a folder's files, in order, to tell whether it has changed.
+    """
+    return tuple((name,) + tuple(stats[name]) for name in files)
+
+
+class FolderWatcher:
+    """
+    Watches a flight directory while crews copy data into it, and scans each structure folder in the background once
+    its files have stopped changing for WATCH_SETTLE seconds. The results are reported in the log, and check_issues
+    reuses the scan of every folder that has not changed since.
+
+    :param directory: Flight directory to watch
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.stop_event = threading.Event()
+        self.lock = threading.Lock()
+        self.scans = {}  # {folder path: (signature, FolderScan)}
+        self.pending = {}  # {folder path: (signature, time it was last seen changing)}
+        self.listings = {}  # {directory path: (modification time, subfolder paths, file names, file stats)}
+        self.registry = None
+        self.thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+
+    def cached_scan(self, subdir, files, stats):
+        """
+        Returns the scan of the folder if it was scanned in watch mode and has not changed since, otherwise None.
+        """
+        with self.lock:
+            cached = self.scans.get(subdir)
+        if cached is not None and cached[0] == folder_signature(files, stats):
+            return cached[1]
+        return None
+
+    def _run(self):
+        last_error = None
+        while not self.stop_event.wait(WATCH_INTERVAL):
+            try:
+                self._scan_changes()
+                last_error = None
+            except Exception as error:
+                # Keep watching, a folder that failed is tried again on the next pass. Log each error once.
+                message = f"{type(error).__name__}: {error}"
+                if message != last_error:
+                    print_to_widget(f"Watch mode error: {message}. The folders are checked again when packaging.",
+                                    color='#FFA500')
+                    last_error = message
+
+    def _list_directory(self, path):
+        """
+        Returns the subfolder paths and the file names and stats of a directory, in scandir order.
+        """
+        folders, files, stats = [], [], {}
+        with os.scandir(path) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    folders.append(entry.path)
+                elif entry.is_file():
+                    stat = entry.stat()
+                    files.append(entry.name)
+                    stats[entry.name] = (stat.st_size, stat.st_mtime_ns)
+        return folders, files, stats
+
+    def _scan_changes(self):
+        """
+        One pass over the watched directory. Only the directories whose modification time changed since the last pass
+        are listed again, files being added, removed or renamed change it. A folder that is still settling is listed
+        on every pass, as files being copied into it grow without changing the modification time of the folder.
+        """
+        now = time.monotonic()
+        present = set()
+        changed = []
+        stack = [self.directory]
+        while stack:
+            path = stack.pop()
+            try:
+                mtime = os.stat(path).st_mtime_ns
+            except OSError:
+                continue  # Moved or deleted since its parent was listed
+            present.add(path)
+            listing = self.listings.get(path)
+            if listing is None or listing[0] != mtime or path in self.pending:
+                try:
+                    listing = (mtime,) + self._list_directory(path)
+                except OSError:
+                    continue
+                self.listings[path] = listing
+                changed.append(path)
+            stack.extend(reversed(listing[1]))
+
+        for path in changed:
+            if self.stop_event.is_set():
+                return
+            _, folders, files, stats = self.listings[path]
+            if path == self.directory or folders or not files:
+                continue
+            signature = folder_signature(files, stats)
+            with self.lock:
+                cached = self.scans.get(path)
+            if cached is not None and cached[0] == signature:
+                self.pending.pop(path, None)
+                continue
+
+            # Wait for the folder to settle, files still being copied change its signature
+            pending = self.pending.get(path)
+            if pending is None or pending[0] != signature:
+                self.pending[path] = (signature, now)
+                continue
+            if now - pending[1] < WATCH_SETTLE:
+                continue
+
+            index = get_metadata_index()
+            indexed = index.lookup_many(os.path.join(path, name) for name in files) if index else {}
+            scan = scan_structure_folder(path, files, indexed, stats)
+            with self.lock:
+                self.scans[path] = (signature, scan)
+            del self.pending[path]
+            self._report(os.path.basename(path), scan)
+
+        # Forget the folders that were moved or deleted
+        for path in set(self.listings) - present:
+            del self.listings[path]
+        with self.lock:
+            for path in set(self.scans) - present:
+                del self.scans[path]
+        for path in set(self.pending) - present:
+            del self.pending[path]
+
+    def _report(self, folder_name, scan):
+        if self.registry is None:
+            df = load_structure_list()
+            self.registry = StructureRegistry(df) if df is not None else False
+
+        print_to_widget(f"   - Checked {folder_name} ({len(scan.image_paths)} images): ", newline=False)
+        nadir_count = len(scan.nadir_coords)
+        print_to_widget(f"{nadir_count} nadir" + ("s" if nadir_count != 1 else ""), newline=False,
+                        color='white' if nadir_count == 1 else 'red')
+        dates = sorted(set(date for date in scan.dates if date))
+        if dates:
+            print_to_widget(f", taken {', '.join(dates)}", newline=False)
+        if None in scan.dates:
+            print_to_widget(f", some images without a date", newline=False, color='#FFA500')
+        location = self.registry.location(folder_name) if self.registry else None
+        if location is None:
+            print_to_widget(f", not in GIS", newline=False, color='red')
+        elif scan.nadir_coords and scan.nadir_coords[-1]:
+            distance = distance_calculator(scan.nadir_coords[-1], location)
+            if distance is not None:
+                print_to_widget(f", {distance} feet from GIS", newline=False,
+                                color='white' if distance < 150 else ('#FFA500' if distance < 500 else 'red'))
+        if scan.farthest_image:
+            print_to_widget(f", farthest image {scan.farthest_distance} feet from nadir", newline=False)
+        print_to_widget(".")
+
+
+# Watcher of the chosen directory when watch mode is on
+folder_watcher = None
+
+
+def done_future(result):
+    future = Future()
+    future.set_result(result)
+    return future
+
+
+# Distance of the last closest match, kept per thread so that packaging jobs running in parallel don't mix them up
+match_state = threading.local()
+match_state.closest_distance = None
+
+
+def check_issues(directory, progress_queue=None, manifest=None, flight_date=None, team_number=None):
+    """
+    Checks the structure folders of a flight. A packaging job gives its own flight date (MM.DD.YYYY) and team number,
+    the GUI passes the ones entered.
+    """
+    print_to_widget("\nChecking for potential issues (missing nadir N, incorrect folder names, "
+                    "image dates, image coordinates, etc)...")
+    job = current_job()
+    if job is not None:
+        flight_date, team_number = job.flight_date, job.team_number
 
-    # Remove "OH-" from the beginning of "Structure ID" values
-    df['Structure ID'] = df['Structure ID'].astype(str).str.replace('OH-', '', regex=False)
+    # Images may have changed since the last run, so start with a fresh metadata cache
+    run_metadata_cache().clear()
+
+    # Load the Structure ID List
+    df = load_structure_list()
+    if df is None:
+        return
 
-    # Create a set of valid subfolders
-    valid_subfolder_set = set(df.iloc[:, 0].dropna())
+    # Index the Structure IDs, their GIS coordinates and the EZ Pole structures that are in both scopes
+    registry = StructureRegistry(df)
+    # Structures not matched to a folder yet, claiming a structure excludes it from the later matches only
+    available = registry.available()
 
-    # Create a set of EZ Pole structures that are in both scopes
-    ez_structures = set(df[df['Structure Type'] == 'EZ_POLE'].iloc[:, 0].dropna())
+    # Build the spatial index used to find the structures closest to a nadir
+    structure_index = StructureIndex(df['Structure ID'], pd.to_numeric(df['Latitude'], errors='coerce'),
+                                     pd.to_numeric(df['Longitude'], errors='coerce'))
 
-    # List of image extensions to check
-    image_extensions = ['.jpg', '.jpeg', '.png', '.bmp', '.tif', '.tiff']
+    # Build the index used to find the Structure IDs closest to a folder name
+    fuzzy_index = FuzzyIndex(df.iloc[:, 0].dropna())
 
     # Initialize a dictionary to store issues
     issues_dict = {
@@ -976,22 +3983,60 @@ def check_issues(directory):
         return issues_dict, ez_list
 
     matches = {}  # Create a dictionary to store the matches
+    missing_dates = []  # Images without date taken metadata, as (path, folder name)
     structure_dict = {}  # Create a dictionary to store the structure names and their paths
+    if manifest is None:
+        manifest = DirectoryManifest.scan(directory)
+    folder_nodes = {folder.path: folder for folder in manifest.iter_folders()}
+    folders = list(manifest.walk())
+
+    # Read image metadata and measure image distances of all structure folders in the worker pool. The results are
+    # reported below one folder at a time in walk order, while the pool keeps working on the folders after it.
+    executor = create_check_executor()
+    scans = {}
+    folder_bytes = {}
+    index = get_metadata_index()
+    prechecked = 0
+    for subdir, dirs, files in folders:
+        if subdir != directory and not dirs and files:
+            stats = {file.name: (file.size, file.mtime_ns) for file in folder_nodes[subdir].files}
+            watched = folder_watcher.cached_scan(subdir, files, stats) if folder_watcher and job is None else None
+            if watched is not None:
+                # Scanned in watch mode and unchanged since
+                scans[subdir] = done_future(watched)
+                prechecked += 1
+            else:
+                indexed = index.lookup_many(os.path.join(subdir, file) for file in files) if index else {}
+                scans[subdir] = executor.submit(scan_structure_folder, subdir, files, indexed, stats)
+            folder_bytes[subdir] = sum(size for size, _ in stats.values())
+    if prechecked:
+        print_to_widget(f"{prechecked} of {len(scans)} structure folders were already checked in watch mode.")
+    tracker = ProgressTracker(progress_queue, "Checking", sum(folder_bytes.values())) if progress_queue else None
+
+    # Score the names of all folders that are not in GIS at once
+    fuzzy_index.score_all(os.path.basename(subdir) for subdir in scans
+                          if os.path.basename(subdir) not in registry)
+
     # Iterate over each subfolder in the directory
-    for subdir, dirs, files in os.walk(directory):
+    for subdir, dirs, files in folders:
         if subdir == directory:
             continue
         folder_name = os.path.basename(subdir)
         print_to_widget(f"\nChecking folder {folder_name}...")
-        n_coords = None
         structure_dict[folder_name] = subdir
 
         if not dirs and files:
-            if folder_name not in valid_subfolder_set:
+            # Wait for the worker pool to finish scanning this folder
+            scan = scans[subdir].result()
+            merge_folder_scan(scan)
+            if tracker:
+                tracker.advance(folder_bytes[subdir])
+
+            if folder_name not in registry:
                 print_to_widget(f"   - Structure ", newline=False)
                 print_to_widget(f"{folder_name}", newline=False, color='red')
                 print_to_widget(f" not found in GIS. Finding closest match...")
-                result = find_closest_match(folder_name, subdir, valid_subfolder_set, df)
+                result = find_closest_match(folder_name, subdir, available, structure_index, fuzzy_index)
                 if not result:
                     continue  # Skip to the next iteration of the loop
                 else:
@@ -1016,7 +4061,8 @@ def check_issues(directory):
                     print_to_widget(f"{output}\n          Finding new matches...")
 
                     # Resolve duplicates
-                    matches, available_options = resolve_duplicates(matches, options_match, structure_dict, df)
+                    matches, available_options = resolve_duplicates(matches, options_match, structure_dict,
+                                                                    structure_index, fuzzy_index)
 
                 # Find the key in matches that corresponds to the value of structure_name_matched
                 matched_key = None
@@ -1036,95 +4082,92 @@ def check_issues(directory):
                 print_to_widget(f"Structure {folder_name} found in GIS.")
 
             # Check where the folder is listed under
-            if folder_name in ez_structures:
+            if folder_name in registry.ez_poles:
                 ez_list.append(folder_name)
 
-            image_paths = []
             date_taken_list = []
             nadir_count = 0
-            valid_subfolder_set_copy = valid_subfolder_set.copy()
-            for file in files:
-                # Check if the file is an image
-                if any(file.lower().endswith(ext) for ext in image_extensions):
-                    file_path = os.path.join(subdir, file)
-                    image_paths.append(file_path)
-                    # Get the date taken from the image
-                    date_taken = get_date_taken(file_path)
-                    if date_taken and date_taken not in date_taken_list:
-                        date_taken_list.append(date_taken)
-
-                    # Check if the image has an 'N' then extract GPS coordinates of that image
-                    base_name, extension = os.path.splitext(file)
-                    if base_name[-1] == 'N':
-                        nadir_count += 1
-                        n_coords = get_gps_from_image(file_path)
-
-                        if n_coords:
-                            # Find the corresponding row in the DataFrame
-                            matching_row = df[df['Structure ID'] == folder_name]
-                            # Calculate distance between n_coords and df_coords
-                            if not matching_row.empty:
-                                df_coords = (matching_row['Latitude'].iloc[0], matching_row['Longitude'].iloc[0])
-                                distance = distance_calculator(n_coords, df_coords)
-                                if distance is not None:
-                                    if distance > 500:
-                                        print_to_widget(f"   - Distance from GIS coordinates: ", newline=False)
-                                        print_to_widget(f"{distance} feet", newline=False, color='red')
-                                        result = find_closest_match(folder_name, subdir, valid_subfolder_set_copy, df,
-                                                                    verbose=False, no_dist_issue=False)
-                                        if nadir_count > 1:
-                                            print_to_widget(f". (Nadir {nadir_count})")
-                                        else:  # If there is only one nadir
-                                            print_to_widget(f".")
-                                        # Check if the result is None
-                                        if not result:
-                                            issues_dict["STRUCTURE EXCEEDS 500 FEET FROM GIS COORDINATES"].append(
-                                                (folder_name, distance, None, None, nadir_count))
-                                        else:
-                                            structure_name_matched, closest_match, options_match = result
-
-                                            # Check if match already exists
-                                            if closest_match in matches:
-                                                if not isinstance(matches[closest_match], list):
-                                                    matches[closest_match] = [matches[closest_match]]
-                                                matches[closest_match].append(structure_name_matched)
-                                            else:
-                                                matches[closest_match] = structure_name_matched
-
-                                            # Create a temporary duplicates dictionary for printing purposes
-                                            duplicates = {key: value for key, value in matches.items() if
-                                                          isinstance(value, list)}
-                                            if duplicates:
-                                                # Resolve duplicates
-                                                matches, available_options = resolve_duplicates(
-                                                    matches, options_match, structure_dict, df, verbose=False)
-                                            # Find key in matches that corresponds to the structure_name_matched value
-                                            matched_key = None
-                                            for key, value in matches.items():
-                                                if (value == folder_name or
-                                                        (isinstance(value, list) and folder_name in value)):
-                                                    matched_key = key
-                                                    break
-                                            if matched_key is not None:
-                                                (issues_dict["STRUCTURE EXCEEDS 500 FEET FROM GIS COORDINATES"].append(
-                                                    (folder_name, distance, matched_key, closest_distance, nadir_count))
-                                                )
-                                    elif distance >= 150:
-                                        print_to_widget(f"   - Distance from GIS coordinates: ", newline=False)
-                                        print_to_widget(f"{distance} feet", newline=False, color='#FFA500')
-                                        if nadir_count == 1:
-                                            print_to_widget(f".")
-                                        else:
-                                            print_to_widget(f". (Nadir {nadir_count})")
-                                    elif distance < 150:  # If the distance is less than 150 feet
-                                        if nadir_count == 1:
-                                            print_to_widget(f"   - Distance from GIS coordinates: {distance} feet.")
-                                        else:
-                                            print_to_widget(f"   - Distance from GIS coordinates: {distance} feet. "
-                                                            f"(Nadir {nadir_count})")
-                        else:
-                            print_to_widget(f"   - Nadir image does not have GPS data.", color='red')
-                            (issues_dict["NADIR GPS DATA NOT FOUND"].append(folder_name))
+            folder_choices = available.copy()
+            missing_count = 0
+            for file_path, date_taken in zip(scan.image_paths, scan.dates):
+                # Images without date taken metadata are collected, their dates are asked at once after the check
+                if date_taken is None:
+                    missing_dates.append((file_path, folder_name))
+                    missing_count += 1
+                elif date_taken not in date_taken_list:
+                    date_taken_list.append(date_taken)
+
+            # Check the GPS coordinates of each nadir image against the GIS coordinates
+            for n_coords in scan.nadir_coords:
+                nadir_count += 1
+                if n_coords:
+                    # Find the GIS coordinates of the structure
+                    df_coords = registry.location(folder_name)
+                    # Calculate distance between n_coords and df_coords
+                    if df_coords is not None:
+                        distance = distance_calculator(n_coords, df_coords)
+                        if distance is not None:
+                            if distance > 500:
+                                print_to_widget(f"   - Distance from GIS coordinates: ", newline=False)
+                                print_to_widget(f"{distance} feet", newline=False, color='red')
+                                result = find_closest_match(folder_name, subdir, folder_choices,
+                                                            structure_index, fuzzy_index, verbose=False,
+                                                            no_dist_issue=False)
+                                if nadir_count > 1:
+                                    print_to_widget(f". (Nadir {nadir_count})")
+                                else:  # If there is only one nadir
+                                    print_to_widget(f".")
+                                # Check if the result is None
+                                if not result:
+                                    issues_dict["STRUCTURE EXCEEDS 500 FEET FROM GIS COORDINATES"].append(
+                                        (folder_name, distance, None, None, nadir_count))
+                                else:
+                                    structure_name_matched, closest_match, options_match = result
+
+                                    # Check if match already exists
+                                    if closest_match in matches:
+                                        if not isinstance(matches[closest_match], list):
+                                            matches[closest_match] = [matches[closest_match]]
+                                        matches[closest_match].append(structure_name_matched)
+                                    else:
+                                        matches[closest_match] = structure_name_matched
+
+                                    # Create a temporary duplicates dictionary for printing purposes
+                                    duplicates = {key: value for key, value in matches.items() if
+                                                  isinstance(value, list)}
+                                    if duplicates:
+                                        # Resolve duplicates
+                                        matches, available_options = resolve_duplicates(
+                                            matches, options_match, structure_dict, structure_index, fuzzy_index,
+                                            verbose=False)
+                                    # Find key in matches that corresponds to the structure_name_matched value
+                                    matched_key = None
+                                    for key, value in matches.items():
+                                        if (value == folder_name or
+                                                (isinstance(value, list) and folder_name in value)):
+                                            matched_key = key
+                                            break
+                                    if matched_key is not None:
+                                        (issues_dict["STRUCTURE EXCEEDS 500 FEET FROM GIS COORDINATES"].append(
+                                            (folder_name, distance, matched_key,
+                                             getattr(match_state, 'closest_distance', None), nadir_count))
+                                        )
+                            elif distance >= 150:
+                                print_to_widget(f"   - Distance from GIS coordinates: ", newline=False)
+                                print_to_widget(f"{distance} feet", newline=False, color='#FFA500')
+                                if nadir_count == 1:
+                                    print_to_widget(f".")
+                                else:
+                                    print_to_widget(f". (Nadir {nadir_count})")
+                            elif distance < 150:  # If the distance is less than 150 feet
+                                if nadir_count == 1:
+                                    print_to_widget(f"   - Distance from GIS coordinates: {distance} feet.")
+                                else:
+                                    print_to_widget(f"   - Distance from GIS coordinates: {distance} feet. "
+                                                    f"(Nadir {nadir_count})")
+                else:
+                    print_to_widget(f"   - Nadir image does not have GPS data.", color='red')
+                    (issues_dict["NADIR GPS DATA NOT FOUND"].append(folder_name))
 
             # Check if the date taken is within 24 hours of the flight date
             mismatch_found = False
@@ -1135,8 +4178,12 @@ def check_issues(directory):
                     print_to_widget(f"{date}.", color='red')
                     issues_dict["IMAGE METADATA DATE AND FLIGHT DATE MISMATCH"].append((folder_name, date))
 
-            if not mismatch_found:
+            if date_taken_list and not mismatch_found:
                 print_to_widget(f"   - Date taken: {date_taken_list[0]}.")
+            if missing_count:
+                print_to_widget(f"   - ", newline=False)
+                print_to_widget(f"Warning:", newline=False, color='#FFA500')
+                print_to_widget(f" {missing_count} images without date taken metadata (listed after the check).")
 
             # Check if there is an image with 'N' in the folder
             if nadir_count == 0 and subdir != directory:
@@ -1153,24 +4200,14 @@ def check_issues(directory):
                 print_to_widget(f"   - ", newline=False)
                 print_to_widget(f"One nadir image found.")
 
-            max_img = None
-            if n_coords:
+            # The farthest image distance is measured from the last nadir, as computed by the worker pool
+            max_distance, max_img = scan.farthest_distance, scan.farthest_image
+            if scan.nadir_coords and scan.nadir_coords[-1]:
                 # Check if multiple structures are found in the folder
-                max_distance = 0
-                for img_path in image_paths:
-                    coord = get_gps_from_image(img_path)
-                    img_name = os.path.basename(img_path)
-                    if coord:
-                        dist_feet = distance_calculator(n_coords, coord)
-                        if dist_feet > max_distance:
-                            max_distance = dist_feet
-                            max_img = img_name
-                    else:
-                        print_to_widget(f"   - ", newline=False)
-                        print_to_widget(f"Warning:", newline=False, color='#FFA500')
-                        print_to_widget(f" No GPS data found on {img_name} from structure {folder_name}.")
-                # Get the value from the entry widget
-                team_number = team_number_entry.get()
+                for img_name in scan.images_without_gps:
+                    print_to_widget(f"   - ", newline=False)
+                    print_to_widget(f"Warning:", newline=False, color='#FFA500')
+                    print_to_widget(f" No GPS data found on {img_name} from structure {folder_name}.")
                 first_digit = team_number[0]
                 if first_digit == '1':
                     distance_threshold = 500
@@ -1187,94 +4224,22 @@ def check_issues(directory):
                     print_to_widget(f"   - Farthest image distance: ", newline=False)
                     print_to_widget(f"{max_distance} feet from nadir.")
 
-    return issues_dict, ez_list
+    # A later folder can move the match of an earlier one, so the matches listed are only final once all are checked
+    update_matched_structures(issues_dict, matches, structure_dict, scans, registry)
 
+    # Ask for the dates of all the images without date taken metadata at once
+    if missing_dates:
+        check_missing_dates(missing_dates, flight_date, issues_dict)
 
-# Define the color palette for dark mode
-dark_bg = '#18191A'
-dark_fg = '#B3B3B3'
-accent_color = '#242526'
-hover_color = '#3A3B3C'
-scrollbar_bg = "#1d1d1d"
-
-# Define the color palette for custom tk dark mode
-ctk.set_appearance_mode("Dark")  # Set the appearance to dark mode
-ctk.set_default_color_theme("dark-blue")  # Set the default color theme
-
-# Create an instance of the standard tk.Tk class
-root = ctk.CTk()
-root.title("Package Data")
-root.geometry("900x900")
-
-# Add a "Choose Directory" button to the GUI
-choose_directory_button = ctk.CTkButton(root, text="1. Choose Directory", command=choose_directory)
-choose_directory_button.grid(row=0, column=0, padx=(20, 10), pady=10, sticky='ew')
-create_tooltip(choose_directory_button, "Press to select the directory of your structure folders")
-
-# Create a StringVar to store the selected directory path
-dir_path = StringVar()
-
-# Add an Entry widget to display and edit the directory path
-path_entry = ctk.CTkEntry(root, textvariable=dir_path)
-path_entry.grid(row=0, column=1, padx=(0, 20), pady=20, sticky=tk.E + tk.W, columnspan=4)
-
-# Call the update_directory_path function whenever the path_entry widget loses focus or the Enter key is pressed
-path_entry.bind('<FocusOut>', lambda _: dir_path.set(path_entry.get().replace('"', '')))
-path_entry.bind('<Return>', lambda _: dir_path.set(path_entry.get().replace('"', '')))
-
-# Add the Team Number entry field to the GUI
-ctk.CTkLabel(root, text="2. Team Number:").grid(row=1, column=0, padx=5, pady=10, sticky=tk.E)
-team_number_entry = ctk.CTkEntry(root, width=80)
-team_number_entry.grid(row=1, column=1, columnspan=2, pady=10, sticky=tk.W)
-
-# Add the Flight Date entry field to the GUI
-ctk.CTkLabel(root, text="3. Flight Date:").grid(row=1, column=2, padx=5, sticky=tk.E)
-date_entry = DateEntry(root, date_pattern='mm.dd.yyyy')
-date_entry.configure(background='black', foreground='white', selectbackground='light blue')
-date_entry.grid(row=1, column=3, columnspan=2, sticky=tk.W)
-
-# Create a Package Data button
-package_data_button = ctk.CTkButton(root, text="4. Package Data", command=packaging_thread_function)
-package_data_button.grid(row=2, column=0, columnspan=5, padx=50, pady=25)
-create_tooltip(package_data_button, "Press to start packaging the data in the selected directory")
-
-# Create a Cancel Zipping button
-cancel_button = ctk.CTkButton(root, text="Cancel Zipping", command=request_cancel)
-cancel_button.grid(row=4, column=0, columnspan=5, padx=50, pady=10)
-cancel_button.configure(state="disabled")
-
-# Create the "Transmission" label widget
-transmission_label = ctk.CTkLabel(root, text="TRANSMISSION:")
-transmission_label.grid(row=6, column=3, padx=5, pady=(0, 10), sticky='e')
-
-# Create the "Distribution" label widget
-distribution_label = ctk.CTkLabel(root, text="DISTRIBUTION:")
-distribution_label.grid(row=7, column=3, padx=5, pady=(0, 10), sticky='e')
-
-# Create the "Field Upload" trans button widget
-field_upload_trans_button = ctk.CTkButton(root, text="Field Upload", command=upload_trans_data,
-                                          fg_color="#3c6e71", hover_color="#234143")
-field_upload_trans_button.grid(row=6, column=4, padx=(0, 20), pady=(0, 10), sticky='e')
-create_tooltip(field_upload_trans_button, "Launch Transmission Field Uploads page")
-
-# Create the "Field Upload" distro button widget
-field_upload_distro_button = ctk.CTkButton(root, text="Field Upload", command=upload_distro_data, fg_color="#695E93",
-                                           hover_color="#504870")
-field_upload_distro_button.grid(row=7, column=4, padx=(0, 20), pady=(0, 10), sticky='e')
-create_tooltip(field_upload_distro_button, "Launch Distribution Field Uploads page")
-
-# Create a custom progress bar
-progress_bar_canvas = ctk.CTkCanvas(root, width=448, height=20, bg="white", highlightthickness=0)
-progress_bar_canvas.grid(row=3, column=0, columnspan=5, padx=20, pady=10)
-progress_bar_rect = progress_bar_canvas.create_rectangle(0, 0, 0, 30, fill='light green', width=0)
-progress_bar_percentage = progress_bar_canvas.create_text(225, 10, text="0%", font=("Arial", 10, "bold"), fill="black",
-                                                          anchor="center")
-
-# Create a label widget for the version number
-version_label = ctk.CTkLabel(root, text=f"Version {get_current_version()}", cursor="hand2")
-version_label.grid(row=8, column=4, padx=10, sticky=tk.E)
-version_label.configure(font=("Arial", 10))
-version_label.bind("<Button-1>", open_version_history)
+    executor.shutdown()
+    if tracker:
+        tracker.finish()
+
+    # Save the metadata parsed during this run so that the next run only parses new or changed images
+    if index:
+        index.flush()
+
+    return issues_dict, ez_list
 
 
 # Function to display the context menu
@@ -1292,22 +4257,6 @@ def copy_text(event=None):
         root.clipboard_append(text_space.selection_get())
 
 
-# Create the CTkTextbox widget
-text_space = ctk.CTkTextbox(root, wrap=tk.WORD)
-text_space.configure(fg_color="gray20", font=('Segoe UI', 15))
-text_space.grid(row=5, column=0, columnspan=5, padx=20, pady=20, sticky=tk.N + tk.S + tk.E + tk.W)
-
-# Configure the row to expand and fill
-root.grid_rowconfigure(5, weight=1)
-
-# Create a context menu
-context_menu = tk.Menu(root, tearoff=0)
-context_menu.add_command(label="Copy", command=copy_text)
-
-# Bind right-click event
-text_space.bind("<Button-3>", show_context_menu)
-
-
 def copy_structure_ids():
     directory = dir_path.get()
     if not directory:
@@ -1328,20 +4277,250 @@ def copy_structure_ids():
     messagebox.showinfo("Success", "Structure IDs copied to clipboard. Paste them into the Upload Check sheet.")
 
 
-# Create the "Copy Structure IDs" button widget
-copy_button = ctk.CTkButton(root, text="Copy Structure IDs", width=8, command=copy_structure_ids, fg_color="#565B5E",
-                            hover_color="#3a3a3a")
-copy_button.grid(row=6, column=0, padx=20, pady=(0, 10), sticky='w')
-create_tooltip(copy_button, "Copy structure IDs to paste in Upload Check page")
-
-# Configure the column and row widths to evenly space the buttons
-for i in range(3):
-    root.grid_columnconfigure(i, weight=1)
-
-# Display the window
-root.deiconify()
-
-# Check for update
-check_for_updates()
-
-root.mainloop()
\ No newline at end of file
+def update_setting(key, value):
+    settings[key] = value
+    save_settings()
+
+
+def open_settings_window():
+    settings_window = ctk.CTkToplevel(root)
+    settings_window.title("Settings")
+    settings_window.transient(root)
+
+    # Worker pool used to scan structure folders during the check
+    ctk.CTkLabel(settings_window, text="Check workers:").grid(row=0, column=0, padx=(20, 5), pady=10, sticky=tk.E)
+    check_executor_menu = ctk.CTkOptionMenu(settings_window, values=["Threads", "Processes"],
+                                            command=lambda value: update_setting("check_executor", value))
+    check_executor_menu.set(settings["check_executor"])
+    check_executor_menu.grid(row=0, column=1, padx=5, pady=10, sticky=tk.W)
+    check_workers_menu = ctk.CTkOptionMenu(settings_window, values=["Auto", "1", "2", "4", "8", "16"], width=80,
+                                           command=lambda value: update_setting("check_workers", value))
+    check_workers_menu.set(settings["check_workers"])
+    check_workers_menu.grid(row=0, column=2, padx=(5, 20), pady=10, sticky=tk.W)
+    create_tooltip(check_executor_menu, "Processes use every CPU core but take longer to start")
+
+    # Whether the flight directory is reorganized on disk before zipping
+    ctk.CTkLabel(settings_window, text="Archive layout:").grid(row=1, column=0, padx=(20, 5), pady=10, sticky=tk.E)
+    archive_layout_menu = ctk.CTkOptionMenu(settings_window, values=["Virtual", "On disk"],
+                                            command=lambda value: update_setting("archive_layout", value))
+    archive_layout_menu.set(settings["archive_layout"])
+    archive_layout_menu.grid(row=1, column=1, padx=5, pady=10, sticky=tk.W)
+    create_tooltip(archive_layout_menu, "Virtual: the zip file gets the final layout, the flight folder is left as "
+                                        "it is\nOn disk: the flight folder is renamed and reorganized, then zipped")
+
+    # Where the EZ pole folders are duplicated for EZPolesForTrans when the layout is made on disk
+    ctk.CTkLabel(settings_window, text="EZ pole copies:").grid(row=2, column=0, padx=(20, 5), pady=10, sticky=tk.E)
+    ez_pole_copies_menu = ctk.CTkOptionMenu(settings_window, values=["In archive", "On disk"],
+                                            command=lambda value: update_setting("ez_pole_copies", value))
+    ez_pole_copies_menu.set(settings["ez_pole_copies"])
+    ez_pole_copies_menu.grid(row=2, column=1, padx=5, pady=10, sticky=tk.W)
+    create_tooltip(ez_pole_copies_menu, "In archive: EZ poles are only duplicated inside the zip file\n"
+                                        "On disk: EZ poles are hardlinked (or copied) into EZPolesForTrans\n"
+                                        "(Only used with the On disk archive layout)")
+
+    # Largest zip file, larger packages are split into several zip files and an index
+    ctk.CTkLabel(settings_window, text="Zip part size:").grid(row=3, column=0, padx=(20, 5), pady=10, sticky=tk.E)
+    zip_part_size_menu = ctk.CTkOptionMenu(settings_window, values=["No limit", "1 GB", "2 GB", "4 GB"],
+                                           command=lambda value: update_setting("zip_part_size", value))
+    zip_part_size_menu.set(settings["zip_part_size"])
+    zip_part_size_menu.grid(row=3, column=1, padx=5, pady=10, sticky=tk.W)
+    create_tooltip(zip_part_size_menu, "Packages larger than this are split into several zip files\n"
+                                       "(e.g. for FAT32 drives, which cannot hold files of 4 GB or more)")
+
+    # Whether the chosen directory is checked in the background while data is still being copied into it
+    ctk.CTkLabel(settings_window, text="Watch mode:").grid(row=4, column=0, padx=(20, 5), pady=10, sticky=tk.E)
+    watch_mode_menu = ctk.CTkOptionMenu(settings_window, values=["Off", "On"],
+                                        command=lambda value: update_setting("watch_mode", value))
+    watch_mode_menu.set(settings["watch_mode"])
+    watch_mode_menu.grid(row=4, column=1, padx=5, pady=10, sticky=tk.W)
+    create_tooltip(watch_mode_menu, "On: after choosing a directory, each structure folder is checked as soon as it\n"
+                                    "has finished copying, so packaging only checks the folders changed since")
+
+    # Whether the files copied from SD cards are read again and compared with the cards
+    ctk.CTkLabel(settings_window, text="Verify ingest:").grid(row=5, column=0, padx=(20, 5), pady=10, sticky=tk.E)
+    ingest_verify_menu = ctk.CTkOptionMenu(settings_window, values=["Off", "On"],
+                                           command=lambda value: update_setting("ingest_verify", value))
+    ingest_verify_menu.set(settings["ingest_verify"])
+    ingest_verify_menu.grid(row=5, column=1, padx=5, pady=10, sticky=tk.W)
+    create_tooltip(ingest_verify_menu, "On: every file copied by Ingest SD Cards is read back and its checksum\n"
+                                       "compared with the card (slower, catches failing cards and cables)")
+
+    # Field upload server the packages are uploaded to after zipping
+    ctk.CTkLabel(settings_window, text="Upload server:").grid(row=6, column=0, padx=(20, 5), pady=10, sticky=tk.E)
+    upload_url_entry = ctk.CTkEntry(settings_window, width=260, placeholder_text="Off")
+    if settings["upload_url"]:
+        upload_url_entry.insert(0, settings["upload_url"])
+    upload_url_entry.grid(row=6, column=1, columnspan=2, padx=(5, 20), pady=10, sticky=tk.W)
+    upload_url_entry.bind('<FocusOut>', lambda _: update_setting("upload_url", upload_url_entry.get().strip()))
+    upload_url_entry.bind('<Return>', lambda _: update_setting("upload_url", upload_url_entry.get().strip()))
+    create_tooltip(upload_url_entry, "Address of the field upload server, e.g. http://server:8000\n"
+                                     "Packages are uploaded after zipping, split packages part by part as they are "
+                                     "zipped\nLeave empty to not upload")
+
+
+if __name__ == '__main__':
+    # Needed for the process worker pool in the PyInstaller bundle
+    multiprocessing.freeze_support()
+    load_settings()
+
+    # With arguments, the given flights are packaged from the command line instead of opening the GUI
+    if len(sys.argv) > 1:
+        sys.exit(run_command_line(sys.argv[1:]))
+
+    # Define the color palette for dark mode
+    dark_bg = '#18191A'
+    dark_fg = '#B3B3B3'
+    accent_color = '#242526'
+    hover_color = '#3A3B3C'
+    scrollbar_bg = "#1d1d1d"
+
+    # Define the color palette for custom tk dark mode
+    ctk.set_appearance_mode("Dark")  # Set the appearance to dark mode
+    ctk.set_default_color_theme("dark-blue")  # Set the default color theme
+
+    # Create an instance of the standard tk.Tk class
+    root = ctk.CTk()
+    root.title("Package Data")
+    root.geometry("900x900")
+
+    # Add a "Choose Directory" button to the GUI
+    choose_directory_button = ctk.CTkButton(root, text="1. Choose Directory", command=choose_directory)
+    choose_directory_button.grid(row=0, column=0, padx=(20, 10), pady=10, sticky='ew')
+    create_tooltip(choose_directory_button, "Press to select the directory of your structure folders")
+
+    # Create a StringVar to store the selected directory path
+    dir_path = StringVar()
+
+    # Add an Entry widget to display and edit the directory path
+    path_entry = ctk.CTkEntry(root, textvariable=dir_path)
+    path_entry.grid(row=0, column=1, padx=(0, 20), pady=20, sticky=tk.E + tk.W, columnspan=4)
+
+    # Call the update_directory_path function whenever the path_entry widget loses focus or the Enter key is pressed
+    path_entry.bind('<FocusOut>', lambda _: dir_path.set(path_entry.get().replace('"', '')))
+    path_entry.bind('<Return>', lambda _: dir_path.set(path_entry.get().replace('"', '')))
+
+    # Add the Team Number entry field to the GUI
+    ctk.CTkLabel(root, text="2. Team Number:").grid(row=1, column=0, padx=5, pady=10, sticky=tk.E)
+    team_number_entry = ctk.CTkEntry(root, width=80)
+    team_number_entry.grid(row=1, column=1, columnspan=2, pady=10, sticky=tk.W)
+
+    # Add the Flight Date entry field to the GUI
+    ctk.CTkLabel(root, text="3. Flight Date:").grid(row=1, column=2, padx=5, sticky=tk.E)
+    date_entry = tkcalendar.DateEntry(root, date_pattern='mm.dd.yyyy')
+    date_entry.configure(background='black', foreground='white', selectbackground='light blue')
+    date_entry.grid(row=1, column=3, columnspan=2, sticky=tk.W)
+
+    # Create a Package Data button
+    package_data_button = ctk.CTkButton(root, text="4. Package Data", command=packaging_thread_function)
+    package_data_button.grid(row=2, column=0, columnspan=5, padx=50, pady=25)
+    create_tooltip(package_data_button, "Press to start packaging the data in the selected directory")
+
+    # Create a Cancel Zipping button
+    cancel_button = ctk.CTkButton(root, text="Cancel Zipping", command=request_cancel)
+    cancel_button.grid(row=4, column=0, columnspan=5, padx=50, pady=10)
+    cancel_button.configure(state="disabled")
+
+    # Create the "Transmission" label widget
+    transmission_label = ctk.CTkLabel(root, text="TRANSMISSION:")
+    transmission_label.grid(row=6, column=3, padx=5, pady=(0, 10), sticky='e')
+
+    # Create the "Distribution" label widget
+    distribution_label = ctk.CTkLabel(root, text="DISTRIBUTION:")
+    distribution_label.grid(row=7, column=3, padx=5, pady=(0, 10), sticky='e')
+
+    # Create the "Field Upload" trans button widget
+    field_upload_trans_button = ctk.CTkButton(root, text="Field Upload", command=upload_trans_data,
+                                              fg_color="#3c6e71", hover_color="#234143")
+    field_upload_trans_button.grid(row=6, column=4, padx=(0, 20), pady=(0, 10), sticky='e')
+    create_tooltip(field_upload_trans_button, "Launch Transmission Field Uploads page")
+
+    # Create the "Field Upload" distro button widget
+    field_upload_distro_button = ctk.CTkButton(root, text="Field Upload", command=upload_distro_data,
+                                               fg_color="#695E93", hover_color="#504870")
+    field_upload_distro_button.grid(row=7, column=4, padx=(0, 20), pady=(0, 10), sticky='e')
+    create_tooltip(field_upload_distro_button, "Launch Distribution Field Uploads page")
+
+    # Create a custom progress bar
+    progress_bar_canvas = ctk.CTkCanvas(root, width=448, height=20, bg="white", highlightthickness=0)
+    progress_bar_canvas.grid(row=3, column=0, columnspan=5, padx=20, pady=10)
+    progress_bar_rect = progress_bar_canvas.create_rectangle(0, 0, 0, 30, fill='light green', width=0)
+    progress_bar_percentage = progress_bar_canvas.create_text(225, 10, text="0%", font=("Arial", 10, "bold"),
+                                                              fill="black", anchor="center")
+
+    # Create a label widget for the version number
+    version_label = ctk.CTkLabel(root, text=f"Version {get_current_version()}", cursor="hand2")
+    version_label.grid(row=8, column=4, padx=10, sticky=tk.E)
+    version_label.configure(font=("Arial", 10))
+    version_label.bind("<Button-1>", open_version_history)
+
+
+    # Create the CTkTextbox widget
+    text_space = ctk.CTkTextbox(root, wrap=tk.WORD)
+    text_space.configure(fg_color="gray20", font=('Segoe UI', 15))
+    text_space.grid(row=5, column=0, columnspan=5, padx=20, pady=20, sticky=tk.N + tk.S + tk.E + tk.W)
+
+    # Configure the row to expand and fill
+    root.grid_rowconfigure(5, weight=1)
+
+    # Create a context menu
+    context_menu = tk.Menu(root, tearoff=0)
+    context_menu.add_command(label="Copy", command=copy_text)
+
+    # Bind right-click event
+    text_space.bind("<Button-3>", show_context_menu)
+
+    # Write the queued messages to the text box
+    drain_log()
+
+    # Show the progress published by the packaging thread
+    progress_queue = ProgressQueue()
+    update_progress_bar(progress_queue)
+
+
+    # Create the "Copy Structure IDs" button widget
+    copy_button = ctk.CTkButton(root, text="Copy Structure IDs", width=8, command=copy_structure_ids,
+                                fg_color="#565B5E", hover_color="#3a3a3a")
+    copy_button.grid(row=6, column=0, padx=20, pady=(0, 10), sticky='w')
+    create_tooltip(copy_button, "Copy structure IDs to paste in Upload Check page")
+
+    # Create the "Rebuild Index" button widget
+    rebuild_index_button = ctk.CTkButton(root, text="Rebuild Index", width=8, command=rebuild_metadata_index,
+                                         fg_color="#565B5E", hover_color="#3a3a3a")
+    rebuild_index_button.grid(row=7, column=0, padx=20, pady=(0, 10), sticky='w')
+    create_tooltip(rebuild_index_button, "Clear the saved image metadata so images are read again on the next check")
+
+    # Create the "Ingest SD Cards" button widget
+    ingest_button = ctk.CTkButton(root, text="Ingest SD Cards", width=8, command=ingest_thread_function,
+                                  fg_color="#565B5E", hover_color="#3a3a3a")
+    ingest_button.grid(row=6, column=1, padx=(0, 20), pady=(0, 10), sticky='w')
+    create_tooltip(ingest_button, "Copy one or more SD cards into the chosen directory at the same time")
+
+    # Create the "Upload Package" button widget
+    upload_package_button = ctk.CTkButton(root, text="Upload Package", width=8,
+                                          command=upload_package_thread_function, fg_color="#565B5E",
+                                          hover_color="#3a3a3a")
+    upload_package_button.grid(row=7, column=1, padx=(0, 20), pady=(0, 10), sticky='w')
+    create_tooltip(upload_package_button, "Upload (or resume uploading) zip files to the upload server in Settings")
+
+    # Create the "Settings" button widget
+    settings_button = ctk.CTkButton(root, text="Settings", width=8, command=open_settings_window, fg_color="#565B5E",
+                                    hover_color="#3a3a3a")
+    settings_button.grid(row=8, column=0, padx=20, pady=(0, 10), sticky='w')
+    create_tooltip(settings_button, "Change how the app checks and packages data")
+
+    # Configure the column and row widths to evenly space the buttons
+    for i in range(3):
+        root.grid_columnconfigure(i, weight=1)
+
+    # Display the window
+    root.deiconify()
+    root.update()
+    first_paint = time.perf_counter() - startup_time
+
+    # Check for update without blocking the window
+    check_for_updates()
+
+    # Load the libraries needed by the check while the user fills in the form
+    threading.Thread(target=warm_imports, args=(first_paint,), daemon=True).start()
+
+    root.mainloop()
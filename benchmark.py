@@ -0,0 +1,308 @@
+"""
+Generates a synthetic flight and times each stage of the packaging pipeline without the GUI.
+
+    python benchmark.py --structures 200 --images 12 --image-size 300 --repeat 3 --json results.json
+
+The flight has one folder per structure with JPEGs carrying DateTimeOriginal and GPS metadata, a nadir image
+(...N.jpg) in most folders, misspelled folder names, folders of the same structure flown twice and EZ poles, along
+with a matching Structure ID List. Caches are kept in a temporary app data folder, so the user's caches are not used.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import struct
+import subprocess
+import sys
+import tempfile
+import time
+
+BASE_LATITUDE = 39.9
+BASE_LONGITUDE = -83.0
+STRUCTURE_SPACING = 0.001  # Degrees between two structures of the grid (about 360 feet)
+IMAGE_SPREAD = 0.0001  # Largest offset in degrees of an image from its structure (about 36 feet)
+FLIGHT_DATE = "05.01.2024"
+TEAM_NUMBER = "2001-0001"
+
+
+def tiff_entry(tag, field_type, count, value):
+    return struct.pack('<HHI', tag, field_type, count) + value
+
+
+def exif_segment(date_taken, latitude, longitude):
+    """
+    Returns a JPEG APP1 segment with the DateTimeOriginal and GPS tags read by the check.
+    """
+
+    def rational(value):
+        value = abs(value)
+        degrees = int(value)
+        minutes = int((value - degrees) * 60)
+        seconds = round(((value - degrees) * 60 - minutes) * 60 * 10000)
+        return struct.pack('<6I', degrees, 1, minutes, 1, seconds, 10000)
+
+    # IFD0 at 8, Exif IFD at 50, DateTimeOriginal at 68, GPS IFD at 88 and the GPS coordinates at 142 and 166
+    ifd0 = struct.pack('<H', 3) + b''.join([
+        tiff_entry(0x0112, 3, 1, struct.pack('<HH', 1, 0)),  # Orientation
+        tiff_entry(0x8769, 4, 1, struct.pack('<I', 50)),  # Exif IFD
+        tiff_entry(0x8825, 4, 1, struct.pack('<I', 88)),  # GPS IFD
+    ]) + struct.pack('<I', 0)
+    exif_ifd = struct.pack('<H', 1) + tiff_entry(0x9003, 2, 20, struct.pack('<I', 68)) + struct.pack('<I', 0)
+    gps_ifd = struct.pack('<H', 4) + b''.join([
+        tiff_entry(1, 2, 2, (b'N' if latitude >= 0 else b'S') + b'\0\0\0'),
+        tiff_entry(2, 5, 3, struct.pack('<I', 142)),
+        tiff_entry(3, 2, 2, (b'E' if longitude >= 0 else b'W') + b'\0\0\0'),
+        tiff_entry(4, 5, 3, struct.pack('<I', 166)),
+    ]) + struct.pack('<I', 0)
+    tiff = (b'II*\0' + struct.pack('<I', 8) + ifd0 + exif_ifd + date_taken.encode('ascii') + b'\0' + gps_ifd +
+            rational(latitude) + rational(longitude))
+    payload = b'Exif\0\0' + tiff
+    return b'\xff\xe1' + struct.pack('>H', len(payload) + 2) + payload
+
+
+def write_jpeg(path, date_taken, latitude, longitude, size):
+    """
+    Writes a JPEG of about size bytes: the EXIF segment followed by random (incompressible) image data.
+    """
+    header = b'\xff\xd8' + exif_segment(date_taken, latitude, longitude) + b'\xff\xda'
+    with open(path, 'wb') as f:
+        f.write(header + os.urandom(max(size - len(header) - 2, 0)) + b'\xff\xd9')
+
+
+def generate_flight(directory, structures, images, image_size, list_size, typos, duplicates, no_nadir, ez_poles,
+                    seed):
+    """
+    Generates a flight of structures folders of images each in directory/flight, and its Structure ID List.
+
+    :return: Path of the flight directory, path of the Structure ID List, and a summary of the generated folders
+    """
+    import pandas as pd
+
+    rng = random.Random(seed)
+    list_size = max(list_size, structures)
+    ids = [str(4000000 + i) for i in range(list_size)]
+    coordinates = [(BASE_LATITUDE + (i // 100) * STRUCTURE_SPACING, BASE_LONGITUDE + (i % 100) * STRUCTURE_SPACING)
+                   for i in range(list_size)]
+    types = ['EZ_POLE' if rng.random() < ez_poles else 'POLE' for _ in range(list_size)]
+    list_path = os.path.join(directory, 'Structure ID List.xlsx')
+    pd.DataFrame({'Structure ID': ['OH-' + structure_id for structure_id in ids], 'Structure Type': types,
+                  'Latitude': [lat for lat, _ in coordinates],
+                  'Longitude': [lon for _, lon in coordinates]}).to_excel(list_path, index=False)
+
+    flight = os.path.join(directory, 'flight')
+    os.makedirs(flight)
+    flown = rng.sample(range(list_size), structures)
+    summary = {'folders': 0, 'images': 0, 'bytes': 0, 'typos': 0, 'duplicates': 0, 'no_nadir': 0,
+               'ez_poles': sum(types[i] == 'EZ_POLE' for i in flown)}
+
+    def misspell(structure_id):
+        if rng.random() < 0.5:
+            return structure_id + rng.choice('xab')
+        position = rng.randrange(len(structure_id))
+        return structure_id[:position] + structure_id[position + 1:]
+
+    folders = []
+    for i in flown:
+        name = ids[i]
+        if rng.random() < typos:
+            name = misspell(name)
+            summary['typos'] += 1
+        folders.append((name, i))
+        if rng.random() < duplicates:
+            # The same structure flown again, filed under another misspelled name
+            folders.append((misspell(ids[i]) + 'd', i))
+            summary['duplicates'] += 1
+
+    for number, (name, i) in enumerate(folders):
+        folder_path = os.path.join(flight, name)
+        if os.path.exists(folder_path):
+            continue
+        os.makedirs(folder_path)
+        latitude, longitude = coordinates[i]
+        nadir = rng.random() >= no_nadir
+        summary['no_nadir'] += not nadir
+        for image in range(images):
+            suffix = 'N' if nadir and image == 0 else ''
+            spread = IMAGE_SPREAD / 10 if suffix else IMAGE_SPREAD
+            date_taken = f"2024:05:01 {8 + number // 3600 % 10:02d}:{number // 60 % 60:02d}:{number % 60:02d}"
+            path = os.path.join(folder_path, f"DJI_{number:04d}_{image:03d}{suffix}.JPG")
+            write_jpeg(path, date_taken, latitude + rng.uniform(-spread, spread),
+                       longitude + rng.uniform(-spread, spread), image_size)
+            summary['images'] += 1
+            summary['bytes'] += os.path.getsize(path)
+        summary['folders'] += 1
+    return flight, list_path, summary
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmark(args):
+    work_dir = tempfile.mkdtemp(prefix='fieldapp-benchmark-')
+    # Keep the app's caches (metadata index, compiled Structure ID List, journals) away from the user's
+    os.environ['LOCALAPPDATA'] = os.path.join(work_dir, 'appdata')
+
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    import FieldApp as app
+
+    try:
+        start = time.perf_counter()
+        flight, list_path, summary = generate_flight(work_dir, args.structures, args.images, args.image_size * 1024,
+                                                     args.list_size, args.typos, args.duplicates, args.no_nadir,
+                                                     args.ez_poles, args.seed)
+        print(f"Generated {summary['folders']} folders, {summary['images']} images "
+              f"({summary['bytes'] / 1024 ** 2:.1f} MB) in {time.perf_counter() - start:.1f} s: "
+              f"{summary['typos']} misspelled, {summary['duplicates']} flown twice, "
+              f"{summary['no_nadir']} without nadir, {summary['ez_poles']} EZ poles")
+
+        app.find_structure_list_file = lambda: list_path
+        app.settings.update(check_executor=args.executor, check_workers=args.workers, archive_layout="Virtual",
+                            zip_part_size="No limit")
+        job = app.PackagingJob(flight, TEAM_NUMBER, FLIGHT_DATE, ignore_issues=True)
+        app.job_context.job = job
+        cache_path = os.path.join(app.get_app_data_dir(), 'structure_list_cache.pkl')
+        images, data_bytes, folders = summary['images'], summary['bytes'], summary['folders']
+        timings = {}
+
+        def timed(stage, function, items=None, unit='images', nbytes=None):
+            start = time.perf_counter()
+            result = function()
+            seconds = time.perf_counter() - start
+            timing = timings.setdefault(stage, {'stage': stage, 'runs': [], 'items': items, 'unit': unit,
+                                                'bytes': nbytes})
+            timing['runs'].append(seconds)
+            return result
+
+        for _ in range(args.repeat):
+            if os.path.exists(cache_path):
+                os.remove(cache_path)
+            df = timed("Structure list (Excel)", app.load_structure_list, args.list_size, 'structures')
+            timed("Structure list (compiled)", app.load_structure_list, args.list_size, 'structures')
+
+            manifest = timed("Scan directory", lambda: app.DirectoryManifest.scan(flight), images, 'images',
+                             data_bytes)
+
+            index = app.get_metadata_index()
+            if index:
+                index.clear()
+            issues, ez_list = timed("Check (cold metadata index)",
+                                    lambda: app.check_issues(flight, app.ProgressQueue(), manifest), images,
+                                    'images', data_bytes)
+            timed("Check (warm metadata index)", lambda: app.check_issues(flight, app.ProgressQueue(), manifest),
+                  images, 'images', data_bytes)
+
+            structure_index, fuzzy_index = timed("Build indexes", lambda: (
+                app.StructureIndex(df['Structure ID'], app.pd.to_numeric(df['Latitude'], errors='coerce'),
+                                   app.pd.to_numeric(df['Longitude'], errors='coerce')),
+                app.FuzzyIndex(df.iloc[:, 0].dropna())), len(df), 'structures')
+
+            registry = timed("Build structure registry", lambda: app.StructureRegistry(df), args.list_size,
+                             'structures')
+            misnamed = [(folder.name, folder.path) for folder in manifest.innermost_folders()
+                        if folder.name not in registry]
+            structure_dict = {folder.name: folder.path for folder in manifest.innermost_folders()}
+
+            def match_all():
+                matches = {}
+                for name, path in misnamed:
+                    result = app.find_closest_match(name, path, registry.available(), structure_index,
+                                                    fuzzy_index, verbose=False)
+                    if result:
+                        existing = matches.get(result[1])
+                        if existing is None:
+                            matches[result[1]] = name
+                        else:
+                            matches[result[1]] = (existing if isinstance(existing, list) else [existing]) + [name]
+                return matches
+
+            matches = timed("Match folder names", match_all, len(misnamed), 'folders')
+            available = registry.available()
+            available.difference_update(matches)
+            timed("Resolve duplicates", lambda: app.resolve_duplicates(
+                dict(matches), available.copy(), structure_dict, structure_index, fuzzy_index, verbose=False),
+                  len(misnamed), 'folders')
+
+            layout = timed("Plan layout", lambda: app.plan_archive_layout(
+                manifest, f"{TEAM_NUMBER}_{FLIGHT_DATE}", TEAM_NUMBER[:4], ez_list), images, 'images')
+            layout_bytes = sum(entry.size for entry in layout)
+            zip_path = os.path.join(work_dir, 'benchmark.zip')
+            timed("Zip", lambda: app.zip_directory(flight, zip_path, app.ProgressQueue(), manifest, layout),
+                  len(layout), 'files', layout_bytes)
+            os.remove(zip_path)
+            shutil.rmtree(os.path.join(app.get_app_data_dir(), 'journals'), ignore_errors=True)
+
+            result = timed("Package (end to end)", lambda: app.run_packaging_job(
+                app.PackagingJob(flight, TEAM_NUMBER, FLIGHT_DATE, ignore_issues=True)), images, 'images',
+                           data_bytes)
+            if result['status'] != 'packaged':
+                print(f"Packaging failed: {result['errors']}")
+            for path in result['zip_files']:
+                os.remove(path)
+            shutil.rmtree(os.path.join(app.get_app_data_dir(), 'journals'), ignore_errors=True)
+            app.job_context.job = job
+
+        results = []
+        for timing in timings.values():
+            seconds = min(timing['runs'])
+            results.append({
+                'stage': timing['stage'],
+                'seconds': round(seconds, 4),
+                'runs': [round(run, 4) for run in timing['runs']],
+                'items': timing['items'],
+                'unit': timing['unit'],
+                'items_per_second': round(timing['items'] / seconds, 1) if timing['items'] and seconds else None,
+                'mb_per_second': round(timing['bytes'] / 1024 ** 2 / seconds, 1) if timing['bytes'] and seconds
+                else None,
+            })
+
+        print(f"\n{'Stage':<30}{'Best (s)':>10}{'Rate':>26}{'MB/s':>10}")
+        for result in results:
+            rate = f"{result['items_per_second']:,.0f} {result['unit']}/s" if result['items_per_second'] else ''
+            print(f"{result['stage']:<30}{result['seconds']:>10.3f}{rate:>26}{result['mb_per_second'] or '':>10}")
+
+        if args.json:
+            with open(args.json, 'w') as f:
+                json.dump({'commit': git_commit(), 'date': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                           'python': sys.version.split()[0], 'platform': platform.platform(),
+                           'cpus': os.cpu_count(), 'parameters': vars(args), 'dataset': summary,
+                           'results': results}, f, indent=2)
+    finally:
+        app.job_context.job = None
+        if args.keep:
+            print(f"\nKept the benchmark files in {work_dir}")
+        else:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time the packaging pipeline on a synthetic flight.")
+    parser.add_argument('--structures', type=int, default=100, help="Structure folders in the flight (default 100)")
+    parser.add_argument('--images', type=int, default=10, help="Images per folder (default 10)")
+    parser.add_argument('--image-size', type=int, default=200, help="Size of an image in KB (default 200)")
+    parser.add_argument('--list-size', type=int, default=5000,
+                        help="Structures in the Structure ID List (default 5000)")
+    parser.add_argument('--typos', type=float, default=0.1, help="Fraction of misspelled folder names (default 0.1)")
+    parser.add_argument('--duplicates', type=float, default=0.03,
+                        help="Fraction of structures flown twice under another name (default 0.03)")
+    parser.add_argument('--no-nadir', type=float, default=0.05,
+                        help="Fraction of folders without a nadir image (default 0.05)")
+    parser.add_argument('--ez-poles', type=float, default=0.15, help="Fraction of EZ poles (default 0.15)")
+    parser.add_argument('--executor', choices=["Threads", "Processes"], default="Threads",
+                        help="Worker pool of the check (default Threads)")
+    parser.add_argument('--workers', default="Auto", help="Workers of the check (default Auto)")
+    parser.add_argument('--repeat', type=int, default=1, help="Runs of each stage, the best is reported (default 1)")
+    parser.add_argument('--seed', type=int, default=1, help="Random seed of the flight (default 1)")
+    parser.add_argument('--json', help="Write the results to this JSON file")
+    parser.add_argument('--keep', action='store_true', help="Keep the generated flight")
+    run_benchmark(parser.parse_args())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,40 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Keep the app's caches (metadata index, compiled Structure ID List, journals, upload sessions) away from the user's
+os.environ['LOCALAPPDATA'] = tempfile.mkdtemp(prefix='fieldapp-tests-')
+
+import FieldApp  # noqa: E402
+import benchmark  # noqa: E402
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    """
+    The FieldApp module with its own app data folder and default settings for each test.
+    """
+    monkeypatch.setenv('LOCALAPPDATA', str(tmp_path / 'appdata'))
+    monkeypatch.setattr(FieldApp, 'metadata_index', None)
+    monkeypatch.setattr(FieldApp, 'settings', dict(FieldApp.default_settings))
+    FieldApp.cancel_zip.clear()
+    yield FieldApp
+    FieldApp.cancel_zip.clear()
+    FieldApp.job_context.job = None
+
+
+@pytest.fixture
+def flight(app, tmp_path, monkeypatch):
+    """
+    A small synthetic flight and its Structure ID List, generated by benchmark.py.
+    """
+    flight_path, list_path, summary = benchmark.generate_flight(
+        str(tmp_path), structures=6, images=3, image_size=4096, list_size=50, typos=0.3, duplicates=0,
+        no_nadir=0, ez_poles=0.2, seed=1)
+    monkeypatch.setattr(FieldApp, 'find_structure_list_file', lambda: list_path)
+    return flight_path
@@ -0,0 +1,155 @@
+import os
+import random
+import zipfile
+
+import pytest
+
+
+@pytest.fixture
+def source(tmp_path):
+    """
+    A flight folder with stored images, small deflated files and one large compressible file written in chunks.
+    """
+    rng = random.Random(1)
+    source = tmp_path / 'flight'
+    for folder in ('4000001', '4000002', os.path.join('4000003', 'extra')):
+        os.makedirs(source / folder)
+        for number in range(8):
+            (source / folder / f'DJI_{number:04d}.JPG').write_bytes(rng.randbytes(20000))
+        (source / folder / 'notes.txt').write_text('Structure notes\n' * 500)
+        (source / folder / 'scan.tif').write_bytes(b'II*\0' + bytes(30000))
+    (source / '4000001' / 'flight.log').write_text('GPS fix acquired\n' * 400000)
+    return str(source)
+
+
+def contents(path):
+    with zipfile.ZipFile(path) as zf:
+        assert zf.testzip() is None
+        return {info.filename: (info.compress_type, zf.read(info)) for info in zf.infolist()}
+
+
+def expected(source):
+    files = {}
+    for dirpath, _, filenames in os.walk(source):
+        for filename in filenames:
+            path = os.path.join(dirpath, filename)
+            with open(path, 'rb') as f:
+                files[os.path.join(os.path.basename(source), os.path.relpath(path, source))] = f.read()
+    return files
+
+
+def test_zip_directory_writes_every_file(app, source, tmp_path):
+    destination = str(tmp_path / 'package.zip')
+    app.zip_directory(source, destination, app.ProgressQueue())
+    zipped = contents(destination)
+    assert {name: data for name, (_, data) in zipped.items()} == expected(source)
+    assert all(compress_type == zipfile.ZIP_STORED for name, (compress_type, _) in zipped.items()
+               if name.endswith('.JPG'))
+    assert all(compress_type == zipfile.ZIP_DEFLATED for name, (compress_type, _) in zipped.items()
+               if name.endswith(('.txt', '.tif', '.log')))
+
+
+def test_unchanged_package_is_not_written_again(app, source, tmp_path):
+    destination = str(tmp_path / 'package.zip')
+    app.zip_directory(source, destination, app.ProgressQueue())
+    modified = os.stat(destination).st_mtime_ns
+    app.zip_directory(source, destination, app.ProgressQueue())
+    assert os.stat(destination).st_mtime_ns == modified
+
+
+def test_changed_files_are_rewritten(app, source, tmp_path):
+    destination = str(tmp_path / 'package.zip')
+    app.zip_directory(source, destination, app.ProgressQueue())
+    with open(os.path.join(source, '4000002', 'notes.txt'), 'a') as f:
+        f.write('Changed\n')
+    os.remove(os.path.join(source, '4000001', 'DJI_0003.JPG'))
+    with open(os.path.join(source, '4000002', 'new.txt'), 'w') as f:
+        f.write('Added\n')
+    app.zip_directory(source, destination, app.ProgressQueue())
+    assert {name: data for name, (_, data) in contents(destination).items()} == expected(source)
+
+
+@pytest.mark.parametrize('raw_writes', [True, False])
+def test_cancelled_package_resumes(app, source, tmp_path, monkeypatch, raw_writes):
+    if not raw_writes:
+        # A Python version without the private ZipFile attributes used to write deflated data as it is
+        monkeypatch.setattr(app.ArchiveWriter, 'RAW_WRITE_ATTRIBUTES', ('_missing',))
+    destination = str(tmp_path / 'package.zip')
+    record = app.PackagingJournal.record
+    recorded = []
+
+    def counted(self, entry, name, part, crc):
+        record(self, entry, name, part, crc)
+        recorded.append(name)
+        if len(recorded) == 10 and cancel:
+            app.request_cancel()
+
+    monkeypatch.setattr(app.PackagingJournal, 'record', counted)
+    cancel = True
+    app.zip_directory(source, destination, app.ProgressQueue())
+    with zipfile.ZipFile(destination) as zf:
+        assert 10 <= len(zf.namelist()) < len(expected(source))
+
+    app.cancel_zip.clear()
+    cancel = False
+    recorded.clear()
+    app.zip_directory(source, destination, app.ProgressQueue())
+    assert {name: data for name, (_, data) in contents(destination).items()} == expected(source)
+    # Only the entries missing from the cancelled run were written
+    assert len(recorded) == len(expected(source)) - 10
+
+
+def test_split_package_deletes_stale_parts(app, source, tmp_path):
+    destination = str(tmp_path / 'package.zip')
+    app.zip_directory(source, destination, app.ProgressQueue(), part_size=300000)
+    parts = sorted(name for name in os.listdir(tmp_path) if name.endswith('.zip'))
+    assert len(parts) > 2
+    zipped = {}
+    for part in parts:
+        zipped.update({name: data for name, (_, data) in contents(str(tmp_path / part)).items()})
+    assert zipped == expected(source)
+
+    app.zip_directory(source, destination, app.ProgressQueue(), part_size=100 * 1024 * 1024)
+    assert sorted(name for name in os.listdir(tmp_path) if name.endswith('.zip')) == parts[:1]
+
+
+def test_failed_rewrite_keeps_the_journal_of_the_old_zip(app, source, tmp_path, monkeypatch):
+    destination = str(tmp_path / 'package.zip')
+    app.zip_directory(source, destination, app.ProgressQueue())
+    before = contents(destination)
+
+    # Change files so that the zip file is rewritten, then run out of space halfway through, with the journal saved
+    # after every entry
+    for number in range(8):
+        with open(os.path.join(source, '4000002', f'DJI_{number:04d}.JPG'), 'wb') as f:
+            f.write(os.urandom(20000))
+    monkeypatch.setattr(app.PackagingJournal, 'save_interval', 0.0)
+    write_copies = app.ArchiveWriter.write_copies
+    calls = []
+
+    def fail_after_five(self, *args, **kwargs):
+        calls.append(args[0])
+        if len(calls) == 5:
+            raise OSError(28, "No space left on device")
+        return write_copies(self, *args, **kwargs)
+
+    monkeypatch.setattr(app.ArchiveWriter, 'write_copies', fail_after_five)
+    with pytest.raises(OSError):
+        app.zip_directory(source, destination, app.ProgressQueue())
+    assert contents(destination) == before
+    assert not os.path.exists(destination + '.tmp')
+
+    monkeypatch.setattr(app.ArchiveWriter, 'write_copies', write_copies)
+    app.zip_directory(source, destination, app.ProgressQueue())
+    assert {name: data for name, (_, data) in contents(destination).items()} == expected(source)
+
+
+def test_unsplit_package_keeps_its_journal(app, source, tmp_path):
+    destination = str(tmp_path / 'package.zip')
+    app.zip_directory(source, destination, app.ProgressQueue(), part_size=300000)
+    app.zip_directory(source, destination, app.ProgressQueue())
+    assert sorted(name for name in os.listdir(tmp_path) if name.endswith('.zip')) == ['package.zip']
+
+    modified = os.stat(destination).st_mtime_ns
+    app.zip_directory(source, destination, app.ProgressQueue())
+    assert os.stat(destination).st_mtime_ns == modified
@@ -0,0 +1,100 @@
+import os
+
+import pytest
+
+import benchmark
+
+
+@pytest.fixture
+def cards(tmp_path):
+    """
+    Two SD cards with DCIM folders of images, a video and hidden Mac files.
+    """
+    cards = []
+    for card, start in (('cardA', 0), ('cardB', 10)):
+        folder = tmp_path / card / 'DCIM' / f'100MEDIA_{card}'
+        os.makedirs(folder)
+        for number in range(start, start + 4):
+            benchmark.write_jpeg(str(folder / f'DJI_{number:04d}.JPG'), "2024:05:01 10:00:00", 39.9, -83.0, 50000)
+        (folder / f'DJI_{start:04d}.MP4').write_bytes(os.urandom(300000))
+        (folder / '._DJI_0000.JPG').write_bytes(b'mac')
+        cards.append(str(tmp_path / card))
+    return cards
+
+
+@pytest.fixture
+def job(app, tmp_path):
+    job = app.PackagingJob(str(tmp_path / 'flight'), "2001-0001", "05.01.2024")
+    app.job_context.job = job
+    return job
+
+
+def card_files(cards):
+    return sorted(os.path.relpath(os.path.join(dirpath, name), card) for card in cards
+                  for dirpath, _, files in os.walk(card) for name in files if not name.startswith('._'))
+
+
+def test_cards_are_copied_and_indexed(app, cards, job, tmp_path):
+    destination = str(tmp_path / 'flight')
+    summary = app.ingest_sources(cards, destination, app.ProgressQueue(), verify=True)
+    assert (summary['files'], summary['mac_files'], summary['failed'], summary['verify_failures']) == (10, 2, [], [])
+    copied = sorted(os.path.relpath(os.path.join(dirpath, name), destination)
+                    for dirpath, _, files in os.walk(destination) for name in files)
+    assert copied == card_files(cards)
+    for path in copied:
+        card = cards[0] if 'cardA' in path else cards[1]
+        with open(os.path.join(card, path), 'rb') as source, open(os.path.join(destination, path), 'rb') as copy:
+            assert source.read() == copy.read()
+
+    # The metadata of the images was read while copying them
+    image = os.path.join(destination, 'DCIM', '100MEDIA_cardA', 'DJI_0001.JPG')
+    stat = os.stat(image)
+    assert app.get_metadata_index().lookup(image, stat.st_size, stat.st_mtime_ns).date_taken == "05.01.2024"
+
+    # Ingesting again skips the files already copied
+    summary = app.ingest_sources(cards, destination, app.ProgressQueue())
+    assert (summary['files'], summary['already_copied']) == (0, 10)
+
+
+def test_conflicting_files_are_not_overwritten(app, cards, job, tmp_path):
+    destination = str(tmp_path / 'flight')
+    os.rename(os.path.join(cards[1], 'DCIM', '100MEDIA_cardB'), os.path.join(cards[1], 'DCIM', '100MEDIA_cardA'))
+    os.rename(os.path.join(cards[1], 'DCIM', '100MEDIA_cardA', 'DJI_0010.JPG'),
+              os.path.join(cards[1], 'DCIM', '100MEDIA_cardA', 'DJI_0001.JPG'))
+    summary = app.ingest_sources(cards, destination, app.ProgressQueue())
+    assert summary['files'] == 9
+    assert len(summary['conflicts']) == 1
+    with open(os.path.join(cards[0], 'DCIM', '100MEDIA_cardA', 'DJI_0001.JPG'), 'rb') as f:
+        with open(os.path.join(destination, 'DCIM', '100MEDIA_cardA', 'DJI_0001.JPG'), 'rb') as copy:
+            assert copy.read() == f.read()
+
+
+def test_bad_copies_are_removed(app, cards, job, tmp_path, monkeypatch):
+    destination = str(tmp_path / 'flight')
+    hash_file = app.hash_file
+    monkeypatch.setattr(app, 'hash_file', lambda path: 'mismatch' if path.endswith('DJI_0002.JPG') else hash_file(path))
+    summary = app.ingest_sources(cards, destination, app.ProgressQueue(), verify=True)
+    assert summary['verify_failures'] == [os.path.join(cards[0], 'DCIM', '100MEDIA_cardA', 'DJI_0002.JPG')]
+    assert not os.path.exists(os.path.join(destination, 'DCIM', '100MEDIA_cardA', 'DJI_0002.JPG'))
+    assert job.errors
+
+
+def test_cancelled_ingest_resumes(app, cards, job, tmp_path, monkeypatch):
+    destination = str(tmp_path / 'flight')
+    ingest_file = app.ingest_file
+    copied = []
+
+    def cancel_after_three(item, *args, **kwargs):
+        if len(copied) == 3:
+            job.cancelled.set()
+        copied.append(item.source)
+        return ingest_file(item, *args, **kwargs)
+
+    monkeypatch.setattr(app, 'ingest_file', cancel_after_three)
+    summary = app.ingest_sources(cards[:1], destination, app.ProgressQueue())
+    assert summary['cancelled']
+    assert summary['files'] == 3
+
+    job.cancelled.clear()
+    summary = app.ingest_sources(cards[:1], destination, app.ProgressQueue())
+    assert (summary['files'], summary['already_copied']) == (2, 3)
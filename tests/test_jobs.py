@@ -0,0 +1,61 @@
+import os
+import shutil
+import zipfile
+
+TEAM_NUMBER = "2001-0001"
+FLIGHT_DATE = "05.01.2024"
+
+
+def test_job_packages_flight(app, flight):
+    result = app.run_packaging_job(app.PackagingJob(flight, TEAM_NUMBER, FLIGHT_DATE, ignore_issues=True))
+    assert result['status'] == 'packaged', result['errors']
+    assert result['errors'] == []
+    assert result['issues']["FOLDER NAME AND GIS STRUCTURE ID MISMATCH"]
+    [zip_path] = result['zip_files']
+    with zipfile.ZipFile(zip_path) as zf:
+        assert zf.testzip() is None
+        images = [name for name in zf.namelist() if name.endswith('.JPG')]
+    assert len(images) >= 6 * 3
+    # The virtual layout leaves the flight directory as it is
+    assert os.path.isdir(flight)
+
+
+def test_job_stops_on_issues(app, flight):
+    result = app.run_packaging_job(app.PackagingJob(flight, TEAM_NUMBER, FLIGHT_DATE))
+    assert result['status'] == 'issues'
+    assert result['zip_files'] == []
+
+
+def test_job_fails_when_zipping_fails(app, flight, monkeypatch):
+    def fail(*args, **kwargs):
+        raise OSError(28, "No space left on device")
+
+    monkeypatch.setattr(app, 'zip_directory', fail)
+    result = app.run_packaging_job(app.PackagingJob(flight, TEAM_NUMBER, FLIGHT_DATE, ignore_issues=True))
+    assert result['status'] == 'failed'
+    assert result['zip_files'] == []
+    assert any("No space left on device" in error for error in result['errors'])
+    assert any("Traceback" in line for line in result['log'])
+
+
+def test_job_fails_when_an_image_disappears(app, flight, monkeypatch):
+    plan_archive_layout = app.plan_archive_layout
+
+    def remove_image(*args, **kwargs):
+        layout = plan_archive_layout(*args, **kwargs)
+        os.remove(next(entry.source for entry in layout if entry.source and entry.source.endswith('.JPG')))
+        return layout
+
+    monkeypatch.setattr(app, 'plan_archive_layout', remove_image)
+    result = app.run_packaging_job(app.PackagingJob(flight, TEAM_NUMBER, FLIGHT_DATE, ignore_issues=True))
+    assert result['status'] == 'failed'
+    assert any(error.startswith("FileNotFoundError") for error in result['errors'])
+
+
+def test_parallel_jobs_keep_their_own_state(app, flight, tmp_path):
+    second = str(tmp_path / 'second' / 'flight')
+    shutil.copytree(flight, second)
+    results = app.run_jobs([app.PackagingJob(flight, TEAM_NUMBER, FLIGHT_DATE, ignore_issues=True),
+                            app.PackagingJob(second, TEAM_NUMBER, FLIGHT_DATE, ignore_issues=True)])
+    assert [result['status'] for result in results] == ['packaged', 'packaged']
+    assert results[0]['zip_files'] != results[1]['zip_files']
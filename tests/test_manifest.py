@@ -0,0 +1,50 @@
+import os
+
+
+def make_tree(root):
+    for folder, files in (('4000001', ['DJI_0001N.JPG', 'DJI_0002.JPG']), (os.path.join('4000002', 'extra'), ['a.txt']),
+                          ('empty', [])):
+        os.makedirs(os.path.join(root, folder))
+        for name in files:
+            with open(os.path.join(root, folder, name), 'wb') as f:
+                f.write(b'x' * (len(name) * 10))
+
+
+def tree(walk):
+    return sorted((dirpath, sorted(dirnames), sorted(filenames)) for dirpath, dirnames, filenames in walk)
+
+
+def test_scan_matches_os_walk(app, tmp_path):
+    make_tree(str(tmp_path))
+    manifest = app.DirectoryManifest.scan(str(tmp_path))
+    assert tree(manifest.walk()) == tree(os.walk(str(tmp_path)))
+    assert manifest.size() == sum(os.path.getsize(path) for path, _ in manifest.iter_files())
+    assert sorted(folder.name for folder in manifest.innermost_folders()) == ['4000001', 'extra']
+
+
+def test_changes_are_recorded_without_scanning_again(app, tmp_path):
+    make_tree(str(tmp_path))
+    manifest = app.DirectoryManifest.scan(str(tmp_path))
+    folder = manifest.subfolder('4000001')
+    with open(os.path.join(folder.path, 'notes.txt'), 'w') as f:
+        f.write('notes')
+    folder.add_file('notes.txt')
+    folder.remove_file('DJI_0002.JPG')
+    os.remove(os.path.join(folder.path, 'DJI_0002.JPG'))
+
+    moved = manifest.subfolder('renamed')
+    os.makedirs(moved.path)
+    os.rename(folder.path, os.path.join(str(tmp_path), 'renamed', '4000001'))
+    folder.move_to(moved)
+    assert tree(manifest.walk()) == tree(os.walk(str(tmp_path)))
+
+
+def test_virtual_copies_read_their_source(app, tmp_path):
+    make_tree(str(tmp_path))
+    manifest = app.DirectoryManifest.scan(str(tmp_path))
+    source = manifest.subfolder('4000001')
+    source.copy_to(manifest.subfolder('EZPolesForTrans', virtual=True), virtual=True)
+    entries = {tree_path: disk_path for disk_path, tree_path, _ in manifest.iter_entries()}
+    copy = os.path.join(str(tmp_path), 'EZPolesForTrans', '4000001', 'DJI_0001N.JPG')
+    assert entries[copy] == os.path.join(source.path, 'DJI_0001N.JPG')
+    assert not os.path.exists(os.path.dirname(copy))
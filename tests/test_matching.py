@@ -0,0 +1,57 @@
+import itertools
+import os
+
+import numpy as np
+import pytest
+
+import benchmark
+
+
+def brute_force_cost(costs):
+    rows, columns = costs.shape
+    return min(sum(costs[row, column] for row, column in enumerate(assignment))
+               for assignment in itertools.permutations(range(columns), rows))
+
+
+@pytest.mark.parametrize('shape', [(1, 1), (3, 3), (4, 6), (5, 5), (2, 7)])
+def test_min_cost_assignment_is_optimal(app, shape):
+    rng = np.random.default_rng(sum(shape))
+    for _ in range(20):
+        costs = rng.integers(0, 100, size=shape).astype(float)
+        assignment = app.min_cost_assignment(costs)
+        assert len(set(assignment)) == shape[0]
+        assert all(0 <= column < shape[1] for column in assignment)
+        assert costs[np.arange(shape[0]), assignment].sum() == brute_force_cost(costs)
+
+
+def test_min_cost_assignment_avoids_missing_edges(app):
+    costs = np.array([[1, app.NO_EDGE_COST, app.UNMATCHED_COST, app.NO_EDGE_COST],
+                      [2, 3, app.NO_EDGE_COST, app.UNMATCHED_COST]])
+    assert list(app.min_cost_assignment(costs)) == [0, 1]
+
+
+def test_update_matched_structures_lists_final_matches(app):
+    issues_dict = {"FOLDER NAME AND GIS STRUCTURE ID MISMATCH": [("4000001x", "4000001"), ("4000002x", None)],
+                   "STRUCTURE EXCEEDS 500 FEET FROM GIS COORDINATES": [("4000003", 620.0, None, None, 1)]}
+    # 4000001x lost its first match to a later folder
+    matches = {"4000001": "4000009x", "4000005": "4000001x"}
+    app.update_matched_structures(issues_dict, matches, {}, {}, None)
+    assert issues_dict["FOLDER NAME AND GIS STRUCTURE ID MISMATCH"] == [("4000001x", "4000005"), ("4000002x", None)]
+    assert issues_dict["STRUCTURE EXCEEDS 500 FEET FROM GIS COORDINATES"] == [("4000003", 620.0, None, None, 1)]
+
+
+def test_check_matches_every_folder_to_its_own_structure(app, flight):
+    app.job_context.job = app.PackagingJob(flight, "2001-0001", "05.01.2024")
+    issues_dict, _ = app.check_issues(flight, app.ProgressQueue())
+    mismatches = issues_dict["FOLDER NAME AND GIS STRUCTURE ID MISMATCH"]
+    assert mismatches
+    matched = [match for _, match in mismatches]
+    assert None not in matched
+    assert len(set(matched)) == len(matched)
+    # The images of a folder are taken on its structure, at the point of the benchmark.py grid
+    for folder_name, match in mismatches:
+        nadir = next(name for name in os.listdir(os.path.join(flight, folder_name)) if name.endswith('N.JPG'))
+        latitude, longitude = app.get_gps_from_image(os.path.join(flight, folder_name, nadir))
+        row = round((latitude - benchmark.BASE_LATITUDE) / benchmark.STRUCTURE_SPACING)
+        column = round((longitude - benchmark.BASE_LONGITUDE) / benchmark.STRUCTURE_SPACING)
+        assert match == str(4000000 + row * 100 + column)
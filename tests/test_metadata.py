@@ -0,0 +1,94 @@
+import os
+
+import pytest
+
+import benchmark
+
+
+@pytest.fixture
+def image(tmp_path):
+    path = str(tmp_path / 'DJI_0001N.JPG')
+    benchmark.write_jpeg(path, "2024:05:01 10:00:00", 39.9, -83.0, 4096)
+    return path
+
+
+def test_metadata_is_read_from_the_header(app, image):
+    metadata = app.extract_image_metadata(image)
+    assert metadata.date_taken == "05.01.2024"
+    assert metadata.gps == pytest.approx((39.9, -83.0))
+
+
+def test_unreadable_images_have_no_metadata(app, image, tmp_path):
+    with open(image, 'r+b') as f:
+        f.truncate(40)
+    assert app.read_image_tags(image) == {}
+    assert app.read_image_tags(str(tmp_path / 'missing.JPG')) == {}
+    assert app.extract_image_metadata(image) == app.ImageMetadata(None, None, None, None)
+
+
+def test_parser_bugs_are_not_hidden(app, image, monkeypatch):
+    def broken(header, f):
+        raise TypeError("unexpected tag type")
+
+    monkeypatch.setattr(app, 'parse_image_header', broken)
+    with pytest.raises(TypeError):
+        app.read_image_tags(image)
+
+
+def test_index_returns_metadata_of_unchanged_files(app, tmp_path):
+    index = app.MetadataIndex(str(tmp_path / 'index.sqlite'))
+    metadata = app.ImageMetadata("05.01.2024", (39.9, -83.0), 1, "DJI FC3411")
+    index.store('/flight/a.JPG', 100, 5, metadata)
+    index.store('/flight/b.JPG', 200, 6, app.ImageMetadata(None, None, None, None))
+    assert index.lookup('/flight/a.JPG', 100, 5) == metadata
+    assert index.lookup('/flight/a.JPG', 101, 5) is None
+    assert index.lookup('/flight/a.JPG', 100, 6) is None
+    assert index.lookup('/flight/c.JPG', 100, 5) is None
+    assert index.lookup_many(['/flight/a.JPG', '/flight/b.JPG', '/flight/c.JPG']) == {
+        '/flight/a.JPG': (100, 5, metadata), '/flight/b.JPG': (200, 6, app.ImageMetadata(None, None, None, None))}
+
+
+def test_index_is_kept_between_runs_and_bounded(app, tmp_path):
+    path = str(tmp_path / 'index.sqlite')
+    index = app.MetadataIndex(path, max_entries=3)
+    for number in range(5):
+        index.store(f'/flight/{number}.JPG', number, number, app.ImageMetadata("05.01.2024", None, None, None))
+    index.lookup('/flight/0.JPG', 0, 0)  # Used last, so it is kept
+    index.flush()
+    index.connection.close()
+
+    index = app.MetadataIndex(path, max_entries=3)
+    assert sorted(index.lookup_many(f'/flight/{number}.JPG' for number in range(5))) == \
+        ['/flight/0.JPG', '/flight/3.JPG', '/flight/4.JPG']
+
+
+def test_index_of_an_older_schema_is_rebuilt(app, tmp_path):
+    path = str(tmp_path / 'index.sqlite')
+    index = app.MetadataIndex(path)
+    index.store('/flight/a.JPG', 1, 1, app.ImageMetadata("05.01.2024", None, None, None))
+    index.flush()
+    index.connection.execute("PRAGMA user_version=1")
+    index.connection.close()
+    assert app.MetadataIndex(path).lookup('/flight/a.JPG', 1, 1) is None
+
+
+def test_images_are_only_parsed_once(app, image, monkeypatch):
+    parsed = []
+    extract_image_metadata = app.extract_image_metadata
+
+    def counted(file_path):
+        parsed.append(file_path)
+        return extract_image_metadata(file_path)
+
+    monkeypatch.setattr(app, 'extract_image_metadata', counted)
+    first = app.read_image_metadata(image)
+    app.get_metadata_index().flush()
+    app.run_metadata_cache().clear()
+    assert app.read_image_metadata(image) == first
+    assert parsed == [image]
+
+    # A changed image is parsed again
+    os.utime(image, ns=(1, 1))
+    app.run_metadata_cache().clear()
+    app.read_image_metadata(image)
+    assert parsed == [image, image]
@@ -0,0 +1,59 @@
+import math
+import random
+
+import pytest
+
+
+@pytest.fixture
+def structures():
+    """
+    Structures scattered around Columbus, with a few missing or invalid coordinates as in real lists.
+    """
+    rng = random.Random(5)
+    ids = [str(4000000 + i) for i in range(400)]
+    latitudes = [39.9 + rng.uniform(-0.1, 0.1) for _ in ids]
+    longitudes = [-83.0 + rng.uniform(-0.1, 0.1) for _ in ids]
+    latitudes[10], longitudes[11], latitudes[12] = math.nan, math.nan, 123.0
+    return ids, latitudes, longitudes
+
+
+def brute_force(app, structures, lat, lon, available=None, exclude=()):
+    ids, latitudes, longitudes = structures
+    distances = [(app.geodesic_distance_feet((lat, lon), (latitude, longitude)), structure_id)
+                 for structure_id, latitude, longitude in zip(ids, latitudes, longitudes)
+                 if (available is None or structure_id in available) and structure_id not in exclude]
+    return sorted((distance, structure_id) for distance, structure_id in distances if distance is not None)
+
+
+def test_nearest_matches_measuring_every_structure(app, structures):
+    index = app.StructureIndex(*structures)
+    rng = random.Random(6)
+    for _ in range(20):
+        lat, lon = 39.9 + rng.uniform(-0.12, 0.12), -83.0 + rng.uniform(-0.12, 0.12)
+        expected = brute_force(app, structures, lat, lon)[:5]
+        assert [(structure_id, distance) for distance, structure_id in expected] == index.nearest(lat, lon, k=5)
+
+
+def test_nearest_among_available_choices(app, structures):
+    index = app.StructureIndex(*structures)
+    available = set(structures[0][::7])
+    exclude = {structures[0][14]}
+    expected = brute_force(app, structures, 39.95, -83.05, available, exclude)[:3]
+    assert [structure_id for _, structure_id in expected] == \
+        [structure_id for structure_id, _ in index.nearest(39.95, -83.05, k=3, available=available,
+                                                           exclude=exclude)]
+
+
+def test_nearest_far_from_every_structure(app, structures):
+    index = app.StructureIndex(*structures)
+    expected = brute_force(app, structures, 45.0, -75.0)[0]
+    assert index.nearest(45.0, -75.0) == [(expected[1], expected[0])]
+    assert index.nearest(45.0, -75.0, available=set()) == []
+
+
+def test_within_radius(app, structures):
+    index = app.StructureIndex(*structures)
+    expected = [(structure_id, distance) for distance, structure_id in brute_force(app, structures, 39.9, -83.0)
+                if distance <= 8000]
+    assert expected
+    assert index.within(39.9, -83.0, 8000) == expected
@@ -0,0 +1,117 @@
+import os
+import threading
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+from upload_server import UploadHandler, UploadStore
+
+
+@pytest.fixture
+def server(tmp_path):
+    """
+    upload_server.py on a free port. Chunk numbers added to server.reject are refused with a 400 error, and those
+    added to server.busy with one 503 error each.
+    """
+
+    class Handler(UploadHandler):
+        store = UploadStore(str(tmp_path / 'received'))
+
+        def do_PUT(self):
+            number = int(self.path.rsplit('/', 1)[-1]) if '/chunks/' in self.path else None
+            server.chunks.append(number)
+            if number in server.reject or number in server.busy:
+                self.read_body()
+                status = 400 if number in server.reject else 503
+                server.busy.discard(number)
+                return self.send_json(status, {"error": "refused"})
+            return super().do_PUT()
+
+    server = ThreadingHTTPServer(('localhost', 0), Handler)
+    server.url = f"http://localhost:{server.server_address[1]}"
+    server.directory = Handler.store.directory
+    server.chunks, server.reject, server.busy = [], set(), set()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def package(app, tmp_path, monkeypatch):
+    monkeypatch.setattr(app, 'UPLOAD_CHUNK_SIZE', 64 * 1024)
+    paths = []
+    for number, size in enumerate((300 * 1024, 64 * 1024, 1000), start=1):
+        path = tmp_path / f'2001-0001_05.01.2024.part{number:02d}.zip'
+        path.write_bytes(os.urandom(size))
+        paths.append(str(path))
+    return paths
+
+
+def assert_received(server, paths):
+    for path in paths:
+        with open(path, 'rb') as f, open(os.path.join(server.directory, os.path.basename(path)), 'rb') as received:
+            assert received.read() == f.read()
+
+
+def test_package_is_uploaded(app, server, package):
+    uploader = app.PackageUploader(server.url)
+    for path in package:
+        uploader.add(path)
+    assert uploader.wait(app.ProgressQueue())
+    assert uploader.uploaded == package
+    assert_received(server, package)
+    assert len(server.chunks) == 5 + 1 + 1
+
+
+def test_busy_server_is_retried(app, server, package):
+    server.busy.add(2)
+    uploader = app.PackageUploader(server.url)
+    uploader.add(package[0])
+    assert uploader.wait(app.ProgressQueue())
+    assert server.chunks.count(2) == 2
+    assert_received(server, package[:1])
+
+
+def test_failed_upload_resumes(app, server, package):
+    server.reject.add(3)
+    uploader = app.PackageUploader(server.url)
+    for path in package:
+        uploader.add(path)
+    assert not uploader.wait(app.ProgressQueue())
+    assert uploader.failed == package
+    assert not os.path.exists(os.path.join(server.directory, os.path.basename(package[0])))
+
+    # Only the chunk that was refused is sent again, and the files after it are uploaded
+    server.reject.clear()
+    server.chunks.clear()
+    uploader = app.PackageUploader(server.url)
+    for path in package:
+        uploader.add(path)
+    assert uploader.wait(app.ProgressQueue())
+    assert server.chunks == [3, 0, 0]
+    assert_received(server, package)
+
+    # Unchanged files that were uploaded are not sent again
+    server.chunks.clear()
+    uploader = app.PackageUploader(server.url)
+    uploader.add(package[0])
+    assert uploader.wait(app.ProgressQueue())
+    assert server.chunks == []
+
+
+def test_stopped_uploader_ends_its_thread(app, server, package):
+    uploader = app.PackageUploader(server.url)
+    uploader.stop()
+    assert not uploader.thread.is_alive()
+    assert uploader.uploaded == []
+
+
+def test_session_save_errors_are_logged(app, tmp_path):
+    job = app.PackagingJob(str(tmp_path), "2001-0001", "05.01.2024")
+    app.job_context.job = job
+    sessions = app.UploadSessions()
+    sessions.path = str(tmp_path / 'missing' / 'uploads.json')
+    sessions.save()
+    assert any("Unable to save the upload sessions" in line for line in job.lines)
@@ -0,0 +1,120 @@
+import os
+import shutil
+import time
+
+import pytest
+
+
+@pytest.fixture
+def watch(app, monkeypatch):
+    monkeypatch.setattr(app, 'WATCH_INTERVAL', 0.05)
+    monkeypatch.setattr(app, 'WATCH_SETTLE', 0.2)
+    logs = []
+    monkeypatch.setattr(app, 'print_to_widget', lambda text, newline=True, color='white', url=None: logs.append(text))
+    watchers = []
+
+    def start(directory):
+        watcher = app.FolderWatcher(directory)
+        watcher.logs = logs
+        watcher.start()
+        watchers.append(watcher)
+        return watcher
+
+    yield start
+    for watcher in watchers:
+        watcher.stop()
+        watcher.thread.join()
+
+
+def wait_for(condition, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.02)
+
+
+def folder_state(folder):
+    files = [entry.name for entry in os.scandir(folder)]
+    stats = {name: (os.stat(os.path.join(folder, name)).st_size, os.stat(os.path.join(folder, name)).st_mtime_ns)
+             for name in files}
+    return files, stats
+
+
+def structure_folders(flight):
+    return sorted(os.path.join(flight, name) for name in os.listdir(flight))
+
+
+def test_settled_folders_are_scanned_once(app, flight, watch, monkeypatch):
+    listed = []
+    list_directory = app.FolderWatcher._list_directory
+
+    def counted(self, path):
+        listed.append(path)
+        return list_directory(self, path)
+
+    monkeypatch.setattr(app.FolderWatcher, '_list_directory', counted)
+    watcher = watch(flight)
+    folders = structure_folders(flight)
+    wait_for(lambda: all(watcher.cached_scan(folder, *folder_state(folder)) for folder in folders))
+
+    # Nothing changes, so no folder is listed again
+    listed.clear()
+    time.sleep(0.3)
+    assert listed == []
+
+    # A changed folder is scanned again once it settles
+    folder = folders[0]
+    shutil.copy(os.path.join(folder, sorted(os.listdir(folder))[0]), os.path.join(folder, 'copy.JPG'))
+    assert watcher.cached_scan(folder, *folder_state(folder)) is None
+    wait_for(lambda: watcher.cached_scan(folder, *folder_state(folder)) is not None)
+    assert len(watcher.cached_scan(folder, *folder_state(folder)).image_paths) == len(os.listdir(folder))
+
+
+def test_folder_is_not_scanned_while_files_are_copied(app, flight, watch):
+    watcher = watch(flight)
+    folder = os.path.join(flight, 'copying')
+    os.makedirs(folder)
+    with open(os.path.join(folder, 'DJI_0001N.JPG'), 'wb') as f:
+        deadline = time.monotonic() + 0.6
+        while time.monotonic() < deadline:
+            f.write(os.urandom(1024))
+            f.flush()
+            time.sleep(0.02)
+            assert folder not in watcher.scans
+    wait_for(lambda: watcher.cached_scan(folder, *folder_state(folder)) is not None)
+
+
+def test_watcher_keeps_running_after_an_error(app, flight, watch, monkeypatch):
+    scan_structure_folder = app.scan_structure_folder
+    calls = []
+
+    def fail_once(*args):
+        calls.append(args[0])
+        if len(calls) == 1:
+            raise RuntimeError("database is locked")
+        return scan_structure_folder(*args)
+
+    monkeypatch.setattr(app, 'scan_structure_folder', fail_once)
+    watcher = watch(flight)
+    folders = structure_folders(flight)
+    wait_for(lambda: all(watcher.cached_scan(folder, *folder_state(folder)) for folder in folders))
+    assert watcher.thread.is_alive()
+    assert [line for line in watcher.logs if "Watch mode error" in str(line)] == \
+        ["Watch mode error: RuntimeError: database is locked. The folders are checked again when packaging."]
+
+
+def test_structure_list_is_compiled_once_by_concurrent_loads(app, flight, monkeypatch):
+    read_excel = app.pd.read_excel
+    reads = []
+
+    def counted(*args, **kwargs):
+        reads.append(args[0])
+        time.sleep(0.2)
+        return read_excel(*args, **kwargs)
+
+    monkeypatch.setattr(app.pd, 'read_excel', counted)
+    monkeypatch.setattr(app, 'print_to_widget', lambda *args, **kwargs: None)
+    with app.ThreadPoolExecutor(max_workers=4) as executor:
+        lists = list(executor.map(lambda _: app.load_structure_list(), range(4)))
+    assert len(reads) == 1
+    assert all(df.equals(lists[0]) for df in lists)
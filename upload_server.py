@@ -0,0 +1,186 @@
+"""
+Stand-in for the field upload server, to test the uploader of the app without the real server.
+
+    python upload_server.py --port 8000 --directory uploads --fail-rate 0.1
+
+Then enter http://localhost:8000 as the upload server in Settings (or pass --upload-url to the app). Files are taken in
+fixed-size chunks, each checked against its SHA-1:
+
+    POST /uploads {"name", "size", "chunk_size"} starts an upload session and returns {"id"}
+    GET /uploads/<id> returns the session with the numbers of the chunks "received" so far, and whether it is "complete"
+    PUT /uploads/<id>/chunks/<number> stores one chunk, checked against its X-Chunk-SHA1 header
+    POST /uploads/<id>/complete joins the chunks into <directory>/<name> once they have all been received
+
+Sessions are kept in the directory, so they survive a restart of the server. --fail-rate rejects that fraction of the
+chunks with a 503 error, to test retries and resuming.
+"""
+import argparse
+import hashlib
+import json
+import os
+import random
+import re
+import shutil
+import threading
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+CHUNK_PATH = re.compile(r'^/uploads/([0-9a-f]+)/chunks/(\d+)$')
+SESSION_PATH = re.compile(r'^/uploads/([0-9a-f]+)(/complete)?$')
+
+
+class UploadStore:
+    """
+    Upload sessions and their chunks, kept in <directory>/.sessions/<id>.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.sessions_dir = os.path.join(directory, '.sessions')
+        os.makedirs(self.sessions_dir, exist_ok=True)
+        self.lock = threading.Lock()
+
+    def session_dir(self, upload_id):
+        return os.path.join(self.sessions_dir, upload_id)
+
+    def load(self, upload_id):
+        try:
+            with open(os.path.join(self.session_dir(upload_id), 'session.json'), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def save(self, session):
+        path = os.path.join(self.session_dir(session["id"]), 'session.json')
+        with open(path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(session, f)
+        os.replace(path + '.tmp', path)
+
+    def create(self, name, size, chunk_size):
+        session = {"id": uuid.uuid4().hex, "name": os.path.basename(name), "size": size, "chunk_size": chunk_size,
+                   "complete": False}
+        os.makedirs(self.session_dir(session["id"]))
+        self.save(session)
+        return session
+
+    def received(self, upload_id):
+        return sorted(int(name) for name in os.listdir(self.session_dir(upload_id)) if name.isdigit())
+
+    def chunk_count(self, session):
+        return max(1, -(-session["size"] // session["chunk_size"]))
+
+    def expected_length(self, session, number):
+        return max(0, min(session["chunk_size"], session["size"] - number * session["chunk_size"]))
+
+    def store_chunk(self, upload_id, number, data):
+        path = os.path.join(self.session_dir(upload_id), str(number))
+        with open(path + '.tmp', 'wb') as f:
+            f.write(data)
+        os.replace(path + '.tmp', path)
+
+    def complete(self, session):
+        """
+        Joins the chunks of a session into its file. Returns the numbers of the missing chunks, if any.
+        """
+        with self.lock:
+            if session["complete"]:
+                return []
+            missing = sorted(set(range(self.chunk_count(session))) - set(self.received(session["id"])))
+            if missing:
+                return missing
+            path = os.path.join(self.directory, session["name"])
+            with open(path + '.tmp', 'wb') as f:
+                for number in range(self.chunk_count(session)):
+                    with open(os.path.join(self.session_dir(session["id"]), str(number)), 'rb') as chunk:
+                        shutil.copyfileobj(chunk, f)
+            os.replace(path + '.tmp', path)
+            for name in os.listdir(self.session_dir(session["id"])):
+                if name.isdigit():
+                    os.remove(os.path.join(self.session_dir(session["id"]), name))
+            session["complete"] = True
+            self.save(session)
+            return []
+
+
+class UploadHandler(BaseHTTPRequestHandler):
+    store = None
+    fail_rate = 0.0
+
+    def send_json(self, status, body):
+        data = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def read_body(self):
+        return self.rfile.read(int(self.headers.get('Content-Length', 0)))
+
+    def do_GET(self):
+        match = SESSION_PATH.match(self.path)
+        session = self.store.load(match.group(1)) if match and not match.group(2) else None
+        if session is None:
+            return self.send_json(404, {"error": "unknown upload"})
+        received = list(range(self.store.chunk_count(session))) if session["complete"] else \
+            self.store.received(session["id"])
+        self.send_json(200, dict(session, received=received))
+
+    def do_POST(self):
+        if self.path == '/uploads':
+            try:
+                request = json.loads(self.read_body())
+                session = self.store.create(request["name"], int(request["size"]), int(request["chunk_size"]))
+            except (ValueError, KeyError, TypeError):
+                return self.send_json(400, {"error": "expected name, size and chunk_size"})
+            return self.send_json(201, {"id": session["id"]})
+
+        match = SESSION_PATH.match(self.path)
+        session = self.store.load(match.group(1)) if match and match.group(2) else None
+        if session is None:
+            return self.send_json(404, {"error": "unknown upload"})
+        self.read_body()
+        missing = self.store.complete(session)
+        if missing:
+            return self.send_json(409, {"error": "chunks missing", "missing": missing})
+        self.send_json(200, {"name": session["name"], "size": session["size"]})
+
+    def do_PUT(self):
+        match = CHUNK_PATH.match(self.path)
+        session = self.store.load(match.group(1)) if match else None
+        data = self.read_body()
+        if session is None:
+            return self.send_json(404, {"error": "unknown upload"})
+        number = int(match.group(2))
+        if number >= self.store.chunk_count(session) or len(data) != self.store.expected_length(session, number):
+            return self.send_json(400, {"error": "unexpected chunk"})
+        if hashlib.sha1(data).hexdigest() != self.headers.get('X-Chunk-SHA1'):
+            return self.send_json(400, {"error": "checksum mismatch"})
+        if random.random() < self.fail_rate:
+            return self.send_json(503, {"error": "simulated failure"})
+        self.store.store_chunk(session["id"], number, data)
+        self.send_json(200, {"received": number})
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the chunked upload protocol of the field upload server.")
+    parser.add_argument('--host', default='localhost', help="Address to listen on (default localhost)")
+    parser.add_argument('--port', type=int, default=8000, help="Port to listen on, 0 for any free port (default 8000)")
+    parser.add_argument('--directory', default='uploads', help="Where uploaded files are saved (default uploads)")
+    parser.add_argument('--fail-rate', type=float, default=0.0,
+                        help="Fraction of the chunks rejected with a 503 error (default 0)")
+    args = parser.parse_args()
+
+    UploadHandler.store = UploadStore(args.directory)
+    UploadHandler.fail_rate = args.fail_rate
+    server = ThreadingHTTPServer((args.host, args.port), UploadHandler)
+    print(f"Serving uploads on http://{args.host}:{server.server_address[1]}, saving them to "
+          f"{os.path.abspath(args.directory)}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()